@@ -0,0 +1,133 @@
+# scrapers/cache_enriquecimento.py
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import logging
+from .similaridade import normalizar_nome
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB = Path("data/cache_enriquecimento.db")
+
+DIA = 24 * 3600
+
+# (TTL de resultado encontrado, TTL de "não encontrado") por tipo de chave
+TTLS = {
+    'cnpj': (90 * DIA, 7 * DIA),    # nome+cidade -> CNPJ
+    'dados': (30 * DIA, 7 * DIA),   # CNPJ -> dados da Receita (sócios, capital...)
+}
+
+class CacheEnriquecimento:
+    """
+    Cache de dois níveis para o enriquecimento: LRU em memória na frente de um
+    SQLite em disco, que sobrevive entre execuções. Guarda também resultados
+    negativos (None), com TTL menor, para não repetir buscas que já falharam.
+    Valores são serializados em JSON: quem lê recebe sempre uma cópia.
+    """
+
+    AUSENTE = object()  # Diferencia "não está no cache" de "cache diz None"
+
+    def __init__(self, db_path: Path = CACHE_DB, maxsize: int = 10_000):
+        self.db_path = Path(db_path)
+        self.maxsize = maxsize
+        self._lru = OrderedDict()  # (tipo, chave) -> (json, expira_em)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @staticmethod
+    def chave_nome(nome: str, cidade: str = None, uf: str = None) -> str:
+        """Chave normalizada de nome+cidade+UF ("Imobiliária X", "João Pessoa" -> "IMOBILIARIA X|JOAO PESSOA|PB")"""
+        return "|".join((normalizar_nome(nome or ""), normalizar_nome(cidade or ""), (uf or "").strip().upper()))
+
+    @staticmethod
+    def chave_cnpj(cnpj: str) -> str:
+        return "".join(c for c in (cnpj or "") if c.isdigit())
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Abre o SQLite só no primeiro uso (importar o módulo não cria arquivo)"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path.as_posix(), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("PRAGMA synchronous=NORMAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    tipo TEXT,
+                    chave TEXT,
+                    valor TEXT,
+                    expira_em REAL,
+                    PRIMARY KEY (tipo, chave)
+                ) WITHOUT ROWID
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def _lembrar(self, k, valor_json: str, expira_em: float):
+        self._lru[k] = (valor_json, expira_em)
+        self._lru.move_to_end(k)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def get(self, tipo: str, chave: str):
+        """Valor guardado (pode ser None = negativo) ou CacheEnriquecimento.AUSENTE"""
+        k = (tipo, chave)
+        agora = time.time()
+
+        with self._lock:
+            item = self._lru.get(k)
+            if item is not None:
+                if item[1] > agora:
+                    self._lru.move_to_end(k)
+                    return json.loads(item[0])
+                del self._lru[k]
+
+            row = self._conexao().execute(
+                "SELECT valor, expira_em FROM cache WHERE tipo = ? AND chave = ?", k
+            ).fetchone()
+            if row is None or row[1] <= agora:
+                return CacheEnriquecimento.AUSENTE
+
+            self._lembrar(k, row[0], row[1])
+            return json.loads(row[0])
+
+    def contem(self, tipo: str, chave: str) -> bool:
+        return self.get(tipo, chave) is not CacheEnriquecimento.AUSENTE
+
+    def set(self, tipo: str, chave: str, valor, ttl: float = None):
+        """Grava nos dois níveis; TTL padrão vem de TTLS (negativo se valor é None)"""
+        if ttl is None:
+            ttl_positivo, ttl_negativo = TTLS[tipo]
+            ttl = ttl_negativo if valor is None else ttl_positivo
+
+        k = (tipo, chave)
+        valor_json = json.dumps(valor, ensure_ascii=False)
+        expira_em = time.time() + ttl
+
+        with self._lock:
+            self._lembrar(k, valor_json, expira_em)
+            conn = self._conexao()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (tipo, chave, valor, expira_em) VALUES (?, ?, ?, ?)",
+                (tipo, chave, valor_json, expira_em)
+            )
+            conn.commit()
+
+    def limpar_expirados(self) -> int:
+        """Remove do disco as entradas vencidas; retorna quantas"""
+        with self._lock:
+            conn = self._conexao()
+            removidas = conn.execute("DELETE FROM cache WHERE expira_em <= ?", (time.time(),)).rowcount
+            conn.commit()
+        if removidas:
+            logger.info(f"🧹 {removidas:,} entradas vencidas removidas do cache")
+        return removidas
+
+    def fechar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._lru.clear()
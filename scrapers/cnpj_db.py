@@ -0,0 +1,147 @@
+# scrapers/cnpj_db.py
+import os
+import sqlite3
+import time
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+DB = Path("data/cnpj.db")
+
+# O SQLite limita ao SQLITE_MAX_MMAP_SIZE da compilação (em geral ~2 GB): pedir
+# mais não faz mal, vale o máximo que a biblioteca aceitar
+MMAP_SIZE = 1 << 36
+CACHE_KB = 65536
+PAGE_SIZE = 16384  # páginas maiores: menos níveis nas B-trees e leituras sequenciais maiores
+
+# PRAGMA application_id do arquivo gerado por otimizar() ("CNPJ" em ASCII)
+MARCA_SNAPSHOT = 0x434E504A
+
+def _cabecalho(db_path: Path) -> bytes:
+    """Os 100 bytes do cabeçalho do arquivo SQLite (b'' se não existir)"""
+    try:
+        with open(db_path, "rb") as f:
+            return f.read(100)
+    except OSError:
+        return b""
+
+def marcado_snapshot(db_path: Path = DB) -> bool:
+    """
+    True se o arquivo é o que otimizar() gerou e ninguém escreveu nele depois.
+    O otimizar grava a marca (application_id) e, no user_version, o contador de
+    mudanças do cabeçalho; todo commit fora do WAL incrementa esse contador e
+    ligar o WAL muda os bytes 18/19, então qualquer escrita no próprio arquivo
+    (build sem --snapshot, Segmentos.preparar...) desfaz a marca.
+    """
+    cab = _cabecalho(db_path)
+    if len(cab) < 100 or not cab.startswith(b"SQLite format 3\0"):
+        return False
+    contador, versao, marca = (int.from_bytes(cab[i:i + 4], "big") for i in (24, 60, 68))
+    return cab[18] == cab[19] == 1 and marca == MARCA_SNAPSHOT and versao == contador
+
+def snapshot_seguro(db_path: Path = DB) -> bool:
+    """
+    True se o arquivo pode ser aberto com immutable=1: saiu do otimizar() sem
+    escritas depois (marcado_snapshot) e não há WAL com dados nem journal
+    pendente (build em andamento).
+    """
+    for sufixo in ("-wal", "-journal"):
+        arq = Path(Path(db_path).as_posix() + sufixo)
+        if arq.exists() and arq.stat().st_size > 0:
+            return False
+    return marcado_snapshot(db_path)
+
+def conectar(db_path: Path = DB, snapshot: bool = True, mmap_size: int = MMAP_SIZE,
+             cache_kb: int = CACHE_KB, cache_compartilhado: bool = False, **kwargs) -> sqlite3.Connection:
+    """
+    Conexão somente leitura ao cnpj.db, para consultas entre um build e outro.
+
+    Com `snapshot`, um arquivo gerado por otimizar() (build com --snapshot) é
+    aberto com immutable=1: sem locks nem checagem de mudanças no arquivo, e as
+    páginas vêm do mmap (page cache do SO, sem cópia, compartilhado por todas
+    as conexões e processos). Esse arquivo nunca é reescrito, só trocado: reabra
+    depois de cada build. Qualquer outro (build sem --snapshot, que reescreve o
+    cnpj.db no lugar, ou WAL/journal pendente) abre em mode=ro comum.
+    `cache_compartilhado` liga o cache=shared do SQLite entre conexões do processo
+    (com mmap raramente compensa: o modo serializa o acesso às tabelas).
+    """
+    caminho = Path(db_path).absolute().as_posix()
+    parametros = ["mode=ro"]
+    if snapshot:
+        if snapshot_seguro(db_path):
+            parametros.append("immutable=1")
+        else:
+            logger.debug(f"{db_path} não é um snapshot do otimizar() ou tem WAL/journal pendente: abrindo em mode=ro")
+    if cache_compartilhado:
+        parametros.append("cache=shared")
+
+    kwargs.setdefault("check_same_thread", False)
+    conn = sqlite3.connect(f"file:{caminho}?{'&'.join(parametros)}", uri=True, **kwargs)
+    conn.execute(f"PRAGMA mmap_size={mmap_size}")
+    conn.execute(f"PRAGMA cache_size=-{cache_kb}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA query_only=1")
+    return conn
+
+def somente_leitura(conn: sqlite3.Connection) -> bool:
+    """True para conexões abertas por conectar() (ou com PRAGMA query_only ligado)"""
+    return bool(conn.execute("PRAGMA query_only").fetchone()[0])
+
+def _marcar_snapshot(db_path: Path):
+    """
+    Grava a marca de snapshot no arquivo novo do VACUUM INTO: application_id e,
+    no user_version, o contador de mudanças que o próprio commit vai deixar
+    (o contador sobe 1 por commit). Ver marcado_snapshot.
+    """
+    contador = int.from_bytes(_cabecalho(db_path)[24:28], "big")
+    conn = sqlite3.connect(Path(db_path).as_posix(), isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+        conn.execute(f"PRAGMA application_id={MARCA_SNAPSHOT}")
+        conn.execute(f"PRAGMA user_version={contador + 1}")
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    if not marcado_snapshot(db_path):
+        logger.warning(f"⚠️ Marca de snapshot não conferiu em {db_path}: leitores vão abrir em mode=ro")
+
+def otimizar(db_path: Path = DB, page_size: int = PAGE_SIZE):
+    """
+    Deixa o banco pronto para leitura em modo snapshot, depois do build:
+    ANALYZE (estatísticas novas para o planejador), VACUUM INTO um arquivo novo
+    (compactado, com `page_size` e journal_mode=DELETE, sem WAL), marca de
+    snapshot (ver marcado_snapshot) e troca atômica do arquivo. Leitores imutáveis ainda abertos continuam no arquivo antigo,
+    consistente, até reabrirem. Precisa de espaço livre para uma cópia do banco.
+    """
+    db_path = Path(db_path)
+    novo = Path(db_path.as_posix() + ".snapshot")
+    if novo.exists():
+        novo.unlink()
+
+    conn = sqlite3.connect(db_path.as_posix(), isolation_level=None)
+    try:
+        inicio = time.perf_counter()
+        conn.execute("ANALYZE")
+        logger.info(f"📈 ANALYZE em {time.perf_counter() - inicio:.1f}s")
+
+        inicio = time.perf_counter()
+        conn.execute(f"PRAGMA page_size={page_size}")
+        conn.execute("VACUUM INTO ?", (novo.as_posix(),))
+        logger.info(f"🧹 VACUUM INTO em {time.perf_counter() - inicio:.1f}s (page_size={page_size})")
+        _marcar_snapshot(novo)
+    except Exception:
+        if novo.exists():
+            novo.unlink()
+        raise
+    finally:
+        conn.close()
+
+    antes = db_path.stat().st_size
+    os.replace(novo, db_path)
+    # WAL/SHM eram do arquivo antigo (já checkpointado ao fechar)
+    for sufixo in ("-wal", "-shm"):
+        arq = Path(db_path.as_posix() + sufixo)
+        if arq.exists():
+            arq.unlink()
+    logger.info(f"📸 Snapshot pronto: {antes / 1e6:,.0f} MB -> {db_path.stat().st_size / 1e6:,.0f} MB")
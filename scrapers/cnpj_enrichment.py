@@ -5,48 +5,110 @@ import logging
 import re
 from .local_cnpj_search import LocalCNPJSearch
 from .cnpj_google import CNPJGoogleSearch
+from .http_fetcher import FonteIndisponivel
+from .cache_enriquecimento import CacheEnriquecimento
 
 logger = logging.getLogger(__name__)
 
+# Tabelas de domínio da Receita (Qualificacoes.zip / porte da empresa), no formato do ReceitaWS
+QUALIFICACOES = {
+    '05': 'Administrador', '08': 'Conselheiro de Administração', '10': 'Diretor',
+    '16': 'Presidente', '17': 'Procurador', '22': 'Sócio', '28': 'Sócio-Gerente',
+    '29': 'Sócio Incapaz ou Relat.Incapaz (exceto menor)', '30': 'Sócio Menor (Assistido/Representado)',
+    '31': 'Sócio Ostensivo', '37': 'Sócio Pessoa Jurídica Domiciliado no Exterior',
+    '38': 'Sócio Pessoa Física Residente no Exterior', '47': 'Sócio Pessoa Física Residente no Brasil',
+    '48': 'Sócio Pessoa Jurídica Domiciliado no Brasil', '49': 'Sócio-Administrador',
+    '50': 'Empresário', '54': 'Fundador', '55': 'Sócio Comanditado', '56': 'Sócio Comanditário',
+    '59': 'Produtor Rural', '63': 'Cotas em Tesouraria',
+    '65': 'Titular Pessoa Física Residente ou Domiciliado no Brasil',
+    '66': 'Titular Pessoa Física Residente ou Domiciliado no Exterior',
+    '78': 'Titular Pessoa Jurídica Domiciliada no Brasil',
+    '79': 'Titular Pessoa Jurídica Domiciliada no Exterior',
+}
+
+PORTES = {'00': 'NÃO INFORMADO', '01': 'MICRO EMPRESA', '03': 'EMPRESA DE PEQUENO PORTE', '05': 'DEMAIS'}
+
+# Quem decide na empresa vem primeiro como contato
+QUALIFICACOES_GESTAO = {'49', '05', '50', '65', '28', '16', '10'}
+
 class CNPJEnricher:
     
+    # Nome+cidade -> CNPJ e CNPJ -> dados, em memória e em disco (data/cache_enriquecimento.db)
+    cache = CacheEnriquecimento()
+    
     @staticmethod
     def buscar_cnpj_empresa(nome_empresa: str, cidade: str, estado: str, website: str = None) -> str:
         """
-        Busca CNPJ da empresa (várias estratégias em ordem de prioridade)
+        Busca CNPJ da empresa (várias estratégias em ordem de prioridade).
+        Resultado fica no cache por nome+cidade+UF; "não encontrado" só quando
+        todas as fontes responderam (erro, 429 ou captcha não vão para o cache).
+        """
+        
+        chave = CacheEnriquecimento.chave_nome(nome_empresa, cidade, estado)
+        cnpj = CNPJEnricher.cache.get('cnpj', chave)
+        if cnpj is not CacheEnriquecimento.AUSENTE:
+            logger.info(f"  ♻️ CNPJ em cache: {cnpj or 'não encontrado'}")
+            return cnpj
+        
+        try:
+            cnpj = CNPJEnricher._buscar_cnpj_empresa(nome_empresa, cidade, estado, website)
+        except FonteIndisponivel as e:
+            logger.warning(f"  ⚠️ Busca incompleta, sem cache negativo: {e}")
+            return None
+        
+        CNPJEnricher.cache.set('cnpj', chave, cnpj)
+        return cnpj
+    
+    @staticmethod
+    def _buscar_cnpj_empresa(nome_empresa: str, cidade: str, estado: str, website: str = None) -> str:
+        """
+        Estratégias de busca do CNPJ, sem cache. Uma fonte com erro não
+        interrompe as seguintes; se nenhuma achar, levanta FonteIndisponivel
+        com a primeira falha (o None é definitivo só se todas responderam).
         """
+        falha = None
         
         # Estratégia 1: Banco local (MELHOR - offline e rápido)
         logger.info(f"  💾 Buscando no banco local...")
         try:
-            resultado = LocalCNPJSearch.melhor_match(nome_empresa)
+            resultado = LocalCNPJSearch.melhor_match(nome_empresa, cidade=cidade, uf=estado)
             if resultado:
                 return resultado['cnpj']
         except Exception as e:
             logger.warning(f"  ⚠️ Erro no banco local: {e}")
+            falha = FonteIndisponivel(f"banco local: {e}")
         
         time.sleep(1)
         
         # Estratégia 2: Buscar no website da empresa
         if website:
             logger.info(f"  🌐 Tentando extrair do website...")
-            cnpj = CNPJGoogleSearch.buscar_cnpj_website(website)
-            if cnpj:
-                return cnpj
+            try:
+                cnpj = CNPJGoogleSearch.buscar_cnpj_website(website)
+                if cnpj:
+                    return cnpj
+            except FonteIndisponivel as e:
+                falha = falha or e
             time.sleep(1)
         
         # Estratégia 3: Buscar no Google (fallback)
         logger.info(f"  🔍 Buscando no Google (fallback)...")
-        cnpj = CNPJGoogleSearch.buscar_cnpj_google(nome_empresa, cidade)
-        if cnpj:
-            return cnpj
+        try:
+            cnpj = CNPJGoogleSearch.buscar_cnpj_google(nome_empresa, cidade)
+            if cnpj:
+                return cnpj
+        except FonteIndisponivel as e:
+            falha = falha or e
         
+        if falha:
+            raise falha
         return None
     
     @staticmethod
     def buscar_dados_cnpj(cnpj: str) -> dict:
         """
         Busca dados completos da empresa + sócios na Receita Federal
+        (do cache quando já consultado; CNPJ recusado pela API também fica em cache)
         """
         if not cnpj:
             return None
@@ -54,6 +116,11 @@ class CNPJEnricher:
         # Limpa CNPJ
         cnpj_limpo = re.sub(r'[^0-9]', '', cnpj)
         
+        dados = CNPJEnricher.cache.get('dados', cnpj_limpo)
+        if dados is not CacheEnriquecimento.AUSENTE:
+            logger.info(f"  ♻️ Dados da Receita em cache: {cnpj_limpo}")
+            return dados
+        
         logger.info(f"  📋 Consultando CNPJ na Receita: {cnpj_limpo}")
         
         try:
@@ -86,9 +153,12 @@ class CNPJEnricher:
                         })
                     
                     logger.info(f"  ✅ {len(resultado['socios'])} sócios encontrados")
+                    CNPJEnricher.cache.set('dados', cnpj_limpo, resultado)
                     return resultado
                 else:
+                    # Resposta definitiva da API (CNPJ inválido/inexistente): cache negativo
                     logger.warning(f"  ⚠️ {data.get('message', 'Erro desconhecido')}")
+                    CNPJEnricher.cache.set('dados', cnpj_limpo, None)
                     return None
             
             elif response.status_code == 429:
@@ -103,6 +173,50 @@ class CNPJEnricher:
             logger.error(f"❌ Erro: {e}")
             return None
     
+    @staticmethod
+    def buscar_dados_local(cnpj: str) -> dict:
+        """
+        Dados da empresa + sócios direto do banco local (tabela socios do dump da
+        Receita), no mesmo formato de buscar_dados_cnpj. Sem rede e sem rate limit.
+        """
+        try:
+            local = LocalCNPJSearch.dados_cnpj(cnpj)
+        except Exception as e:
+            logger.warning(f"  ⚠️ Erro no banco local: {e}")
+            return None
+        
+        if not local:
+            return None
+        
+        # Sócios administradores e pessoas físicas primeiro
+        socios = sorted(
+            local['socios'],
+            key=lambda s: (s['qualificacao'] not in QUALIFICACOES_GESTAO, s['identificador'] != '2')
+        )
+        
+        capital = (local['capital_social'] or '').replace('.', '').replace(',', '.')
+        
+        resultado = {
+            'cnpj': local['cnpj'],
+            'nome': local['razao_social'],
+            'fantasia': local['nome_fantasia'],
+            'telefone': local.get('telefone'),
+            'email': local.get('email') or None,
+            'capital_social': capital or None,
+            'porte': PORTES.get(local['porte'], local['porte']),
+            'socios': [
+                {
+                    'nome': s['nome'],
+                    'qualificacao': f"{s['qualificacao']}-{QUALIFICACOES[s['qualificacao']]}"
+                    if s['qualificacao'] in QUALIFICACOES else s['qualificacao']
+                }
+                for s in socios
+            ]
+        }
+        
+        logger.info(f"  💾 {len(resultado['socios'])} sócios encontrados no banco local")
+        return resultado
+    
     @staticmethod
     def enriquecer_lead(nome_empresa: str, cidade: str, estado: str, website: str = None) -> dict:
         """
@@ -120,14 +234,24 @@ class CNPJEnricher:
         
         logger.info(f"  📋 CNPJ: {cnpj}")
         
-        # 2. Rate limit antes de consultar Receita (20s entre requests)
-        time.sleep(20)
+        # 2. Dados completos (sócios) do banco local, sem rede
+        dados = CNPJEnricher.buscar_dados_local(cnpj)
         
-        # 3. Busca dados completos (sócios)
-        dados = CNPJEnricher.buscar_dados_cnpj(cnpj)
+        # 3. ReceitaWS só se o dump local não tem o quadro societário (empresa nova, socios não importado)
+        if not dados or not dados['socios']:
+            # Rate limit antes de consultar Receita (20s entre requests), só se for à rede
+            if not CNPJEnricher.cache.contem('dados', CacheEnriquecimento.chave_cnpj(cnpj)):
+                time.sleep(20)
+            
+            dados = CNPJEnricher.buscar_dados_cnpj(cnpj) or dados
         
+        # 4. Extrai nome do principal sócio
+        return CNPJEnricher.definir_contato(dados)
+    
+    @staticmethod
+    def definir_contato(dados: dict) -> dict:
+        """Preenche contato_nome/contato_cargo com o principal sócio (primeiro da lista)"""
         if dados and dados['socios']:
-            # 4. Extrai nome do principal sócio
             principal_socio = dados['socios'][0]['nome']
             primeiro_nome = principal_socio.split()[0].title()
             
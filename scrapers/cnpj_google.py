@@ -1,12 +1,14 @@
 # scrapers/cnpj_google.py
-import requests
-from bs4 import BeautifulSoup
-import re
+import asyncio
 import logging
 import time
+from typing import Dict, Iterable
+from .http_fetcher import Fetcher, AsyncFetcher, FonteIndisponivel
+from . import cnpj_utils
 
 logger = logging.getLogger(__name__)
 
+
 class CNPJGoogleSearch:
     
     @staticmethod
@@ -14,51 +16,14 @@ class CNPJGoogleSearch:
         """
         Valida dígitos verificadores do CNPJ
         """
-        cnpj = re.sub(r'[^0-9]', '', cnpj)
-        
-        if len(cnpj) != 14:
-            return False
-        
-        # Verifica se todos os dígitos são iguais
-        if cnpj == cnpj[0] * 14:
-            return False
-        
-        # Calcula primeiro dígito verificador
-        soma = 0
-        peso = 5
-        for i in range(12):
-            soma += int(cnpj[i]) * peso
-            peso -= 1
-            if peso < 2:
-                peso = 9
-        
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-        
-        if int(cnpj[12]) != digito1:
-            return False
-        
-        # Calcula segundo dígito verificador
-        soma = 0
-        peso = 6
-        for i in range(13):
-            soma += int(cnpj[i]) * peso
-            peso -= 1
-            if peso < 2:
-                peso = 9
-        
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-        
-        if int(cnpj[13]) != digito2:
-            return False
-        
-        return True
+        return cnpj_utils.validar(cnpj)
     
     @staticmethod
     def buscar_cnpj_google(nome_empresa: str, cidade: str) -> str:
         """
-        Busca CNPJ da empresa via Google Search
+        Busca CNPJ da empresa via Google Search.
+        None quando a página de resultados não tem CNPJ válido; FonteIndisponivel
+        se o Google bloqueou (429/captcha) ou a requisição falhou.
         """
         
         try:
@@ -71,81 +36,98 @@ class CNPJGoogleSearch:
                 'hl': 'pt-BR'
             }
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            # Para de baixar no primeiro CNPJ de matriz válido da página de resultados
+            texto = Fetcher.ler(url, CNPJGoogleSearch._tem_cnpj_matriz, params=params)
             
-            if response.status_code == 200:
-                # Procura por padrão de CNPJ na página
-                # CNPJ: XX.XXX.XXX/XXXX-XX ou XXXXXXXXXXXXXX
-                cnpj_pattern = r'\d{2}\.?\d{3}\.?\d{3}/?0001-?\d{2}|\b\d{14}\b'
-                
-                cnpjs = re.findall(cnpj_pattern, response.text)
-                
-                # Valida cada CNPJ encontrado
-                for cnpj_raw in cnpjs:
-                    cnpj = cnpj_raw.replace('.', '').replace('/', '').replace('-', '')
-                    
-                    if CNPJGoogleSearch.validar_cnpj(cnpj):
-                        logger.info(f"✅ CNPJ válido encontrado via Google: {cnpj}")
-                        return cnpj
+            # CNPJ: XX.XXX.XXX/XXXX-XX ou XXXXXXXXXXXXXX; matriz (0001) primeiro,
+            # filial só se a página não tiver nenhuma matriz
+            cnpj = CNPJGoogleSearch.extrair_cnpj(texto, apenas_matriz=False) if texto else None
+            if cnpj:
+                logger.info(f"✅ CNPJ válido encontrado via Google: {cnpj}")
+                return cnpj
             
             logger.warning(f"⚠️ CNPJ válido não encontrado no Google para {nome_empresa}")
             return None
             
+        except FonteIndisponivel as e:
+            logger.warning(f"⚠️ Google indisponível: {e}")
+            raise
         except Exception as e:
             logger.error(f"❌ Erro na busca Google: {e}")
-            return None
+            raise FonteIndisponivel(f"busca Google: {e}") from e
     
     @staticmethod
     def buscar_cnpj_website(website: str) -> str:
         """
-        Busca CNPJ no website da empresa (rodapé)
+        Busca CNPJ no website da empresa (rodapé).
+        None quando o site respondeu sem CNPJ (ou não existe a página);
+        FonteIndisponivel se o site está fora do ar ou a requisição falhou.
         """
         
         if not website:
             return None
         
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(website, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                # Procura CNPJ na página - padrão mais específico
-                # Busca por "CNPJ" seguido de números
-                texto = response.text
-                
-                # Padrão: palavra "CNPJ" próxima aos números
-                if 'CNPJ' in texto or 'cnpj' in texto:
-                    # Procura padrão após a palavra CNPJ
-                    cnpj_pattern = r'(?:CNPJ|cnpj)[:\s]*(\d{2}\.?\d{3}\.?\d{3}/?0001-?\d{2})'
-                    
-                    match = re.search(cnpj_pattern, texto)
-                    if match:
-                        cnpj = match.group(1).replace('.', '').replace('/', '').replace('-', '')
-                        
-                        if CNPJGoogleSearch.validar_cnpj(cnpj):
-                            logger.info(f"✅ CNPJ válido encontrado no site: {cnpj}")
-                            return cnpj
-                
-                # Se não encontrou com contexto, busca qualquer CNPJ válido
-                cnpj_pattern = r'\d{2}\.?\d{3}\.?\d{3}/?0001-?\d{2}'
-                cnpjs = re.findall(cnpj_pattern, texto)
-                
-                for cnpj_raw in cnpjs:
-                    cnpj = cnpj_raw.replace('.', '').replace('/', '').replace('-', '')
-                    
-                    if CNPJGoogleSearch.validar_cnpj(cnpj):
-                        logger.info(f"✅ CNPJ válido encontrado no site: {cnpj}")
-                        return cnpj
+            # Streaming: para assim que aparece "CNPJ: <matriz válida>", sem baixar o resto
+            texto = Fetcher.ler(website, CNPJGoogleSearch._tem_cnpj_com_contexto)
             
-            return None
+            cnpj = CNPJGoogleSearch.extrair_cnpj(texto) if texto else None
+            if cnpj:
+                logger.info(f"✅ CNPJ válido encontrado no site: {cnpj}")
+            return cnpj
             
+        except FonteIndisponivel as e:
+            logger.warning(f"⚠️ Website indisponível: {e}")
+            raise
         except Exception as e:
             logger.error(f"❌ Erro ao acessar website: {e}")
-            return None
\ No newline at end of file
+            raise FonteIndisponivel(f"website {website}: {e}") from e
+    
+    @staticmethod
+    def extrair_cnpj(texto: str, apenas_matriz: bool = True) -> str:
+        """
+        CNPJ de matriz (0001) válido mais provável do texto: o que vem após a
+        palavra "CNPJ", senão o primeiro (uma passada só pela página). Site da
+        empresa mostra o CNPJ da matriz; um de filial ali costuma ser de outra
+        empresa (parceiro, shopping). Com apenas_matriz=False, sem nenhuma
+        matriz vale o melhor CNPJ de filial.
+        """
+        candidatos = cnpj_utils.extrair_candidatos(texto)
+        for c in candidatos:
+            if c.matriz:
+                return c.cnpj
+        return candidatos[0].cnpj if candidatos and not apenas_matriz else None
+    
+    @staticmethod
+    def _tem_cnpj_com_contexto(texto: str) -> bool:
+        return any(c.contexto and c.matriz for c in cnpj_utils.extrair_candidatos(texto))
+    
+    @staticmethod
+    def _tem_cnpj_matriz(texto: str) -> bool:
+        return any(c.matriz for c in cnpj_utils.extrair_candidatos(texto))
+    
+    @staticmethod
+    def buscar_cnpj_websites(websites: Iterable[str], por_host: int = 2,
+                             max_conexoes: int = 100) -> Dict[str, str]:
+        """
+        Versão em lote de buscar_cnpj_website: varre centenas de sites em paralelo
+        num cliente assíncrono (no máximo `por_host` conexões por domínio).
+        Retorna {website: cnpj ou None} só com os sites que responderam: os que
+        estavam fora do ar ou devolveram 429/5xx (FonteIndisponivel) ficam de fora.
+        """
+        websites = [w for w in dict.fromkeys(websites) if w]
+        if not websites:
+            return {}
+        
+        async def varrer():
+            async with AsyncFetcher(max_conexoes=max_conexoes, por_host=por_host) as fetcher:
+                return await fetcher.ler_muitos(websites, CNPJGoogleSearch._tem_cnpj_com_contexto)
+        
+        inicio = time.perf_counter()
+        textos = asyncio.run(varrer())
+        resultado = {w: CNPJGoogleSearch.extrair_cnpj(t) if t else None for w, t in textos.items()}
+        
+        encontrados = sum(1 for c in resultado.values() if c)
+        logger.info(f"✅ {encontrados}/{len(websites)} sites com CNPJ em {time.perf_counter() - inicio:.1f}s "
+                    f"({len(websites) - len(resultado)} indisponíveis)")
+        return resultado
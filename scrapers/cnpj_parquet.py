@@ -0,0 +1,115 @@
+# scrapers/cnpj_parquet.py
+from pathlib import Path
+from typing import Iterable, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARQUET_DIR = Path("data/parquet")
+
+# Situação cadastral "02" = ativa
+SITUACAO_ATIVA = "02"
+
+class CNPJParquet:
+    """
+    Consultas analíticas sobre o Parquet gerado por build_cnpj_db.py --parquet
+    (particionado por UF, lê só as colunas pedidas e empurra os filtros para o scan).
+    Agregações sobre o país inteiro (contagens por UF/CNAE) que no SQLite varreriam
+    a tabela estabelecimentos toda; as extrações de leads ficam nos segmentos.
+    """
+
+    @staticmethod
+    def disponivel(base: Path = PARQUET_DIR) -> bool:
+        """True se o pyarrow está instalado e o Parquet já foi gerado"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return (base / "estabelecimentos").exists()
+
+    @staticmethod
+    def dataset(tabela: str, base: Path = PARQUET_DIR):
+        """Abre o dataset de uma tabela (empresas, estabelecimentos, municipios)"""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        caminho = (base / tabela).as_posix()
+        if tabela == "municipios":
+            return ds.dataset(caminho, format="parquet")
+
+        particao = ds.partitioning(pa.schema([("uf", pa.string())]), flavor="hive")
+        return ds.dataset(caminho, format="parquet", partitioning=particao)
+
+    @staticmethod
+    def scan(tabela: str, colunas: List[str] = None, filtro=None, ufs: Iterable[str] = None,
+             base: Path = PARQUET_DIR):
+        """
+        Lê uma tabela com column pruning e predicate pushdown.
+        `filtro` é uma expressão pyarrow.dataset (ex.: ds.field('situacao_cadastral') == '02');
+        `ufs` restringe às partições dessas UFs.
+        """
+        import pyarrow.dataset as ds
+
+        if ufs:
+            filtro_uf = ds.field("uf").isin(list(ufs))
+            filtro = filtro_uf if filtro is None else (filtro & filtro_uf)
+
+        return CNPJParquet.dataset(tabela, base).to_table(columns=colunas, filter=filtro)
+
+    @staticmethod
+    def _prefixos(coluna, prefixos: List[str]):
+        """
+        Máscara "começa com algum prefixo" de uma coluna dictionary: testa só os
+        valores distintos do dicionário (poucos milhares de CNAEs) e espalha
+        o resultado pelos índices, sem decodificar milhões de strings.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        padrao = "^(" + "|".join(prefixos) + ")"
+        partes = []
+        for chunk in coluna.chunks:
+            no_dicionario = pc.match_substring_regex(chunk.dictionary, padrao)
+            partes.append(pc.take(no_dicionario, chunk.indices))
+        return pa.chunked_array(partes, pa.bool_())
+
+    @staticmethod
+    def contar_por_uf(cnaes: List[str], ufs: Iterable[str] = None, secundarios: bool = False,
+                      apenas_matriz: bool = False, base: Path = PARQUET_DIR):
+        """
+        Estabelecimentos ativos por UF com CNAE principal começando por algum
+        prefixo de `cnaes` (com `secundarios`, também os que têm o CNAE entre os
+        secundários): total, com telefone e com celular. DataFrame pandas por UF.
+        """
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        if not all(c.isdigit() for c in cnaes):
+            raise ValueError(f"Prefixos de CNAE devem ser só dígitos: {cnaes}")
+
+        filtro = ds.field("situacao_cadastral") == SITUACAO_ATIVA
+        if apenas_matriz:
+            filtro = filtro & (ds.field("cnpj_ordem") == "0001")
+        colunas = ["uf", "cnae_fiscal_principal", "tem_telefone", "tem_celular"]
+        if secundarios:
+            colunas.append("cnae_fiscal_secundaria")
+        tabela = CNPJParquet.scan("estabelecimentos", colunas, filtro=filtro, ufs=ufs, base=base)
+
+        mascara = CNPJParquet._prefixos(tabela["cnae_fiscal_principal"], cnaes)
+        if secundarios:
+            # Secundários vêm numa string "4781400,8599604": prefixo no início ou depois de vírgula
+            no_secundario = pc.match_substring_regex(
+                tabela["cnae_fiscal_secundaria"], "(^|,)(" + "|".join(cnaes) + ")")
+            mascara = pc.or_(mascara, pc.fill_null(no_secundario, False))
+        tabela = tabela.filter(mascara)
+
+        resumo = tabela.group_by("uf").aggregate([
+            ("uf", "count", pc.CountOptions(mode="all")), ("tem_telefone", "sum"), ("tem_celular", "sum"),
+        ])
+
+        logger.info(f"📊 {tabela.num_rows:,} estabelecimentos com CNAE {', '.join(cnaes)} no Parquet")
+        # Pelo nome: a posição da chave no resultado do group_by mudou entre versões do pyarrow
+        df = resumo.to_pandas().rename(columns={
+            "uf_count": "estabelecimentos", "tem_telefone_sum": "com_telefone", "tem_celular_sum": "com_celular",
+        })[["uf", "estabelecimentos", "com_telefone", "com_celular"]]
+        return df.sort_values("estabelecimentos", ascending=False, ignore_index=True)
@@ -0,0 +1,147 @@
+# scrapers/cnpj_utils.py
+import re
+from collections import namedtuple
+from typing import Iterable, List
+
+PESOS_DV1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+PESOS_DV2 = (6,) + PESOS_DV1
+
+_NAO_DIGITO = re.compile(r'\D')
+
+# Uma passada só: CNPJ formatado (XX.XXX.XXX/XXXX-XX) ou 14 dígitos soltos,
+# com o contexto "CNPJ" / "CNPJ/MF nº" opcional logo antes
+PADRAO_CNPJ = re.compile(
+    r'(?P<contexto>\bCNPJ(?:/MF)?\s*(?:n[º°o]?\.?)?\s*[:\-]?\s*)?'
+    r'(?P<cnpj>\b\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b)',
+    re.IGNORECASE
+)
+
+Candidato = namedtuple("Candidato", "cnpj contexto matriz posicao")
+
+def so_digitos(cnpj: str) -> str:
+    return _NAO_DIGITO.sub('', cnpj or '')
+
+def calcular_dv(cnpj12: str) -> str:
+    """Dígitos verificadores dos 12 primeiros dígitos ("112223330001" -> "81")"""
+    s = sum(int(n) * p for n, p in zip(cnpj12, PESOS_DV1))
+    dv1 = 0 if s % 11 < 2 else 11 - s % 11
+    s = sum(int(n) * p for n, p in zip(cnpj12, PESOS_DV2[:-1])) + dv1 * 2
+    dv2 = 0 if s % 11 < 2 else 11 - s % 11
+    return f"{dv1}{dv2}"
+
+def validar(cnpj: str) -> bool:
+    """CNPJ com 14 dígitos (pontuação ignorada), não repetido e com DV correto"""
+    cnpj = so_digitos(cnpj)
+    if len(cnpj) != 14 or cnpj == cnpj[0] * 14:
+        return False
+    return calcular_dv(cnpj[:12]) == cnpj[12:]
+
+def cnpj_matriz(cnpj_basico: str) -> str:
+    """CNPJ completo da matriz (ordem 0001) a partir do CNPJ básico"""
+    base = so_digitos(cnpj_basico).zfill(8) + "0001"
+    return base + calcular_dv(base)
+
+def extrair_candidatos(texto: str) -> List[Candidato]:
+    """
+    CNPJs válidos do texto numa única passada, do mais para o menos provável:
+    precedido de "CNPJ" primeiro, depois matriz (0001), depois ordem no texto.
+    Cada CNPJ aparece uma vez, com a melhor classificação que teve.
+    """
+    melhores = {}
+    for m in PADRAO_CNPJ.finditer(texto or ''):
+        cnpj = so_digitos(m.group('cnpj'))
+        if cnpj in melhores and melhores[cnpj].contexto:
+            continue
+        if not validar(cnpj):
+            continue
+        candidato = Candidato(cnpj, m.group('contexto') is not None, cnpj[8:12] == '0001', m.start())
+        if cnpj not in melhores or candidato.contexto:
+            melhores[cnpj] = candidato
+    return sorted(melhores.values(), key=lambda c: (not c.contexto, not c.matriz, c.posicao))
+
+def melhor_cnpj(texto: str, apenas_matriz: bool = False) -> str:
+    """Candidato mais provável do texto (None se não houver)"""
+    for c in extrair_candidatos(texto):
+        if c.matriz or not apenas_matriz:
+            return c.cnpj
+    return None
+
+# --- Versões vetorizadas (NumPy), para milhões de CNPJs por chunk do dump (processar_segmentos) ---
+
+def _matriz_digitos(cnpjs: Iterable[str], largura: int):
+    """
+    Array (n, largura) de dígitos (uint8); linhas com tamanho ou caractere errado
+    ficam marcadas em `ok` (e zeradas). Caminho rápido: todas as strings ASCII
+    viram um só buffer de bytes (join + encode) lido com np.frombuffer, sem
+    conversão caractere a caractere; com algo fora disso (None, acento, separador
+    dentro de uma string), cai na conversão para array unicode.
+    """
+    import numpy as np
+
+    lista = cnpjs.tolist() if hasattr(cnpjs, 'tolist') else list(cnpjs)
+    n = len(lista)
+    try:
+        texto = '|'.join(lista) + '|'
+        buffer = texto.encode('ascii')
+    except (TypeError, UnicodeEncodeError):
+        buffer = None
+
+    linhas = None
+    if buffer is not None and len(buffer) == n * (largura + 1):
+        linhas = np.frombuffer(buffer, dtype=np.uint8).reshape(n, largura + 1)
+        # Só os n separadores do join, todos na última coluna <=> todas as strings com `largura` caracteres
+        if texto.count('|') != n or not (linhas[:, largura] == ord('|')).all():
+            linhas = None
+
+    if linhas is not None:
+        digitos = linhas[:, :largura] - np.uint8(ord('0'))  # abaixo de '0' dá a volta e passa de 9
+        if (digitos <= 9).all():  # caso comum (chunk todo válido): sem o all por linha nem a cópia do where
+            return digitos, np.ones(n, dtype=bool)
+        ok = (digitos <= 9).all(axis=1)
+    else:
+        # Um caractere a mais: a última coluna tem de ser vazia (senão a string é longa demais)
+        arr = np.asarray(lista, dtype=f'U{largura + 1}')
+        codigos = arr.view(np.uint32).reshape(n, largura + 1)
+        digitos = codigos[:, :largura] - np.uint32(ord('0'))
+        ok = (digitos <= 9).all(axis=1) & (codigos[:, largura] == 0)
+        digitos = digitos.astype(np.uint8)
+    return np.where(ok[:, None], digitos, np.uint8(0)), ok
+
+def _dv_de(digitos):
+    import numpy as np
+
+    # float32 usa o matmul do BLAS; as somas (no máximo 9 * 9 * 12) são exatas
+    base = digitos[:, :12].astype(np.float32)
+    s1 = (base @ np.array(PESOS_DV1, dtype=np.float32)).astype(np.int32)
+    r1 = s1 % 11
+    dv1 = np.where(r1 < 2, 0, 11 - r1)
+    s2 = (base @ np.array(PESOS_DV2[:-1], dtype=np.float32)).astype(np.int32) + dv1 * 2
+    r2 = s2 % 11
+    dv2 = np.where(r2 < 2, 0, 11 - r2)
+    return dv1, dv2
+
+def validar_vetorizado(cnpjs: Iterable[str]):
+    """
+    Array booleano: True onde o CNPJ (14 dígitos, sem pontuação) é válido.
+    Aceita lista, Series ou array de strings.
+    """
+    digitos, ok = _matriz_digitos(cnpjs, 14)
+    if not len(digitos):
+        return ok
+    dv1, dv2 = _dv_de(digitos)
+    repetido = (digitos == digitos[:, :1]).all(axis=1)
+    return ok & ~repetido & (digitos[:, 12] == dv1) & (digitos[:, 13] == dv2)
+
+def gerar_dv_vetorizado(cnpjs12: Iterable[str]):
+    """Array de strings com os 2 DVs de cada base de 12 dígitos ('' onde a base é inválida)"""
+    import numpy as np
+
+    digitos, ok = _matriz_digitos(cnpjs12, 12)
+    if not len(digitos):
+        return np.array([], dtype='U2')
+    dv1, dv2 = _dv_de(digitos)
+    # Os dois dígitos como bytes ASCII lado a lado: cada linha vira um 'S2' sem passar por str
+    dvs = np.empty((len(digitos), 2), dtype=np.uint8)
+    dvs[:, 0] = dv1 + ord('0')
+    dvs[:, 1] = dv2 + ord('0')
+    return np.where(ok, dvs.view('S2').ravel(), b'').astype('U2')
@@ -0,0 +1,171 @@
+# scrapers/exportador.py
+import csv
+import gzip
+import io
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOTE = 5_000  # linhas por fetchmany: memória constante, seja qual for o tamanho da extração
+
+FORMATOS = ("csv", "jsonl", "parquet")
+COMPRESSOES = ("gzip", "zstd")
+_EXTENSOES = {"gzip": ".gz", "zstd": ".zst"}
+
+def abrir_texto(caminho: Path, compressao: str = None):
+    """Arquivo de texto para escrita, comprimido em fluxo com gzip ou zstd"""
+    if compressao is None:
+        return open(caminho, "w", newline="", encoding="utf-8")
+    if compressao == "gzip":
+        return gzip.open(caminho, "wt", newline="", encoding="utf-8")
+    if compressao == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Compressão zstd requer o pacote zstandard (pip install zstandard)")
+        binario = zstandard.ZstdCompressor(level=10).stream_writer(open(caminho, "wb"))
+        return io.TextIOWrapper(binario, encoding="utf-8", newline="")
+    raise ValueError(f"Compressão inválida: {compressao} (use {', '.join(COMPRESSOES)})")
+
+class SinkCSV:
+    """CSV com cabeçalho (compatível com Google Sheets e com os CSVs antigos)"""
+
+    def __init__(self, caminho: Path, cabecalho: Sequence[str], compressao: str = None):
+        self._arquivo = abrir_texto(caminho, compressao)
+        self._writer = csv.writer(self._arquivo)
+        self._writer.writerow(cabecalho)
+
+    def escrever(self, linhas):
+        self._writer.writerows(linhas)
+
+    def fechar(self):
+        self._arquivo.close()
+
+class SinkJSONL:
+    """Um objeto JSON por linha, com o cabeçalho como chaves"""
+
+    def __init__(self, caminho: Path, cabecalho: Sequence[str], compressao: str = None):
+        self._arquivo = abrir_texto(caminho, compressao)
+        self._cabecalho = list(cabecalho)
+
+    def escrever(self, linhas):
+        self._arquivo.writelines(
+            json.dumps(dict(zip(self._cabecalho, linha)), ensure_ascii=False) + "\n" for linha in linhas
+        )
+
+    def fechar(self):
+        self._arquivo.close()
+
+class SinkParquet:
+    """
+    Parquet escrito lote a lote (um row group por lote). A compressão é a
+    interna do Parquet (codec das páginas de cada coluna): gzip ou zstd, snappy
+    se não informada; o arquivo continua .parquet.
+    """
+
+    def __init__(self, caminho: Path, cabecalho: Sequence[str], compressao: str = None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(c, pa.string()) for c in cabecalho])
+        self._writer = pq.ParquetWriter(caminho.as_posix(), self._schema, compression=compressao or "snappy")
+
+    def escrever(self, linhas):
+        pa = self._pa
+        colunas = list(zip(*linhas))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(
+            [pa.array([None if v is None else str(v) for v in col], pa.string()) for col in colunas],
+            schema=self._schema,
+        ))
+
+    def fechar(self):
+        self._writer.close()
+
+SINKS = {
+    "csv": SinkCSV,
+    "jsonl": SinkJSONL,
+    "parquet": SinkParquet,
+}
+
+def caminho_saida(base: Path, formato: str = "csv", compressao: str = None) -> Path:
+    """data/educacao_privada + jsonl + gzip -> data/educacao_privada.jsonl.gz"""
+    caminho = Path(base).with_suffix(f".{formato}")
+    if compressao and formato != "parquet":
+        caminho = caminho.with_name(caminho.name + _EXTENSOES[compressao])
+    return caminho
+
+class Estatisticas:
+    """Contagens feitas durante a escrita (sem reler o arquivo)"""
+
+    def __init__(self, colunas: Sequence[str], telefones=("telefone1", "telefone2"), email="email", uf="uf"):
+        self.total = 0
+        self.com_telefone = 0
+        self.com_email = 0
+        self.por_uf = Counter()
+        self._telefones = [colunas.index(c) for c in telefones if c in colunas]
+        self._email = colunas.index(email) if email in colunas else None
+        self._uf = colunas.index(uf) if uf in colunas else None
+
+    def registrar(self, linhas):
+        self.total += len(linhas)
+        for linha in linhas:
+            if any(linha[i] for i in self._telefones):
+                self.com_telefone += 1
+            if self._email is not None and linha[self._email]:
+                self.com_email += 1
+            if self._uf is not None:
+                self.por_uf[linha[self._uf]] += 1
+
+    def percentual(self, valor: int) -> float:
+        return valor / self.total * 100 if self.total else 0.0
+
+def exportar(
+    cursor,
+    destino: Path,
+    cabecalho: Sequence[str] = None,
+    formato: str = None,
+    compressao: str = None,
+    transformar: Optional[Callable[[tuple], tuple]] = None,
+    lote: int = LOTE,
+) -> Estatisticas:
+    """
+    Escreve o resultado de um cursor SQLite em `destino` sem carregar tudo na
+    memória (fetchmany em lotes). `cabecalho` são os nomes no arquivo (padrão:
+    colunas do cursor); `transformar` ajusta cada linha antes de escrever.
+    Formato e compressão saem da extensão quando não informados
+    (.csv, .jsonl, .parquet, + .gz / .zst). Retorna as estatísticas.
+    """
+    destino = Path(destino)
+    colunas = [d[0] for d in cursor.description]
+    cabecalho = list(cabecalho or colunas)
+
+    sufixos = [s.lstrip(".") for s in destino.suffixes]
+    if compressao is None and sufixos and sufixos[-1] in ("gz", "zst"):
+        compressao = "gzip" if sufixos[-1] == "gz" else "zstd"
+    if formato is None:
+        formato = next((s for s in reversed(sufixos) if s in FORMATOS), "csv")
+    if formato not in SINKS:
+        raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    stats = Estatisticas(colunas)
+    sink = SINKS[formato](destino, cabecalho, compressao)
+    try:
+        while True:
+            linhas = cursor.fetchmany(lote)
+            if not linhas:
+                break
+            stats.registrar(linhas)
+            sink.escrever([transformar(l) for l in linhas] if transformar else linhas)
+            if stats.total % (lote * 20) == 0:
+                logger.info(f"  {stats.total:,} linhas exportadas...")
+    finally:
+        sink.fechar()
+
+    logger.info(f"💾 {stats.total:,} linhas em {destino}")
+    return stats
@@ -0,0 +1,167 @@
+# scrapers/http_fetcher.py
+import asyncio
+import threading
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+MAX_BYTES = 512 * 1024  # Rodapé com CNPJ nunca passa disso; páginas maiores são cortadas
+TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+JANELA = 128            # Sobra do pedaço anterior: um CNPJ pode vir quebrado entre dois pedaços
+POR_HOST = 2            # Conexões simultâneas por domínio (threads do pipeline ou tarefas async)
+
+# Respostas que dizem "tente mais tarde" (rate limit, captcha do Google, servidor fora)
+STATUS_TRANSITORIOS = {408, 425, 429, 500, 502, 503, 504}
+
+# "parar" recebe o texto novo (com a sobra anterior) e diz se já achou o que queria
+Parar = Callable[[str], bool]
+
+class FonteIndisponivel(Exception):
+    """Fonte bloqueando, fora do ar ou com erro de rede: não é um "não encontrado" definitivo"""
+
+def _eh_texto(response: httpx.Response) -> bool:
+    tipo = response.headers.get('content-type', 'text/html').lower()
+    return tipo.startswith(('text/', 'application/xhtml', 'application/xml', 'application/json'))
+
+class Fetcher:
+    """
+    Cliente HTTP síncrono compartilhado (pool com keep-alive, HTTP/2 se disponível).
+    Seguro para as threads do pipeline de enriquecimento; no máximo POR_HOST
+    requisições simultâneas ao mesmo domínio (as outras threads esperam).
+    """
+
+    _cliente = None
+    _lock = threading.Lock()
+    _hosts: Dict[str, threading.BoundedSemaphore] = {}
+
+    @staticmethod
+    def cliente() -> httpx.Client:
+        with Fetcher._lock:
+            if Fetcher._cliente is None:
+                Fetcher._cliente = httpx.Client(
+                    http2=HTTP2, headers=HEADERS, timeout=TIMEOUT, follow_redirects=True,
+                    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+                )
+            return Fetcher._cliente
+
+    @staticmethod
+    def _semaforo(url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).hostname or ''
+        with Fetcher._lock:
+            if host not in Fetcher._hosts:
+                Fetcher._hosts[host] = threading.BoundedSemaphore(POR_HOST)
+            return Fetcher._hosts[host]
+
+    @staticmethod
+    def ler(url: str, parar: Optional[Parar] = None, max_bytes: int = MAX_BYTES, **kwargs) -> Optional[str]:
+        """
+        Texto da página lido em streaming até `max_bytes`, ou até `parar` achar o
+        que procura (o resto da página nem é baixado). None se não for HTTP 200 texto;
+        FonteIndisponivel nos status de STATUS_TRANSITORIOS (429, 5xx...).
+        """
+        with Fetcher._semaforo(url), Fetcher.cliente().stream('GET', url, **kwargs) as response:
+            if response.status_code in STATUS_TRANSITORIOS:
+                raise FonteIndisponivel(f"HTTP {response.status_code} em {urlsplit(url).hostname}")
+            if response.status_code != 200 or not _eh_texto(response):
+                return None
+
+            partes, sobra = [], ''
+            for pedaco in response.iter_text():
+                partes.append(pedaco)
+                if parar and parar(sobra + pedaco):
+                    break
+                if response.num_bytes_downloaded >= max_bytes:
+                    break
+                sobra = pedaco[-JANELA:]
+            return ''.join(partes)
+
+class AsyncFetcher:
+    """
+    Varredura assíncrona de muitas páginas num único cliente (pool + HTTP/2),
+    com limite de conexões simultâneas por host e no total.
+
+        async with AsyncFetcher() as fetcher:
+            textos = await fetcher.ler_muitos(urls, parar)
+    """
+
+    def __init__(self, max_conexoes: int = 100, por_host: int = POR_HOST, max_bytes: int = MAX_BYTES):
+        self.max_conexoes = max_conexoes
+        self.por_host = por_host
+        self.max_bytes = max_bytes
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._cliente = None
+
+    async def __aenter__(self):
+        self._cliente = httpx.AsyncClient(
+            http2=HTTP2, headers=HEADERS, timeout=TIMEOUT, follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_conexoes,
+                                max_keepalive_connections=self.max_conexoes),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._cliente.aclose()
+        self._cliente = None
+
+    def _semaforo(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ''
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.por_host)
+        return self._hosts[host]
+
+    async def ler(self, url: str, parar: Optional[Parar] = None) -> Optional[str]:
+        """Mesmo contrato de Fetcher.ler: erro de rede ou status transitório levanta FonteIndisponivel"""
+        try:
+            async with self._semaforo(url):
+                async with self._cliente.stream('GET', url) as response:
+                    if response.status_code in STATUS_TRANSITORIOS:
+                        raise FonteIndisponivel(f"HTTP {response.status_code} em {urlsplit(url).hostname}")
+                    if response.status_code != 200 or not _eh_texto(response):
+                        return None
+
+                    partes, sobra = [], ''
+                    async for pedaco in response.aiter_text():
+                        partes.append(pedaco)
+                        if parar and parar(sobra + pedaco):
+                            break
+                        if response.num_bytes_downloaded >= self.max_bytes:
+                            break
+                        sobra = pedaco[-JANELA:]
+                    return ''.join(partes)
+        except UnicodeDecodeError as e:
+            logger.debug(f"Falha ao decodificar {url}: {e}")
+            return None
+        except FonteIndisponivel:
+            raise
+        except Exception as e:
+            logger.debug(f"Falha ao ler {url}: {e}")
+            raise FonteIndisponivel(f"{url}: {e}") from e
+
+    async def ler_muitos(self, urls: Iterable[str], parar: Optional[Parar] = None) -> Dict[str, Optional[str]]:
+        """
+        Lê todas as URLs em paralelo; retorna {url: texto ou None}. URLs que
+        levantaram FonteIndisponivel (fora do ar, 429, 5xx) ficam de fora do dict.
+        """
+        urls = list(dict.fromkeys(urls))
+        textos = await asyncio.gather(*(self.ler(url, parar) for url in urls), return_exceptions=True)
+        resultado = {}
+        for url, texto in zip(urls, textos):
+            if isinstance(texto, FonteIndisponivel):
+                continue
+            if isinstance(texto, BaseException):
+                raise texto
+            resultado[url] = texto
+        return resultado
@@ -1,36 +1,244 @@
 # scrapers/local_cnpj_search.py
-import sqlite3, re
+import sqlite3, re, queue, threading, json, heapq, os
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
-from difflib import SequenceMatcher
 import logging
+from . import cnpj_db, cnpj_utils
+from .similaridade import (
+    HybridScorer, SUFIXOS_LEGAIS, STOPWORDS, normalizar_nome, tokens, trigramas, jaccard,
+    assinatura, calcular_assinatura,
+)
 
 logger = logging.getLogger(__name__)
 
 DB = Path("data/cnpj.db")
+# Candidato achado só na busca no país inteiro (fora da cidade/UF do lead):
+# o score é multiplicado por este fator, então só um nome bem parecido passa do mínimo
+PENALIDADE_FORA_DO_ESCOPO = 0.85
+# melhor_match_many: município com até NOMES_POR_LEAD nomes por lead da cidade (e no
+# máximo MAX_NOMES_INDICE) é casado num índice em memória, sem uma consulta FTS por lead
+NOMES_POR_LEAD = 200
+MAX_NOMES_INDICE = 200_000
+
+class ConnectionPool:
+    """
+    Pool thread-safe de conexões somente leitura ao cnpj.db.
+    As conexões ficam abertas entre consultas (sem reabrir o arquivo nem
+    reler o schema) e cada uma mantém seu cache de statements preparados.
+    Em modo snapshot (padrão), um arquivo gerado com --snapshot é aberto
+    imutável (ver cnpj_db.conectar). Cada empréstimo confere inode, mtime e
+    tamanho do arquivo: se mudaram (build trocou ou reescreveu o banco), as
+    conexões antigas são descartadas e as próximas abrem o arquivo atual.
+    """
+    
+    def __init__(self, db_path: Path, size: int = 8, mmap_size: int = cnpj_db.MMAP_SIZE,
+                 cache_kb: int = cnpj_db.CACHE_KB, snapshot: bool = True):
+        self.db_path = db_path
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cache_kb = cache_kb
+        self.snapshot = snapshot
+        self.geracao = 0  # sobe quando o arquivo muda (caches derivados do banco ficam velhos)
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+        self._todas = []  # todas as conexões criadas e ainda não fechadas
+        self._antigas = set()  # emprestadas antes de o arquivo mudar: fecham na devolução
+        self._versao = self._versao_arquivo()
+        self._fechado = False
+    
+    def _versao_arquivo(self):
+        try:
+            st = os.stat(self.db_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    
+    def _renovar_se_mudou(self):
+        """Arquivo diferente do que as conexões abriram: descarta as livres e marca as emprestadas (com o lock)"""
+        versao = self._versao_arquivo()
+        if versao == self._versao:
+            return
+        self._versao = versao
+        self.geracao += 1
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._todas.remove(conn)
+            self._criadas -= 1
+            conn.close()
+        self._antigas.update(self._todas)
+    
+    def _conectar(self) -> sqlite3.Connection:
+        return cnpj_db.conectar(self.db_path, snapshot=self.snapshot, mmap_size=self.mmap_size,
+                                cache_kb=self.cache_kb, cached_statements=256)
+    
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool (cria sob demanda até `size`)"""
+        conn = self._emprestar()
+        try:
+            yield conn
+        finally:
+            self._devolver(conn)
+    
+    def _emprestar(self) -> sqlite3.Connection:
+        while True:
+            with self._lock:
+                if self._fechado:
+                    raise RuntimeError("Pool de conexões fechado")
+                self._renovar_se_mudou()
+                try:
+                    return self._livres.get_nowait()
+                except queue.Empty:
+                    pass
+                criar = self._criadas < self.size
+                if criar:
+                    self._criadas += 1
+            
+            if criar:
+                try:
+                    conn = self._conectar()
+                except Exception:
+                    with self._lock:
+                        self._criadas -= 1
+                    raise
+                with self._lock:
+                    if not self._fechado:
+                        self._todas.append(conn)
+                        return conn
+                conn.close()
+                raise RuntimeError("Pool de conexões fechado")
+            
+            # Pool cheio: espera uma devolução (revendo se o pool foi fechado)
+            try:
+                return self._livres.get(timeout=0.5)
+            except queue.Empty:
+                continue
+    
+    def _devolver(self, conn: sqlite3.Connection):
+        """Volta para a fila; com o pool fechado ou o arquivo trocado, a conexão é fechada"""
+        with self._lock:
+            if not self._fechado and conn not in self._antigas:
+                self._livres.put(conn)
+                return
+            if conn in self._antigas:
+                self._antigas.discard(conn)
+                self._criadas -= 1
+            if conn in self._todas:
+                self._todas.remove(conn)
+        conn.close()
+    
+    def fechar(self):
+        """
+        Fecha o pool: as conexões livres são fechadas agora e as emprestadas
+        quando forem devolvidas (fechar no meio de uma consulta de outra thread
+        quebraria essa consulta). Novos empréstimos levantam RuntimeError.
+        """
+        with self._lock:
+            self._fechado = True
+            while True:
+                try:
+                    conn = self._livres.get_nowait()
+                except queue.Empty:
+                    break
+                self._todas.remove(conn)
+                conn.close()
+
+class IndiceTrigramas:
+    """
+    Índice trigram em memória dos nomes (razão social e fantasia) de um escopo,
+    para casar muitos leads da mesma cidade com uma só leitura do banco.
+    buscar() devolve os candidatos no mesmo formato do _buscar_nomes.
+    """
+    
+    # Abaixo disso (Jaccard dos trigramas) não conta como achado no escopo:
+    # a busca segue para a UF/país, como quando o FTS não acha nada
+    SIMILARIDADE_MINIMA = 0.3
+    
+    def __init__(self, linhas):
+        self._itens = []       # (cnpj_basico, razao_social, nome normalizado)
+        self._trigramas = []   # trigramas de cada item
+        self._postings = {}    # trigrama -> [posições em _itens]
+        vistos = set()
+        for b, razao, fantasia in linhas:
+            for nome in (razao, fantasia):
+                nome = normalizar_nome(nome or "")
+                if not nome or (b, nome) in vistos:
+                    continue
+                vistos.add((b, nome))
+                i = len(self._itens)
+                self._itens.append((b, razao, nome))
+                self._trigramas.append(calcular_assinatura(nome).trigramas)
+                for t in self._trigramas[i]:
+                    self._postings.setdefault(t, []).append(i)
+    
+    def __len__(self):
+        return len(self._itens)
+    
+    def buscar(self, nome: str, limit: int) -> list:
+        """Até `limit` empresas com mais trigramas em comum com o nome"""
+        alvo = trigramas(nome)
+        comuns = Counter()
+        for t in alvo:
+            comuns.update(self._postings.get(t, ()))
+        
+        melhores = {}
+        for i, n in comuns.items():
+            sim = n / (len(alvo) + len(self._trigramas[i]) - n)
+            b = self._itens[i][0]
+            if sim >= self.SIMILARIDADE_MINIMA and sim > melhores.get(b, (0.0,))[0]:
+                melhores[b] = (sim, i)
+        
+        candidatos = []
+        for _, i in heapq.nlargest(limit, melhores.values()):
+            b, razao, nome_indice = self._itens[i]
+            candidatos.append({"cnpj_basico": b, "razao_social": razao, "nome": nome_indice})
+        return candidatos
 
 class LocalCNPJSearch:
     
+    _pool = None
+    _pool_lock = threading.Lock()
+    _municipios = None  # {NOME NORMALIZADO: [(codigo_tom, uf), ...]}, carregado na 1ª busca por cidade
+    _municipios_geracao = None  # ConnectionPool.geracao em que _municipios foi lido
+    
+    # Qualquer objeto com score(a, b) -> 0..1 (ver scrapers/similaridade.py)
+    scorer = HybridScorer()
+    
+    @staticmethod
+    def pool() -> ConnectionPool:
+        """Pool compartilhado (recriado se DB apontar para outro arquivo)"""
+        with LocalCNPJSearch._pool_lock:
+            pool = LocalCNPJSearch._pool
+            if pool is None or pool.db_path != DB:
+                if pool is not None:
+                    pool.fechar()
+                pool = LocalCNPJSearch._pool = ConnectionPool(DB)
+                LocalCNPJSearch._municipios = None
+            return pool
+    
+    @staticmethod
+    def fechar():
+        """Fecha as conexões do pool (ex.: antes de reconstruir o banco)"""
+        with LocalCNPJSearch._pool_lock:
+            if LocalCNPJSearch._pool is not None:
+                LocalCNPJSearch._pool.fechar()
+                LocalCNPJSearch._pool = None
+            LocalCNPJSearch._municipios = None
+    
     @staticmethod
     def cnpj_dv(cnpj12: str) -> str:
         """Calcula dígitos verificadores"""
-        pesos1 = [5,4,3,2,9,8,7,6,5,4,3,2]
-        pesos2 = [6] + pesos1
-        
-        def calc(nums, pesos):
-            s = sum(int(n) * p for n, p in zip(nums, pesos))
-            r = s % 11
-            return "0" if r < 2 else str(11 - r)
-        
-        dv1 = calc(cnpj12, pesos1)
-        dv2 = calc(cnpj12 + dv1, pesos2)
-        return dv1 + dv2
+        return cnpj_utils.calcular_dv(cnpj12)
     
     @staticmethod
     def cnpj_matriz_from_basico(cnpj_basico: str) -> str:
         """Gera CNPJ completo (14 dígitos) da matriz"""
-        base = re.sub(r"\D", "", cnpj_basico or "").zfill(8)
-        ordem = "0001"
-        return base + ordem + LocalCNPJSearch.cnpj_dv(base + ordem)
+        return cnpj_utils.cnpj_matriz(cnpj_basico)
     
     @staticmethod
     def buscar_estabelecimento(cnpj_basico: str):
@@ -39,105 +247,308 @@ class LocalCNPJSearch:
         if not DB.exists():
             return None
         
-        conn = sqlite3.connect(DB.as_posix())
-        cur = conn.cursor()
-        
         logger.info(f"  🔍 Buscando estabelecimento: CNPJ básico {cnpj_basico}")
         
-        # Busca estabelecimento matriz (cnpj_ordem = '0001')
-        cur.execute("""
-            SELECT ddd_1, telefone_1, ddd_2, telefone_2, email, uf, municipio
-            FROM estabelecimentos
-            WHERE cnpj_basico = ? AND cnpj_ordem = '0001'
-            LIMIT 1
-        """, (cnpj_basico,))
-        
-        row = cur.fetchone()
-        
-        if not row:
-            logger.warning(f"  ⚠️ Estabelecimento não encontrado para CNPJ básico {cnpj_basico}")
-            # Tenta buscar qualquer estabelecimento desse CNPJ
-            cur.execute("""
-                SELECT ddd_1, telefone_1, ddd_2, telefone_2, email, uf, municipio
+        with LocalCNPJSearch.pool().conexao() as conn:
+            # Busca estabelecimento matriz (cnpj_ordem = '0001')
+            row = conn.execute("""
+                SELECT telefone_1_e164, telefone_2_e164, email, uf, municipio
                 FROM estabelecimentos
-                WHERE cnpj_basico = ?
+                WHERE cnpj_basico = ? AND cnpj_ordem = '0001'
                 LIMIT 1
-            """, (cnpj_basico,))
-            row = cur.fetchone()
-        
-        conn.close()
+            """, (cnpj_basico,)).fetchone()
+            
+            if not row:
+                logger.warning(f"  ⚠️ Estabelecimento não encontrado para CNPJ básico {cnpj_basico}")
+                # Tenta buscar qualquer estabelecimento desse CNPJ
+                row = conn.execute("""
+                    SELECT telefone_1_e164, telefone_2_e164, email, uf, municipio
+                    FROM estabelecimentos
+                    WHERE cnpj_basico = ?
+                    LIMIT 1
+                """, (cnpj_basico,)).fetchone()
         
         if row:
-            ddd1, tel1, ddd2, tel2, email, uf, municipio = row
-            
-            logger.info(f"  📊 Dados encontrados - DDD1: {ddd1}, Tel1: {tel1}, Email: {email}")
-            
-            # Monta telefone completo
-            telefone = None
-            if ddd1 and tel1:
-                telefone = f"55{ddd1}{tel1}".replace(' ', '').replace('-', '')
-            elif ddd2 and tel2:
-                telefone = f"55{ddd2}{tel2}".replace(' ', '').replace('-', '')
-            
-            return {
-                'telefone': telefone,
-                'email': email,
-                'uf': uf,
-                'municipio': municipio
-            }
+            logger.info(f"  📊 Dados encontrados - Tel1: {row[0]}, Tel2: {row[1]}, Email: {row[2]}")
+            return LocalCNPJSearch._dados_estabelecimento(row)
         
         logger.warning(f"  ⚠️ Nenhum estabelecimento encontrado")
         return None
     
     @staticmethod
-    def search(nome: str, limit=10):
-        """Busca empresas por nome"""
+    def dados_cnpj(cnpj: str):
+        """
+        Empresa, estabelecimento e quadro de sócios de um CNPJ direto do banco local
+        (None se a empresa não está no dump). Sócios vazios se a tabela socios
+        ainda não foi importada.
+        """
         
         if not DB.exists():
-            logger.warning(f"⚠️ Banco de CNPJs não encontrado: {DB}")
-            return []
+            return None
         
-        conn = sqlite3.connect(DB.as_posix())
-        cur = conn.cursor()
+        cnpj = re.sub(r"\D", "", cnpj or "").zfill(14)
+        cnpj_basico = cnpj[:8]
         
-        # FTS5 match
-        q = " ".join(nome.upper().split())
-        cur.execute("""
-            SELECT cnpj_basico, razao_social
-            FROM empresas_fts
-            WHERE empresas_fts MATCH ?
-            LIMIT ?
-        """, (q, limit))
+        with LocalCNPJSearch.pool().conexao() as conn:
+            empresa = conn.execute("""
+                SELECT razao_social, natureza_juridica, capital_social, porte
+                FROM empresas
+                WHERE cnpj_basico = ?
+            """, (cnpj_basico,)).fetchone()
+            if not empresa:
+                return None
+            
+            # O próprio estabelecimento; se não vier no dump, a matriz
+            estab = conn.execute("""
+                SELECT nome_fantasia, telefone_1_e164, telefone_2_e164, email, uf, municipio
+                FROM estabelecimentos
+                WHERE cnpj_basico = ?
+                ORDER BY cnpj_completo != ?, cnpj_ordem != '0001'
+                LIMIT 1
+            """, (cnpj_basico, cnpj)).fetchone()
+            
+            try:
+                socios = conn.execute("""
+                    SELECT nome_socio, identificador_socio, qualificacao_socio, data_entrada_sociedade
+                    FROM socios
+                    WHERE cnpj_basico = ?
+                """, (cnpj_basico,)).fetchall()
+            except sqlite3.OperationalError:
+                socios = []
         
-        rows = cur.fetchall()
-        conn.close()
+        razao, natureza, capital, porte = empresa
+        dados = {
+            'cnpj': cnpj,
+            'razao_social': razao,
+            'natureza_juridica': natureza,
+            'capital_social': capital,
+            'porte': porte,
+            'nome_fantasia': estab[0] if estab else None,
+            'socios': [
+                {'nome': n, 'identificador': i, 'qualificacao': q, 'data_entrada': d}
+                for n, i, q, d in socios
+            ],
+        }
+        if estab:
+            dados.update(LocalCNPJSearch._dados_estabelecimento(estab[1:]))
+        return dados
+    
+    @staticmethod
+    def _dados_estabelecimento(row) -> dict:
+        """Monta o dict de contato a partir de (telefone_1_e164, telefone_2_e164, email, uf, municipio)"""
+        tel1, tel2, email, uf, municipio = row
         
-        return [{"cnpj_basico": b, "cnpj": LocalCNPJSearch.cnpj_matriz_from_basico(b), "razao_social": r} for b, r in rows]
+        # Telefones já normalizados na importação (55 + DDD + número)
+        return {
+            'telefone': tel1 or tel2,
+            'email': email,
+            'uf': uf,
+            'municipio': municipio
+        }
+    
+    @staticmethod
+    def _fts_query(nome: str) -> str:
+        """Query FTS5 com cada termo entre aspas (nomes como RE/MAX ou "A & B" não quebram a sintaxe)"""
+        termos = (nome or "").upper().replace('"', ' ').split()
+        return " ".join(f'"{t}"' for t in termos)
     
     @staticmethod
-    def melhor_match(nome_empresa: str):
-        """Encontra o melhor match por similaridade + dados completos"""
+    def _consultas_trigram(nome: str, tolerante: bool = False) -> list:
+        """
+        Queries do índice trigram, da mais precisa para a mais tolerante:
+        o nome inteiro como substring, todos os termos e só os termos específicos
+        (sem "IMOVEIS", "NEGOCIOS"...).
+        Por fim, cada termo específico vira (metade OR metade), com os termos
+        ainda em AND: um erro de digitação por termo deixa uma metade intacta e
+        o AND mantém a consulta seletiva. Só termos de 6+ letras são divididos
+        (metades de 3+). Nome de um termo só vira um OR puro, que casa com
+        muito mais nomes: só entra com `tolerante` (busca num município/UF).
+        Termos com menos de 3 letras só entram na frase inteira: sozinhos não casam no trigram.
+        """
+        frase = " ".join(t for t in normalizar_nome(nome).split() if t not in SUFIXOS_LEGAIS)
+        termos = [t for t in frase.split() if len(t) >= 3 and t not in STOPWORDS]
+        especificos = [t for t in sorted(tokens(nome)) if len(t) >= 3]
         
-        candidatos = LocalCNPJSearch.search(nome_empresa, limit=20)
+        consultas = [
+            f'"{frase}"' if len(frase) >= 3 else "",
+            " ".join(f'"{t}"' for t in termos),
+            " ".join(f'"{t}"' for t in especificos),
+        ]
         
-        if not candidatos:
-            return None
+        grupos = []
+        for t in especificos:
+            if len(t) >= 6:
+                grupos.append(f'("{t[:len(t) // 2]}" OR "{t[len(t) // 2:]}")')
+            else:
+                grupos.append(f'"{t}"')
+        if len(grupos) > 1 or tolerante:
+            consultas.append(" AND ".join(grupos))
+        return [q for q in dict.fromkeys(consultas) if q]
+    
+    @staticmethod
+    def _buscar_nomes(conn, nome: str, limit: int, uf: str = None, municipios: list = None) -> list:
+        """
+        Candidatos por razão social ou nome fantasia no índice trigram (nomes_fts),
+        opcionalmente só empresas com estabelecimento na UF/municípios.
+        Sem ORDER BY rank: o bm25 pontuaria todos os matches (milhares para
+        termos comuns) antes do LIMIT. Cada consulta para nos primeiros `limit`
+        matches e quem ordena os candidatos é o scorer (ver _escolher).
+        Empresa achada por mais de um nome (razão e fantasia) fica com o de mais
+        trigramas em comum com a busca, como no IndiceTrigramas.
+        Bancos gerados antes do índice caem no empresas_fts (só razão social).
+        """
+        # O filtro entra antes do LIMIT: homônimos de outros estados não tomam as vagas
+        geo, params_geo = "", ()
+        if uf or municipios:
+            condicoes = ["es.cnpj_basico = f.cnpj_basico"]
+            if uf:
+                condicoes.append("es.uf = ?")
+                params_geo += (uf,)
+            if municipios:
+                condicoes.append("es.municipio IN (SELECT value FROM json_each(?))")
+                params_geo += (json.dumps(municipios),)
+            geo = f"AND EXISTS (SELECT 1 FROM estabelecimentos es WHERE {' AND '.join(condicoes)})"
         
-        melhor = None
-        melhor_score = 0.0
+        candidatos = {}
+        alvo = trigramas(nome)
+        try:
+            for q in LocalCNPJSearch._consultas_trigram(nome, tolerante=bool(geo)):
+                for b, r, n in conn.execute(f"""
+                    SELECT f.cnpj_basico, e.razao_social, f.nome
+                    FROM nomes_fts f
+                    JOIN empresas e ON e.cnpj_basico = f.cnpj_basico
+                    WHERE nomes_fts MATCH ? {geo}
+                    LIMIT ?
+                """, (q, *params_geo, limit)):
+                    atual = candidatos.get(b)
+                    if atual is None:
+                        candidatos[b] = {"cnpj_basico": b, "razao_social": r, "nome": n}
+                    elif n != atual["nome"] and jaccard(alvo, trigramas(n)) > jaccard(alvo, trigramas(atual["nome"])):
+                        atual["nome"] = n
+                if len(candidatos) >= limit:
+                    break
+            return list(candidatos.values())[:limit]
+        except sqlite3.OperationalError as e:
+            if "nomes_fts" not in str(e):
+                raise
         
+        q = LocalCNPJSearch._fts_query(nome)
+        if not q:
+            return []
+        rows = conn.execute(f"""
+            SELECT f.cnpj_basico, f.razao_social
+            FROM empresas_fts f
+            WHERE empresas_fts MATCH ? {geo}
+            LIMIT ?
+        """, (q, *params_geo, limit)).fetchall()
+        return [{"cnpj_basico": b, "razao_social": r} for b, r in rows]
+    
+    @staticmethod
+    def _carregar_municipios(conn) -> dict:
+        """
+        Índice nome normalizado -> [(codigo_tom, uf)] da tabela municipios (lido uma
+        vez, e de novo se o arquivo do banco mudar). O campo municipio dos
+        estabelecimentos é o código TOM da Receita, não o IBGE.
+        """
+        pool = LocalCNPJSearch._pool
+        geracao = pool.geracao if pool is not None else None
+        if LocalCNPJSearch._municipios is None or LocalCNPJSearch._municipios_geracao != geracao:
+            municipios = {}
+            try:
+                for codigo, nome, uf in conn.execute(
+                    "SELECT codigo_tom, nome, uf FROM municipios WHERE codigo_tom IS NOT NULL"
+                ):
+                    municipios.setdefault(normalizar_nome(nome), []).append((codigo, uf))
+            except sqlite3.OperationalError:
+                logger.warning("⚠️ Tabela municipios não encontrada ou sem código TOM "
+                               "(rode build_cnpj_db.py): busca filtra só por UF")
+            LocalCNPJSearch._municipios = municipios
+            LocalCNPJSearch._municipios_geracao = geracao
+        return LocalCNPJSearch._municipios
+    
+    @staticmethod
+    def codigos_municipio(conn, cidade: str, uf: str = None) -> list:
+        """
+        Códigos dos municípios com esse nome (sem acento/caixa), na UF se informada.
+        Aceita nome truncado ("Joao" -> João Pessoa), como o google_maps grava a cidade.
+        """
+        nome = normalizar_nome(cidade or "")
+        if not nome:
+            return []
+        
+        municipios = LocalCNPJSearch._carregar_municipios(conn)
+        achados = [c for c, u in municipios.get(nome, []) if not uf or u == uf]
+        if not achados:
+            achados = [c for n, ms in municipios.items() if n.startswith(nome + " ")
+                       for c, u in ms if not uf or u == uf]
+        return sorted(achados)
+    
+    @staticmethod
+    def _candidatos(conn, nome: str, limit: int, cidade: str = None, uf: str = None,
+                    indices: dict = None) -> list:
+        """
+        Candidatos restritos ao município; sem nenhum lá (empresa registrada na
+        cidade vizinha, nome de cidade errado), tenta a UF inteira e, por fim, o
+        país. Os do país, quando a cidade/UF foi buscada antes, voltam marcados
+        com `fora_do_escopo` (score reduzido em _escolher).
+        `indices` ({(uf, municípios): IndiceTrigramas}) substitui o FTS nesses escopos.
+        """
+        uf = (uf or "").strip().upper() or None
+        municipios = LocalCNPJSearch.codigos_municipio(conn, cidade, uf) if cidade else []
+        indices = indices or {}
+        
+        escopos = []
+        if municipios:
+            escopos.append((uf, municipios))
+        if uf:
+            escopos.append((uf, None))
+        escopos.append((None, None))
+        
+        for uf_escopo, municipios_escopo in escopos:
+            indice = indices.get((uf_escopo, tuple(municipios_escopo or ())))
+            if indice is not None:
+                candidatos = indice.buscar(nome, limit)
+            else:
+                candidatos = LocalCNPJSearch._buscar_nomes(conn, nome, limit, uf_escopo, municipios_escopo)
+            if candidatos:
+                if len(escopos) > 1 and not (uf_escopo or municipios_escopo):
+                    for item in candidatos:
+                        item["fora_do_escopo"] = True
+                return candidatos
+        return []
+    
+    @staticmethod
+    def search(nome: str, limit=10, cidade: str = None, uf: str = None):
+        """
+        Busca empresas por razão social ou nome fantasia (tolerante a acentos e erros de digitação).
+        Com `cidade`/`uf`, prioriza empresas com estabelecimento no município (ou, se não
+        houver, na UF); sem nenhuma lá, busca no país e marca `fora_do_escopo`.
+        """
+        
+        if not DB.exists():
+            logger.warning(f"⚠️ Banco de CNPJs não encontrado: {DB}")
+            return []
+        
+        with LocalCNPJSearch.pool().conexao() as conn:
+            candidatos = LocalCNPJSearch._candidatos(conn, nome, limit, cidade, uf)
+        
+        # O índice não ordena por relevância: mais parecidos primeiro
+        LocalCNPJSearch._pontuar(nome, candidatos)
+        candidatos.sort(key=lambda item: item["similaridade"], reverse=True)
         for item in candidatos:
-            razao = item['razao_social']
-            score = SequenceMatcher(None, nome_empresa.upper(), razao.upper()).ratio()
-            
-            if score > melhor_score:
-                melhor_score = score
-                melhor = item
+            item["cnpj"] = LocalCNPJSearch.cnpj_matriz_from_basico(item["cnpj_basico"])
+        return candidatos
+    
+    @staticmethod
+    def melhor_match(nome_empresa: str, cidade: str = None, uf: str = None):
+        """Encontra o melhor match por similaridade + dados completos (na cidade/UF, se informadas)"""
         
-        if melhor_score < 0.6:  # Mínimo 60% similaridade
-            return None
+        candidatos = LocalCNPJSearch.search(nome_empresa, limit=20, cidade=cidade, uf=uf)
         
-        melhor['score'] = round(melhor_score, 4)
+        melhor = LocalCNPJSearch._escolher(nome_empresa, candidatos)
+        if not melhor:
+            return None
+        melhor_score = melhor['score']
         
         # Busca dados do estabelecimento (telefone, email)
         estab = LocalCNPJSearch.buscar_estabelecimento(melhor['cnpj_basico'])
@@ -151,4 +562,154 @@ class LocalCNPJSearch:
         if melhor.get('telefone'):
             logger.info(f"  📱 Telefone: {melhor['telefone']}")
         
-        return melhor
\ No newline at end of file
+        return melhor
+    
+    @staticmethod
+    def _pontuar(nome: str, candidatos: list):
+        """
+        Grava em item['similaridade'] o score de cada candidato (o maior entre a
+        razão social e o nome achado no índice: o nome do Maps pode bater com
+        qualquer um). Com scorers que comparam assinaturas, a do lead vem do
+        cache e a de cada linha candidata é calculada uma vez, aqui.
+        Candidatos já pontuados (pelo search) não são recalculados.
+        """
+        scorer = LocalCNPJSearch.scorer
+        por_assinatura = getattr(scorer, "score_assinaturas", None)
+        alvo = assinatura(nome) if por_assinatura else None
+        
+        for item in candidatos:
+            if "similaridade" in item:
+                continue
+            nomes = [item["razao_social"]] + ([item["nome"]] if item.get("nome") else [])
+            if por_assinatura:
+                item["similaridade"] = max(por_assinatura(alvo, calcular_assinatura(n)) for n in nomes)
+            else:
+                item["similaridade"] = max(scorer.score(nome, n) for n in nomes)
+    
+    @staticmethod
+    def _escolher(nome_empresa: str, candidatos: list, minimo: float = 0.6):
+        """
+        Candidato mais parecido com o nome (None abaixo de `minimo`).
+        Candidatos `fora_do_escopo` têm o score multiplicado por PENALIDADE_FORA_DO_ESCOPO.
+        """
+        melhor = None
+        melhor_score = 0.0
+        LocalCNPJSearch._pontuar(nome_empresa, candidatos)
+        
+        for item in candidatos:
+            score = item['similaridade']
+            if item.get('fora_do_escopo'):
+                score *= PENALIDADE_FORA_DO_ESCOPO
+            
+            if score > melhor_score:
+                melhor_score = score
+                melhor = item
+        
+        if melhor is None or melhor_score < minimo:  # Mínimo 60% similaridade
+            return None
+        
+        melhor['score'] = round(melhor_score, 4)
+        return melhor
+    
+    @staticmethod
+    def _indice_escopo(conn, escopo: tuple, leads: int):
+        """
+        IndiceTrigramas dos nomes com estabelecimento no escopo (uf, municípios),
+        ou None se o município tem nomes demais para os `leads` que vão usá-lo
+        (aí o FTS por lead sai mais barato que ler e indexar a cidade).
+        """
+        uf, municipios = escopo
+        params = (uf, json.dumps(municipios))
+        total = conn.execute("""
+            SELECT COUNT(*) FROM estabelecimentos
+            WHERE uf = ? AND municipio IN (SELECT value FROM json_each(?))
+        """, params).fetchone()[0]
+        if not total or total > min(leads * NOMES_POR_LEAD, MAX_NOMES_INDICE):
+            return None
+        
+        return IndiceTrigramas(conn.execute("""
+            SELECT es.cnpj_basico, e.razao_social, es.nome_fantasia
+            FROM estabelecimentos es
+            JOIN empresas e ON e.cnpj_basico = es.cnpj_basico
+            WHERE es.uf = ? AND es.municipio IN (SELECT value FROM json_each(?))
+        """, params))
+    
+    @staticmethod
+    def melhor_match_many(leads, limit: int = 20) -> list:
+        """
+        Versão em lote de melhor_match para milhares de leads.
+        `leads` é uma lista de nomes ou de tuplas (nome, cidade, uf).
+        Leads repetidos (mesmo nome, cidade e UF) fazem uma só busca, tudo numa
+        única conexão, e os estabelecimentos de todos os vencedores vêm numa só consulta.
+        Leads da mesma cidade (com UF) são casados juntos: os nomes do município
+        são lidos uma vez para um IndiceTrigramas, em vez de uma consulta FTS por
+        lead, quando o município tem até NOMES_POR_LEAD nomes por lead.
+        Retorna uma lista na mesma ordem da entrada (None onde não houve match).
+        """
+        
+        def chave(lead):
+            nome, cidade, uf = (lead, None, None) if isinstance(lead, str) else (tuple(lead) + (None, None))[:3]
+            return (" ".join((nome or "").upper().split()), cidade or None, (uf or "").strip().upper() or None)
+        
+        chaves = [chave(lead) for lead in leads]
+        
+        if not DB.exists():
+            logger.warning(f"⚠️ Banco de CNPJs não encontrado: {DB}")
+            return [None] * len(chaves)
+        
+        unicos = dict.fromkeys(chaves)
+        
+        with LocalCNPJSearch.pool().conexao() as conn:
+            # 1. Leads agrupados pelo município (com UF); os demais vão no grupo None
+            grupos = {}
+            for nome, cidade, uf in unicos:
+                escopo = None
+                if cidade and uf:
+                    municipios = LocalCNPJSearch.codigos_municipio(conn, cidade, uf)
+                    escopo = (uf, tuple(municipios)) if municipios else None
+                grupos.setdefault(escopo, []).append((nome, cidade, uf))
+            
+            for escopo, chaves_grupo in grupos.items():
+                # 2. Índice em memória do município, se compensar; senão, FTS por lead
+                indices = {}
+                if escopo is not None:
+                    indice = LocalCNPJSearch._indice_escopo(conn, escopo, len(chaves_grupo))
+                    if indice is not None:
+                        indices[escopo] = indice
+                
+                for nome, cidade, uf in chaves_grupo:
+                    try:
+                        candidatos = LocalCNPJSearch._candidatos(conn, nome, limit, cidade, uf, indices)
+                    except sqlite3.OperationalError as e:
+                        logger.warning(f"  ⚠️ Busca FTS falhou para '{nome}': {e}")
+                        continue
+                    
+                    # 3. Score de todos os candidatos em memória
+                    unicos[(nome, cidade, uf)] = LocalCNPJSearch._escolher(nome, candidatos)
+            
+            # 4. Estabelecimentos de todos os vencedores de uma vez (matriz primeiro)
+            basicos = sorted({m['cnpj_basico'] for m in unicos.values() if m})
+            estabs = {}
+            for b, *dados in conn.execute("""
+                SELECT cnpj_basico, telefone_1_e164, telefone_2_e164, email, uf, municipio
+                FROM estabelecimentos
+                WHERE cnpj_basico IN (SELECT value FROM json_each(?))
+                ORDER BY cnpj_basico, cnpj_ordem != '0001'
+            """, (json.dumps(basicos),)):
+                estabs.setdefault(b, dados)
+        
+        resultados = []
+        for k in chaves:
+            melhor = unicos.get(k)
+            if not melhor:
+                resultados.append(None)
+                continue
+            
+            item = dict(melhor)
+            item['cnpj'] = LocalCNPJSearch.cnpj_matriz_from_basico(item['cnpj_basico'])
+            if item['cnpj_basico'] in estabs:
+                item.update(LocalCNPJSearch._dados_estabelecimento(estabs[item['cnpj_basico']]))
+            resultados.append(item)
+        
+        logger.info(f"✅ {sum(1 for r in resultados if r)}/{len(resultados)} leads com match no banco local")
+        return resultados
@@ -0,0 +1,189 @@
+# scrapers/municipios.py
+import csv
+import difflib
+import io
+import sqlite3
+import threading
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from .similaridade import normalizar_nome
+
+logger = logging.getLogger(__name__)
+
+# Tabela IBGE empacotada (código, UF, nome oficial e nome anterior de municípios renomeados)
+TABELA_IBGE = Path(__file__).parent / "dados" / "municipios_ibge.csv"
+DATA_DIR = Path("data/receita")
+SIMILARIDADE_MINIMA = 0.85  # nome da Receita com grafia diferente ("MOJI MIRIM" x "MOGI MIRIM")
+
+Municipio = namedtuple("Municipio", "codigo_ibge nome uf")
+
+class Municipios:
+    """
+    Resolução offline de municípios em dicionários na memória.
+
+    O campo `municipio` dos estabelecimentos da Receita é o código TOM (SIAFI),
+    não o IBGE: o nome vem do Municipios.zip da Receita (baixado junto com os
+    outros zips) e é casado com a tabela IBGE empacotada pelo nome dentro da UF.
+    Códigos IBGE de 7 dígitos também são aceitos (leads e bancos antigos).
+    """
+
+    _ibge = None      # {codigo_ibge: Municipio}
+    _por_nome = None  # {uf: {NOME NORMALIZADO: codigo_ibge}}, inclusive nomes anteriores
+    _tom = None       # {codigo_tom: NOME NA RECEITA}
+    _resolvidos = {}  # {(codigo, uf): Municipio ou None}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _carregar_ibge():
+        with Municipios._lock:
+            if Municipios._ibge is not None:
+                return
+            ibge, por_nome = {}, {}
+            with open(TABELA_IBGE, newline="", encoding="utf-8") as f:
+                for linha in csv.DictReader(f):
+                    m = Municipio(linha["codigo_ibge"], linha["nome"], linha["uf"])
+                    ibge[m.codigo_ibge] = m
+                    nomes = por_nome.setdefault(m.uf, {})
+                    nomes[normalizar_nome(m.nome)] = m.codigo_ibge
+                    if linha["nome_anterior"]:
+                        nomes.setdefault(linha["nome_anterior"], m.codigo_ibge)
+            Municipios._por_nome = por_nome
+            Municipios._ibge = ibge
+
+    @staticmethod
+    def _ler_zip_receita(zip_path: Path) -> Dict[str, str]:
+        """{codigo_tom: nome} do Municipios.zip da Receita ("0001";"GUAJARA-MIRIM")"""
+        tom = {}
+        with zipfile.ZipFile(zip_path) as z:
+            for nome in (n for n in z.namelist() if not n.endswith('/')):
+                with z.open(nome) as f:
+                    for cols in csv.reader(io.TextIOWrapper(f, encoding="latin1", newline=""), delimiter=";"):
+                        if len(cols) >= 2 and cols[0].strip():
+                            tom[cols[0].strip().lstrip("0") or "0"] = cols[1].strip()
+        return tom
+
+    @staticmethod
+    def carregar_tom(data_dir: Path = DATA_DIR, recarregar: bool = False) -> Dict[str, str]:
+        """Códigos TOM da Receita (lidos uma vez por processo); vazio se não houver Municipios.zip"""
+        with Municipios._lock:
+            if Municipios._tom is None or recarregar:
+                tom = {}
+                for zp in sorted(Path(data_dir).glob("Municipios*.zip")):
+                    tom.update(Municipios._ler_zip_receita(zp))
+                if not tom:
+                    logger.warning(f"⚠️ Municipios.zip não encontrado em {data_dir}: "
+                                   "códigos TOM da Receita ficam sem cidade")
+                Municipios._tom = tom
+                Municipios._resolvidos = {}
+            return Municipios._tom
+
+    @staticmethod
+    def por_ibge(codigo_ibge: str) -> Optional[Municipio]:
+        Municipios._carregar_ibge()
+        return Municipios._ibge.get(str(codigo_ibge or "").strip())
+
+    @staticmethod
+    def por_nome(nome: str, uf: str = None) -> Optional[Municipio]:
+        """Município pelo nome (sem acento/caixa); com grafia aproximada só dentro da UF"""
+        Municipios._carregar_ibge()
+        chave = normalizar_nome(nome)
+        if not chave:
+            return None
+
+        if uf:
+            nomes = Municipios._por_nome.get(uf.strip().upper(), {})
+            codigo = nomes.get(chave)
+            if codigo is None:
+                parecidos = difflib.get_close_matches(chave, nomes, n=1, cutoff=SIMILARIDADE_MINIMA)
+                codigo = nomes[parecidos[0]] if parecidos else None
+            return Municipios._ibge.get(codigo)
+
+        # Sem UF: só quando o nome é único no país
+        achados = {nomes[chave] for nomes in Municipios._por_nome.values() if chave in nomes}
+        return Municipios._ibge.get(achados.pop()) if len(achados) == 1 else None
+
+    @staticmethod
+    def resolver(codigo: str, uf: str = None) -> Optional[Municipio]:
+        """
+        Município de um código da Receita (TOM) ou IBGE (7 dígitos).
+        A UF desambigua nomes repetidos; resultados ficam em cache por (código, UF).
+        """
+        codigo = str(codigo or "").strip()
+        uf = (uf or "").strip().upper() or None
+        chave = (codigo, uf)
+        if chave in Municipios._resolvidos:
+            return Municipios._resolvidos[chave]
+
+        municipio = None
+        if len(codigo) == 7:
+            municipio = Municipios.por_ibge(codigo)
+        if municipio is None and codigo.isdigit():
+            nome = Municipios.carregar_tom().get(codigo.lstrip("0") or "0")
+            if nome:
+                municipio = Municipios.por_nome(nome, uf)
+                if municipio is None:
+                    logger.debug(f"  Município sem correspondência no IBGE: {codigo} {nome}/{uf}")
+        if municipio is not None and uf and municipio.uf != uf:
+            municipio = None
+
+        Municipios._resolvidos[chave] = municipio
+        return municipio
+
+    @staticmethod
+    def resolver_lote(pares: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Municipio]:
+        """{(código, UF): Município} dos pares distintos que foram resolvidos"""
+        resultado = {}
+        for par in set(pares):
+            municipio = Municipios.resolver(*par)
+            if municipio is not None:
+                resultado[par] = municipio
+        return resultado
+
+    @staticmethod
+    def gravar_tabela(conn: sqlite3.Connection) -> int:
+        """
+        (Re)cria a tabela municipios (codigo_ibge, nome, uf, codigo_tom) no banco,
+        para consultas por nome de cidade e joins. O código TOM de cada município
+        sai dos pares (municipio, uf) que aparecem nos estabelecimentos: o
+        Municipios.zip não traz a UF. Retorna o número de municípios.
+        """
+        Municipios._carregar_ibge()
+        tom_por_ibge = {}
+        if Municipios.carregar_tom() and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'estabelecimentos'"
+        ).fetchone():
+            pares = conn.execute("SELECT DISTINCT municipio, uf FROM estabelecimentos").fetchall()
+            for (tom, uf), municipio in Municipios.resolver_lote(pares).items():
+                if len(tom) != 7:
+                    tom_por_ibge.setdefault(municipio.codigo_ibge, tom)
+
+        if conn.in_transaction:
+            conn.commit()
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            cur.execute("DROP TABLE IF EXISTS municipios")
+            cur.execute("""
+                CREATE TABLE municipios (
+                    codigo_ibge TEXT PRIMARY KEY,
+                    nome TEXT,
+                    uf TEXT,
+                    codigo_tom TEXT
+                )
+            """)
+            cur.executemany("INSERT INTO municipios (codigo_ibge, nome, uf, codigo_tom) VALUES (?, ?, ?, ?)", [
+                (m.codigo_ibge, m.nome, m.uf, tom_por_ibge.get(m.codigo_ibge))
+                for m in Municipios._ibge.values()
+            ])
+            cur.execute("CREATE INDEX idx_municipios_codigo_tom ON municipios(codigo_tom)")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"🗺️ Tabela municipios: {len(Municipios._ibge):,} municípios, "
+                    f"{len(tom_por_ibge):,} com código TOM")
+        return len(Municipios._ibge)
@@ -3,7 +3,8 @@ import zipfile
 import pandas as pd
 import os
 import logging
-from typing import List
+from typing import Dict, Iterable, List
+from . import cnpj_utils
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,19 @@ class ProcessadorReceitaFederal:
         '8599600',  # Outras atividades de ensino
     ]
     
+    # CNAEs de Imobiliárias
+    CNAES_IMOBILIARIAS = [
+        '6821801',  # Corretagem na compra e venda e avaliação de imóveis
+        '6821802',  # Corretagem no aluguel de imóveis
+        '6822600',  # Gestão e administração da propriedade imobiliária
+    ]
+    
+    # Segmentos prospectados (nome -> CNAEs), usados por processar_segmentos
+    SEGMENTOS = {
+        'educacao': CNAES_EDUCACAO,
+        'imobiliarias': CNAES_IMOBILIARIAS,
+    }
+    
     # Colunas dos arquivos Estabelecimentos
     COLUNAS = [
         'cnpj_basico',
@@ -62,6 +76,211 @@ class ProcessadorReceitaFederal:
         'data_situacao_especial'
     ]
     
+    # Colunas lidas no modo streaming (o resto do arquivo nem é convertido)
+    COLUNAS_STREAMING = [
+        'cnpj_basico',
+        'cnpj_ordem',
+        'cnpj_dv',
+        'identificador_matriz_filial',
+        'nome_fantasia',
+        'situacao_cadastral',
+        'cnae_fiscal_principal',
+        'tipo_logradouro',
+        'logradouro',
+        'numero',
+        'complemento',
+        'bairro',
+        'cep',
+        'uf',
+        'municipio',
+        'ddd_1',
+        'telefone_1',
+        'correio_eletronico'
+    ]
+    
+    @staticmethod
+    def _listar_zips(pasta_receita: str) -> List[str]:
+        """Arquivos ZIP de Estabelecimentos da pasta, em ordem"""
+        arquivos = [f for f in os.listdir(pasta_receita) 
+                   if f.startswith('Estabelecimentos') and f.endswith('.zip')]
+        arquivos.sort()
+        return arquivos
+    
+    @staticmethod
+    def _formatar(df: pd.DataFrame) -> pd.DataFrame:
+        """Adiciona as colunas cnpj e telefone (operações vetorizadas, sem apply por linha)"""
+        df['cnpj'] = (
+            df['cnpj_basico'] + 
+            df['cnpj_ordem'] + 
+            df['cnpj_dv']
+        )
+        
+        # Concatenação de colunas: nulo em ddd_1 ou telefone_1 vira nulo no resultado
+        tem_telefone = df['ddd_1'].notna() & df['telefone_1'].notna()
+        df['telefone'] = ('55' + df['ddd_1'] + df['telefone_1']).where(tem_telefone, None)
+        
+        return df
+    
+    @staticmethod
+    def processar_estabelecimentos_streaming(
+        pasta_receita: str,
+        output_file: str = 'empresas_educacao.csv',
+        chunksize: int = 500_000
+    ) -> int:
+        """
+        Mesmo filtro de processar_estabelecimentos, mas lendo cada arquivo em
+        pedaços de `chunksize` linhas (só as colunas necessárias) e gravando o
+        resultado no CSV à medida que é filtrado. O pico de memória depende do
+        chunk, não do tamanho do arquivo. Retorna o total de linhas gravadas.
+        """
+        
+        totais = ProcessadorReceitaFederal.processar_segmentos(
+            pasta_receita,
+            {'educacao': ProcessadorReceitaFederal.CNAES_EDUCACAO},
+            chunksize=chunksize,
+            incluir_secundaria=False,
+            saidas={'educacao': output_file}
+        )
+        return totais['educacao']
+    
+    @staticmethod
+    def _regex_cnaes(cnaes) -> str:
+        """Regex que casa algum dos CNAEs numa lista separada por vírgula (cnae_fiscal_secundaria)"""
+        return r'(?:^|,)(?:' + '|'.join(sorted(cnaes)) + r')(?:,|$)'
+    
+    @staticmethod
+    def processar_segmentos(
+        pasta_receita: str,
+        segmentos: Dict[str, Iterable[str]] = None,
+        pasta_saida: str = '.',
+        chunksize: int = 500_000,
+        incluir_secundaria: bool = True,
+        saidas: Dict[str, str] = None
+    ) -> Dict[str, int]:
+        """
+        Extrai vários segmentos (nome -> CNAEs) numa única passada pelos arquivos
+        Estabelecimentos: cada chunk é lido uma vez e as linhas ativas são
+        roteadas para o CSV de cada segmento cujo CNAE principal (ou secundário,
+        com incluir_secundaria) casar. Uma empresa pode cair em mais de um segmento.
+        Saída padrão: <pasta_saida>/empresas_<segmento>.csv.
+        Linhas com CNPJ inválido (DV errado, linha quebrada que deslocou as
+        colunas) são descartadas, validadas em lote por chunk.
+        Retorna o total de linhas gravadas por segmento.
+        """
+        
+        segmentos = segmentos or ProcessadorReceitaFederal.SEGMENTOS
+        segmentos = {nome: set(cnaes) for nome, cnaes in segmentos.items()}
+        saidas = saidas or {
+            nome: os.path.join(pasta_saida, f'empresas_{nome}.csv') for nome in segmentos
+        }
+        
+        logger.info(f"🏢 Processando base da Receita Federal ({', '.join(segmentos)})...")
+        logger.info(f"📁 Pasta: {pasta_receita}")
+        
+        arquivos = ProcessadorReceitaFederal._listar_zips(pasta_receita)
+        logger.info(f"📦 {len(arquivos)} arquivos encontrados")
+        
+        colunas = list(ProcessadorReceitaFederal.COLUNAS_STREAMING)
+        if incluir_secundaria:
+            colunas.append('cnae_fiscal_secundaria')
+        
+        # Pré-filtro com a união de todos os CNAEs; o roteamento por segmento
+        # roda só sobre o que sobrar
+        todos = set().union(*segmentos.values())
+        regex_todos = ProcessadorReceitaFederal._regex_cnaes(todos)
+        regex_segmento = {
+            nome: ProcessadorReceitaFederal._regex_cnaes(cnaes) for nome, cnaes in segmentos.items()
+        }
+        
+        vistos = {nome: set() for nome in segmentos}  # dedupe entre chunks e arquivos
+        totais = {nome: 0 for nome in segmentos}
+        invalidos = 0
+        
+        # Sobrescreve as saídas anteriores
+        arquivos_saida = {nome: open(saidas[nome], 'w', encoding='utf-8-sig', newline='') for nome in segmentos}
+        cabecalho = {nome: True for nome in segmentos}
+        
+        try:
+            for idx, arquivo in enumerate(arquivos, 1):
+                logger.info(f"\n[{idx}/{len(arquivos)}] Processando {arquivo}...")
+                
+                caminho_zip = os.path.join(pasta_receita, arquivo)
+                
+                try:
+                    with zipfile.ZipFile(caminho_zip, 'r') as zip_ref:
+                        csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv') or f.endswith('.CSV')]
+                        
+                        for csv_file in csv_files:
+                            logger.info(f"  📄 Lendo {csv_file} (chunks de {chunksize:,})...")
+                            encontrados = {nome: 0 for nome in segmentos}
+                            
+                            with zip_ref.open(csv_file) as f:
+                                leitor = pd.read_csv(
+                                    f,
+                                    sep=';',
+                                    encoding='latin1',
+                                    names=ProcessadorReceitaFederal.COLUNAS,
+                                    usecols=colunas,
+                                    dtype=str,
+                                    chunksize=chunksize
+                                )
+                                
+                                for chunk in leitor:
+                                    # Ativos com algum CNAE de interesse
+                                    mascara = chunk['cnae_fiscal_principal'].isin(todos)
+                                    if incluir_secundaria:
+                                        mascara |= chunk['cnae_fiscal_secundaria'].str.contains(
+                                            regex_todos, regex=True, na=False
+                                        )
+                                    df = chunk[mascara & (chunk['situacao_cadastral'] == '02')]
+                                    if df.empty:
+                                        continue
+                                    
+                                    df = ProcessadorReceitaFederal._formatar(df.copy())
+                                    
+                                    # DV de todo o chunk de uma vez (NumPy), só nas linhas filtradas
+                                    valido = cnpj_utils.validar_vetorizado(df['cnpj'].fillna('').to_numpy(str))
+                                    if not valido.all():
+                                        invalidos += int((~valido).sum())
+                                        df = df[valido]
+                                    df = df.drop_duplicates(subset=['cnpj'])
+                                    
+                                    for nome, cnaes in segmentos.items():
+                                        m = df['cnae_fiscal_principal'].isin(cnaes)
+                                        if incluir_secundaria:
+                                            m |= df['cnae_fiscal_secundaria'].str.contains(
+                                                regex_segmento[nome], regex=True, na=False
+                                            )
+                                        
+                                        df_seg = df[m & ~df['cnpj'].isin(vistos[nome])]
+                                        if df_seg.empty:
+                                            continue
+                                        vistos[nome].update(df_seg['cnpj'])
+                                        
+                                        df_seg.to_csv(arquivos_saida[nome], index=False, header=cabecalho[nome])
+                                        cabecalho[nome] = False
+                                        
+                                        encontrados[nome] += len(df_seg)
+                                        totais[nome] += len(df_seg)
+                            
+                            for nome, n in encontrados.items():
+                                logger.info(f"    ✅ {nome}: {n} empresas encontradas")
+                
+                except Exception as e:
+                    logger.error(f"  ❌ Erro ao processar {arquivo}: {e}")
+        
+        finally:
+            for saida in arquivos_saida.values():
+                saida.close()
+        
+        if invalidos:
+            logger.warning(f"⚠️ {invalidos:,} linhas com CNPJ inválido descartadas")
+        logger.info(f"\n✅ TOTAL (empresas ativas no Brasil):")
+        for nome, n in totais.items():
+            logger.info(f"   {nome}: {n} → {saidas[nome]}")
+        
+        return totais
+    
     @staticmethod
     def processar_estabelecimentos(
         pasta_receita: str,
@@ -77,10 +296,7 @@ class ProcessadorReceitaFederal:
         all_empresas = []
         
         # Lista arquivos ZIP de Estabelecimentos
-        arquivos = [f for f in os.listdir(pasta_receita) 
-                   if f.startswith('Estabelecimentos') and f.endswith('.zip')]
-        
-        arquivos.sort()
+        arquivos = ProcessadorReceitaFederal._listar_zips(pasta_receita)
         
         logger.info(f"📦 {len(arquivos)} arquivos encontrados")
         
@@ -108,12 +324,13 @@ class ProcessadorReceitaFederal:
                                 low_memory=False
                             )
                             
-                            # Filtra por CNAE educação
+                            # Filtra por CNAE educação e, já aqui, apenas ativos
                             df_educacao = df[
-                                df['cnae_fiscal_principal'].isin(ProcessadorReceitaFederal.CNAES_EDUCACAO)
+                                df['cnae_fiscal_principal'].isin(ProcessadorReceitaFederal.CNAES_EDUCACAO) &
+                                (df['situacao_cadastral'] == '02')
                             ]
                             
-                            logger.info(f"    ✅ {len(df_educacao)} empresas de educação encontradas")
+                            logger.info(f"    ✅ {len(df_educacao)} empresas de educação ativas encontradas")
                             
                             if len(df_educacao) > 0:
                                 all_empresas.append(df_educacao)
@@ -125,26 +342,11 @@ class ProcessadorReceitaFederal:
         if all_empresas:
             df_final = pd.concat(all_empresas, ignore_index=True)
             
-            # Remove duplicatas
-            df_final = df_final.drop_duplicates(subset=['cnpj_basico', 'cnpj_ordem', 'cnpj_dv'])
-            
-            # Formata CNPJ
-            df_final['cnpj'] = (
-                df_final['cnpj_basico'] + 
-                df_final['cnpj_ordem'] + 
-                df_final['cnpj_dv']
-            )
-            
-            # Formata telefone
-            df_final['telefone'] = df_final.apply(
-                lambda x: f"55{x['ddd_1']}{x['telefone_1']}" 
-                if pd.notna(x['ddd_1']) and pd.notna(x['telefone_1']) 
-                else None,
-                axis=1
-            )
+            # Formata CNPJ e telefone
+            df_final = ProcessadorReceitaFederal._formatar(df_final)
             
-            # Filtra apenas ativos
-            df_final = df_final[df_final['situacao_cadastral'] == '02']
+            # Remove duplicatas (chave única: CNPJ de 14 dígitos)
+            df_final = df_final.drop_duplicates(subset=['cnpj'])
             
             logger.info(f"\n✅ TOTAL: {len(df_final)} empresas de educação ativas no Brasil")
             
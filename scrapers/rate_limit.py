@@ -0,0 +1,39 @@
+# scrapers/rate_limit.py
+import threading
+import time
+
+class TokenBucket:
+    """
+    Limitador token bucket thread-safe: `taxa` fichas por segundo, acumulando
+    até `rajada`. acquire() bloqueia só a thread que chamou, até ter ficha.
+    taxa=None desliga o limite (fonte local, sem rede).
+    """
+
+    def __init__(self, taxa: float = None, rajada: int = 1):
+        self.taxa = taxa
+        self.rajada = max(1, rajada)
+        self._fichas = float(self.rajada)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def por_minuto(cls, requisicoes: float, rajada: int = 1) -> "TokenBucket":
+        return cls(requisicoes / 60.0, rajada)
+
+    def _repor(self, agora: float):
+        self._fichas = min(self.rajada, self._fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def acquire(self, fichas: float = 1.0):
+        """Espera até poder gastar `fichas` e as consome"""
+        if self.taxa is None:
+            return
+
+        while True:
+            with self._lock:
+                self._repor(time.monotonic())
+                if self._fichas >= fichas:
+                    self._fichas -= fichas
+                    return
+                espera = (fichas - self._fichas) / self.taxa
+            time.sleep(espera)
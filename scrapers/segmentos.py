@@ -0,0 +1,324 @@
+# scrapers/segmentos.py
+import json
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, List
+import logging
+
+from .cnpj_db import DB, somente_leitura
+
+logger = logging.getLogger(__name__)
+
+# Definição declarativa de um segmento de empresas:
+# - incluir: palavras da razão social (LIKE '%palavra%'); uma tupla
+#   ('ESCOLA', 'INSTITUTO') inclui ESCOLA só quando não tem INSTITUTO
+# - excluir: palavras que tiram a empresa do segmento
+# - cnaes: prefixos de CNAE ('85' = toda a educação), principal ou secundário
+#   (tabela estabelecimento_cnae); um estabelecimento entra pela razão social OU
+#   pelo CNAE, e `excluir` vale para as duas
+# - ufs: restringe às UFs (vazio = Brasil todo)
+# - telefone: None (sem filtro), 'principal' (telefone 1 válido), 'qualquer'
+#   ou 'celular' (algum celular válido)
+# - apenas_matriz: só o estabelecimento 0001
+Segmento = namedtuple(
+    "Segmento", "incluir excluir cnaes ufs telefone apenas_matriz",
+    defaults=((), (), (), (), None, True)
+)
+
+_EDUCACAO = ('FACULDADE', 'UNIVERSIDADE', 'ESCOLA', 'COLEGIO', 'CURSO', 'IDIOMA')
+
+# CNAE 2.3: divisão 85 (educação), 8531/8532/8533 (graduação, pós e
+# profissionalizante de nível superior), 6821/6822 (intermediação e gestão de imóveis)
+_CNAE_EDUCACAO = ('85',)
+_CNAE_ENSINO_SUPERIOR = ('8531', '8532', '8533')
+_CNAE_IMOBILIARIAS = ('6821', '6822')
+
+SEGMENTOS: Dict[str, Segmento] = {
+    'imobiliarias': Segmento(incluir=('IMOBILI',), cnaes=_CNAE_IMOBILIARIAS),
+    'educacao': Segmento(incluir=('ESCOLA', 'COLEGIO', 'UNIVERSIDADE', 'FACULDADE', 'CURSO', 'ENSINO',
+                                  'EDUCACAO', 'IDIOMAS'), cnaes=_CNAE_EDUCACAO),
+    'educacao_cursos': Segmento(incluir=_EDUCACAO, cnaes=_CNAE_EDUCACAO, telefone='qualquer'),
+    'educacao_privada': Segmento(
+        incluir=_EDUCACAO,
+        excluir=('MUNICIPAL', 'ESTADUAL', 'PUBLICA', 'E.M.', 'E.E.', 'EMEF', 'EMEI', 'EMEIF',
+                 'PREFEITURA', 'GOVERNO', 'ESTADO DO', 'SECRETARIA'),
+        cnaes=_CNAE_EDUCACAO,
+        telefone='qualquer'
+    ),
+    'ensino_superior': Segmento(
+        incluir=('FACULDADE', 'UNIVERSIDADE', 'POLO', 'CENTRO UNIVERSITARIO', 'INSTITUTO', 'ENSINO SUPERIOR'),
+        cnaes=_CNAE_ENSINO_SUPERIOR,
+        telefone='principal'
+    ),
+    'instituicoes_ensino': Segmento(
+        incluir=('FACULDADE', 'UNIVERSIDADE', 'CENTRO UNIVERSITARIO', ('ESCOLA', 'INSTITUTO'),
+                 ('COLEGIO', 'INSTITUTO'), 'POLO EAD', 'POLO EDUCACIONAL', 'POLO UNIVERSITARIO',
+                 'ENSINO SUPERIOR', 'EDUCACAO SUPERIOR', 'UNOPAR', 'ANHANGUERA', 'ESTACIO',
+                 'UNICESUMAR', 'PITAGORAS'),
+        cnaes=_CNAE_EDUCACAO,
+        telefone='qualquer'
+    ),
+}
+
+# Colunas das tabelas materializadas (telefones já no formato 55 + DDD + número)
+COLUNAS = ("cnpj_completo", "cnpj_basico", "razao_social", "nome_fantasia", "telefone1", "telefone2",
+           "celular", "email", "municipio", "cidade", "uf", "cnae")
+
+# Sobe quando muda o SQL da materialização: força recalcular os segmentos
+VERSAO = 4
+
+# Telefones normalizados e flags vêm prontos da importação (build_cnpj_db.py)
+_REGRAS_TELEFONE = {
+    'principal': "es.telefone_1_e164 IS NOT NULL",
+    'qualquer': "es.tem_telefone = 1",
+    'celular': "es.tem_celular = 1",
+}
+
+def _tabela(nome: str) -> str:
+    if nome not in SEGMENTOS:
+        raise KeyError(f"Segmento desconhecido: {nome} (disponíveis: {', '.join(SEGMENTOS)})")
+    return f"segmento_{nome}"
+
+def _definicao(segmento: Segmento) -> str:
+    return json.dumps(dict(segmento._asdict(), versao=VERSAO), sort_keys=True, ensure_ascii=False)
+
+def _like(palavra: str) -> str:
+    return f"%{palavra.upper()}%"
+
+def _regras_incluir(incluir) -> List[tuple]:
+    """('ESCOLA', 'INSTITUTO') e 'FACULDADE' viram (palavra, exceções)"""
+    return [(r, ()) if isinstance(r, str) else (r[0], tuple(r[1:])) for r in incluir]
+
+class Segmentos:
+    """
+    Segmentos materializados no cnpj.db: cada segmento de SEGMENTOS vira uma
+    tabela pequena e indexada (segmento_<nome>), recalculada depois de cada
+    build. Exportações e importações para o Zoho leem dela em segundos, em vez
+    de varrer empresas x estabelecimentos com LIKE a cada execução.
+    """
+
+    @staticmethod
+    def _criar_meta(conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS segmentos (
+                nome TEXT PRIMARY KEY,
+                definicao TEXT,
+                linhas INTEGER,
+                atualizado_em TEXT
+            )
+        """)
+
+    @staticmethod
+    def desatualizados(conn: sqlite3.Connection) -> List[str]:
+        """Segmentos nunca materializados ou cuja definição mudou desde a última vez"""
+        Segmentos._criar_meta(conn)
+        salvos = dict(conn.execute("SELECT nome, definicao FROM segmentos"))
+        existentes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return [
+            nome for nome, seg in SEGMENTOS.items()
+            if salvos.get(nome) != _definicao(seg) or _tabela(nome) not in existentes
+        ]
+
+    @staticmethod
+    def _filtros(segmento: Segmento):
+        """WHERE comum (exclusões, UF, matriz, telefone) e seus parâmetros"""
+        where, params = [], []
+        for palavra in segmento.excluir:
+            where.append("e.razao_social NOT LIKE ?")
+            params.append(_like(palavra))
+        if segmento.ufs:
+            where.append(f"es.uf IN ({', '.join('?' * len(segmento.ufs))})")
+            params.extend(segmento.ufs)
+        if segmento.apenas_matriz:
+            where.append("es.cnpj_ordem = '0001'")
+        if segmento.telefone is not None:
+            if segmento.telefone not in _REGRAS_TELEFONE:
+                raise ValueError(f"Regra de telefone inválida: {segmento.telefone}")
+            where.append(_REGRAS_TELEFONE[segmento.telefone])
+        return where, params
+
+    @staticmethod
+    def _materializar_um(conn: sqlite3.Connection, nome: str) -> int:
+        segmento = SEGMENTOS[nome]
+        tabela = _tabela(nome)
+        cur = conn.cursor()
+
+        cur.execute(f"DROP TABLE IF EXISTS {tabela}")
+        cur.execute(f"""
+            CREATE TABLE {tabela} (
+                cnpj_completo TEXT PRIMARY KEY,
+                cnpj_basico TEXT,
+                razao_social TEXT,
+                nome_fantasia TEXT,
+                telefone1 TEXT,
+                telefone2 TEXT,
+                celular INTEGER,
+                email TEXT,
+                municipio TEXT,
+                cidade TEXT,
+                uf TEXT,
+                cnae TEXT
+            )
+        """)
+
+        # Nome da cidade já resolvido na importação (código TOM -> IBGE), sem join
+        select = f"""
+            INSERT OR IGNORE INTO {tabela} ({', '.join(COLUNAS)})
+            SELECT es.cnpj_completo, e.cnpj_basico, e.razao_social, es.nome_fantasia,
+                   IFNULL(es.telefone_1_e164, ''), IFNULL(es.telefone_2_e164, ''), es.tem_celular,
+                   es.email, es.municipio, es.cidade, es.uf, es.cnae_fiscal_principal
+        """
+        where, params = Segmentos._filtros(segmento)
+
+        # Pela razão social: só as candidatas da varredura única de materializar().
+        # CROSS JOIN + INDEXED BY fixam o plano (candidatas por fora, busca por CNPJ
+        # básico por dentro); sem estatísticas o SQLite prefere idx_estab_contato
+        # pelo cnpj_ordem, que não filtra quase nada
+        regras = _regras_incluir(segmento.incluir)
+        if regras:
+            alternativas, params_inc = [], []
+            for palavra, excecoes in regras:
+                alternativas.append(" AND ".join(
+                    ["e.razao_social LIKE ?"] + ["e.razao_social NOT LIKE ?"] * len(excecoes)
+                ))
+                params_inc += [_like(palavra)] + [_like(x) for x in excecoes]
+            cur.execute(f"""
+                {select}
+                FROM segmento_candidatos e
+                CROSS JOIN estabelecimentos es INDEXED BY idx_estab_cnpj_basico
+                    ON es.cnpj_basico = e.cnpj_basico
+                WHERE ({' OR '.join(f'({a})' for a in alternativas)})
+                {''.join(f' AND {w}' for w in where)}
+            """, params_inc + params)
+
+        # Pelo CNAE, principal ou secundário: estabelecimento_cnae tem uma linha por
+        # CNAE (a do principal com principal = 1). Prefixo como faixa, para usar
+        # idx_estabelecimento_cnae_cnae (LIKE 'x%' não usa índice com a collation
+        # padrão); o mesmo estabelecimento em dois CNAEs cai no INSERT OR IGNORE
+        for cnae in segmento.cnaes:
+            cur.execute(f"""
+                {select}
+                FROM estabelecimento_cnae ec INDEXED BY idx_estabelecimento_cnae_cnae
+                CROSS JOIN estabelecimentos es ON es.cnpj_completo = ec.cnpj_completo
+                JOIN empresas e ON e.cnpj_basico = es.cnpj_basico
+                WHERE ec.cnae >= ? AND ec.cnae < ?
+                {''.join(f' AND {w}' for w in where)}
+            """, [cnae, cnae[:-1] + chr(ord(cnae[-1]) + 1)] + params)
+
+        cur.execute(f"CREATE INDEX idx_{tabela}_uf_cidade ON {tabela}(uf, cidade)")
+        linhas = cur.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+        cur.execute("""
+            INSERT OR REPLACE INTO segmentos (nome, definicao, linhas, atualizado_em)
+            VALUES (?, ?, ?, datetime('now'))
+        """, (nome, _definicao(segmento), linhas))
+        return linhas
+
+    @staticmethod
+    def materializar(conn: sqlite3.Connection, nomes: Iterable[str] = None) -> Dict[str, int]:
+        """
+        (Re)cria as tabelas dos segmentos (todos, por padrão). A tabela empresas
+        é varrida uma única vez, com as palavras de todos os segmentos pedidos;
+        cada segmento filtra depois só essas candidatas. Retorna {nome: linhas}.
+        """
+        nomes = list(SEGMENTOS) if nomes is None else list(nomes)
+        for nome in nomes:
+            _tabela(nome)
+        if not nomes:
+            return {}
+
+        if conn.in_transaction:
+            conn.commit()
+        Segmentos._criar_meta(conn)
+
+        palavras = sorted({p for nome in nomes for p, _ in _regras_incluir(SEGMENTOS[nome].incluir)})
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            cur.execute("DROP TABLE IF EXISTS temp.segmento_candidatos")
+            cur.execute(f"""
+                CREATE TEMP TABLE segmento_candidatos AS
+                SELECT cnpj_basico, razao_social FROM empresas
+                WHERE {' OR '.join(['razao_social LIKE ?'] * len(palavras)) or '0'}
+            """, [_like(p) for p in palavras])
+
+            linhas = {}
+            for nome in nomes:
+                linhas[nome] = Segmentos._materializar_um(conn, nome)
+                logger.info(f"  📂 Segmento {nome}: {linhas[nome]:,} estabelecimentos")
+
+            cur.execute("DROP TABLE temp.segmento_candidatos")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return linhas
+
+    @staticmethod
+    def atualizar(conn: sqlite3.Connection, tudo: bool = False) -> Dict[str, int]:
+        """Materializa tudo (após carga de dados) ou só os segmentos desatualizados"""
+        nomes = list(SEGMENTOS) if tudo else Segmentos.desatualizados(conn)
+        if conn.in_transaction:
+            conn.commit()
+        return Segmentos.materializar(conn, nomes)
+
+    @staticmethod
+    def preparar(db_path: Path = DB, nomes: Iterable[str] = None) -> Dict[str, int]:
+        """
+        Materializa os segmentos desatualizados (todos, por padrão) numa conexão
+        de escrita curta. Chamar antes de abrir o banco em modo snapshot
+        (cnpj_db.conectar), que é só leitura.
+        """
+        nomes = list(SEGMENTOS) if nomes is None else list(nomes)
+        conn = sqlite3.connect(Path(db_path).as_posix())
+        try:
+            pendentes = [n for n in Segmentos.desatualizados(conn) if n in nomes]
+            if pendentes:
+                logger.info(f"📂 Materializando segmentos: {', '.join(pendentes)}...")
+            return Segmentos.materializar(conn, pendentes)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def consultar(conn: sqlite3.Connection, nome: str, colunas: Iterable[str] = COLUNAS,
+                  ufs: Iterable[str] = None, telefone: str = None, limite: int = None) -> sqlite3.Cursor:
+        """
+        Cursor com as `colunas` do segmento, ordenado por UF e cidade.
+        `telefone` ('principal', 'qualquer' ou 'celular') filtra além da regra do próprio
+        segmento. Materializa o segmento na hora se ele ainda não existir.
+        """
+        tabela = _tabela(nome)
+        colunas = list(colunas)
+        desconhecidas = set(colunas) - set(COLUNAS)
+        if desconhecidas:
+            raise ValueError(f"Colunas inválidas: {', '.join(sorted(desconhecidas))}")
+
+        if nome in Segmentos.desatualizados(conn):
+            if somente_leitura(conn):
+                raise RuntimeError(f"Segmento {nome} desatualizado numa conexão só de leitura: "
+                                   f"chame Segmentos.preparar() antes de abrir o snapshot")
+            logger.info(f"📂 Materializando segmento {nome}...")
+            Segmentos.materializar(conn, [nome])
+
+        where, params = [], []
+        if ufs:
+            ufs = list(ufs)
+            where.append(f"uf IN ({', '.join('?' * len(ufs))})")
+            params.extend(ufs)
+        if telefone == 'principal':
+            where.append("telefone1 <> ''")
+        elif telefone == 'qualquer':
+            where.append("(telefone1 <> '' OR telefone2 <> '')")
+        elif telefone == 'celular':
+            where.append("celular = 1")
+        elif telefone is not None:
+            raise ValueError(f"Regra de telefone inválida: {telefone}")
+
+        sql = f"SELECT {', '.join(colunas)} FROM {tabela}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY uf, cidade"
+        if limite:
+            sql += " LIMIT ?"
+            params.append(limite)
+        return conn.execute(sql, params)
@@ -0,0 +1,129 @@
+# scrapers/similaridade.py
+import re
+import unicodedata
+from collections import namedtuple
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Sufixos/formas jurídicas que não ajudam a distinguir empresas
+SUFIXOS_LEGAIS = {
+    'LTDA', 'LIMITADA', 'ME', 'EPP', 'EIRELI', 'MEI', 'EI', 'SA', 'CIA', 'COMPANHIA',
+    'SS', 'SLU', 'SOCIEDADE', 'UNIPESSOAL', 'EMPRESARIA', 'EMPRESARIAL',
+}
+
+STOPWORDS = {'DE', 'DA', 'DO', 'DAS', 'DOS', 'E', 'EM', 'A', 'O', 'AS', 'OS', 'THE'}
+
+# Palavras do segmento: aparecem em metade dos nomes, pesam pouco no match.
+# Só são descartadas se sobrar algum outro termo.
+PALAVRAS_GENERICAS = {
+    'IMOBILIARIA', 'IMOBILIARIAS', 'IMOVEIS', 'IMOBILIARIO', 'IMOBILIARIOS', 'NEGOCIOS',
+    'CORRETORA', 'CORRETOR', 'CORRETORES', 'EMPREENDIMENTOS', 'ADMINISTRACAO', 'ADMINISTRADORA',
+    'COMERCIO', 'SERVICOS', 'CONSULTORIA', 'ASSESSORIA', 'GRUPO',
+}
+
+_NAO_ALFANUM = re.compile(r'[^A-Z0-9 ]+')
+
+def _tabela_sem_acento() -> dict:
+    """Letra acentuada -> letra base (NFKD sem os diacríticos) e diacrítico solto -> '', para str.translate"""
+    tabela = {i: '' for i in range(0x300, 0x10000) if unicodedata.combining(chr(i))}
+    for c in (chr(i) for faixa in (range(0x80, 0x300), range(0x1E00, 0x1F00)) for i in faixa):
+        base = ''.join(d for d in unicodedata.normalize('NFKD', c) if not unicodedata.combining(d))
+        if base != c:
+            tabela[ord(c)] = base
+    return tabela
+
+# Tabela pronta: um translate por nome em vez de NFKD + filtro caractere a caractere
+_SEM_ACENTO = _tabela_sem_acento()
+
+_DESCARTADOS = SUFIXOS_LEGAIS | STOPWORDS
+
+def _normalizar(nome: str) -> str:
+    nome = nome or ''
+    if not nome.isascii():  # nomes do dump já vêm sem acento: pula o translate
+        nome = nome.translate(_SEM_ACENTO)
+    nome = nome.upper().replace('S/A', ' SA ').replace('S.A.', ' SA ').replace('&', ' E ')
+    if not (nome.isascii() and nome.replace(' ', '').isalnum()):
+        nome = _NAO_ALFANUM.sub(' ', nome)
+    return ' '.join(nome.split())
+
+@lru_cache(maxsize=200_000)
+def normalizar_nome(nome: str) -> str:
+    """Maiúsculas, sem acentos e sem pontuação ("Imobiliária São José Ltda." -> "IMOBILIARIA SAO JOSE LTDA")"""
+    return _normalizar(nome)
+
+# Termos e trigramas de um nome: o que os scorers comparam
+Assinatura = namedtuple("Assinatura", "tokens trigramas")
+
+def calcular_assinatura(nome: str) -> Assinatura:
+    """
+    Termos e trigramas do nome, sem cache: para nomes vistos uma vez só, como
+    as linhas candidatas da busca (calcule uma vez por linha e use score_assinaturas).
+    Guardar milhares de sets que não voltam só faz o coletor de lixo trabalhar.
+    """
+    termos = [t for t in _normalizar(nome).split() if t not in _DESCARTADOS]
+    especificos = [t for t in termos if t not in PALAVRAS_GENERICAS]
+    termos = frozenset(especificos or termos)
+    texto = ' ' + ' '.join(sorted(termos)) + ' '
+    return Assinatura(termos, frozenset([texto[i:i + 3] for i in range(len(texto) - 2)]))
+
+@lru_cache(maxsize=200_000)
+def assinatura(nome: str) -> Assinatura:
+    """calcular_assinatura com cache, para nomes que se repetem (o lead, comparado com cada candidato)"""
+    return calcular_assinatura(nome)
+
+def tokens(nome: str) -> frozenset:
+    """Termos significativos do nome (sem sufixo jurídico, stopwords nem palavras genéricas)"""
+    return assinatura(nome).tokens
+
+def trigramas(nome: str) -> frozenset:
+    """Trigramas dos termos significativos (tolerante a erro de digitação)"""
+    return assinatura(nome).trigramas
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+class SequenceMatcherScorer:
+    """Scorer antigo (difflib), mantido para comparação"""
+    nome = 'sequencematcher'
+
+    def score(self, a: str, b: str) -> float:
+        return SequenceMatcher(None, a.upper(), b.upper()).ratio()
+
+class TokenSetScorer:
+    """Jaccard dos conjuntos de termos normalizados"""
+    nome = 'token_set'
+
+    def score(self, a: str, b: str) -> float:
+        return self.score_assinaturas(assinatura(a), assinatura(b))
+
+    def score_assinaturas(self, a: Assinatura, b: Assinatura) -> float:
+        return jaccard(a.tokens, b.tokens)
+
+class TrigramScorer:
+    """Jaccard dos trigramas dos termos normalizados"""
+    nome = 'trigram'
+
+    def score(self, a: str, b: str) -> float:
+        return self.score_assinaturas(assinatura(a), assinatura(b))
+
+    def score_assinaturas(self, a: Assinatura, b: Assinatura) -> float:
+        return jaccard(a.trigramas, b.trigramas)
+
+class HybridScorer:
+    """Maior entre termos e trigramas: termos iguais decidem, erro de digitação não zera o score"""
+    nome = 'hybrid'
+
+    def score(self, a: str, b: str) -> float:
+        return self.score_assinaturas(assinatura(a), assinatura(b))
+
+    def score_assinaturas(self, a: Assinatura, b: Assinatura) -> float:
+        if a.tokens == b.tokens and a.tokens:
+            return 1.0
+        return max(jaccard(a.tokens, b.tokens), jaccard(a.trigramas, b.trigramas))
+
+SCORERS = {
+    s.nome: s for s in (SequenceMatcherScorer(), TokenSetScorer(), TrigramScorer(), HybridScorer())
+}
@@ -0,0 +1,42 @@
+# scrapers/telefones.py
+import re
+from typing import Optional
+
+_NAO_DIGITO = re.compile(r'\D')
+
+# DDDs em uso no Brasil (Anatel)
+DDDS = frozenset({
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28, 31, 32, 33, 34, 35, 37, 38,
+    41, 42, 43, 44, 45, 46, 47, 48, 49, 51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67, 68, 69,
+    71, 73, 74, 75, 77, 79, 81, 82, 83, 84, 85, 86, 87, 88, 89,
+    91, 92, 93, 94, 95, 96, 97, 98, 99,
+})
+
+def normalizar_telefone(ddd: str, numero: str) -> Optional[str]:
+    """
+    Telefone no formato E.164 só com dígitos ("83", "9988-7766" -> "5583999887766"),
+    ou None se inválido. Celulares antigos de 8 dígitos (começando com 6-9)
+    ganham o nono dígito; fixos têm 8 dígitos começando com 2-5.
+    """
+    ddd = _NAO_DIGITO.sub('', ddd or '').lstrip('0')
+    numero = _NAO_DIGITO.sub('', numero or '')
+
+    # DDD às vezes vem junto do número (campo DDD vazio)
+    if not ddd and len(numero) in (10, 11):
+        ddd, numero = numero[:2], numero[2:]
+
+    if len(ddd) != 2 or int(ddd) not in DDDS:
+        return None
+
+    if len(numero) == 9 and numero[0] == '9':
+        pass
+    elif len(numero) == 8 and numero[0] in '6789':
+        numero = '9' + numero
+    elif not (len(numero) == 8 and numero[0] in '2345'):
+        return None
+
+    return f"55{ddd}{numero}"
+
+def eh_celular(telefone: Optional[str]) -> bool:
+    """True para celular normalizado (55 + DDD + 9 dígitos)"""
+    return bool(telefone) and len(telefone) == 13
@@ -2,53 +2,41 @@
 import sys
 sys.path.append('.')
 
-import sqlite3
-from pathlib import Path
+from sqlalchemy import func, text
 from database.database import SessionLocal
 from database.models import Lead
+from scrapers.municipios import Municipios
 
 print("🗺️ Atualizando cidades dos leads...\n")
 
-# Conecta nos dois bancos
-cnpj_db = sqlite3.connect(Path("data/cnpj.db"))
 prospector_db = SessionLocal()
 
-# Busca todos os leads
-leads = prospector_db.query(Lead).all()
-
-print(f"📊 {len(leads)} leads encontrados\n")
-
-atualizados = 0
-nao_encontrados = 0
-
-for lead in leads:
-    if not lead.cidade or len(lead.cidade) > 10:  # Já tem nome ou inválido
-        continue
-    
-    # Busca nome da cidade no banco CNPJ
-    cur = cnpj_db.cursor()
-    cur.execute("""
-        SELECT nome FROM municipios 
-        WHERE codigo_ibge = ?
-    """, (lead.cidade,))
-    
-    result = cur.fetchone()
-    
-    if result:
-        nome_cidade = result[0]
-        lead.cidade = nome_cidade
-        atualizados += 1
-        
-        if atualizados % 1000 == 0:
-            print(f"  ✅ {atualizados:,} cidades atualizadas...")
-            prospector_db.commit()
-    else:
-        nao_encontrados += 1
-
+# Leads com código de município no lugar do nome (TOM da Receita ou IBGE),
+# agrupados: cada código distinto é resolvido uma vez só
+grupos = prospector_db.query(Lead.cidade, Lead.estado, func.count()).group_by(Lead.cidade, Lead.estado).all()
+grupos = [(cidade, estado or "", n) for cidade, estado, n in grupos if cidade and cidade.strip().isdigit()]
+
+print(f"📊 {sum(n for _, _, n in grupos):,} leads com código de cidade ({len(grupos):,} códigos distintos)\n")
+
+# Resolução em memória (tabela IBGE empacotada + Municipios.zip da Receita)
+resolvidos = Municipios.resolver_lote((cidade, estado) for cidade, estado, _ in grupos)
+
+# Um único UPDATE em lote (executemany), em uma transação
+parametros = [
+    {"nome": m.nome, "codigo": cidade, "uf": estado}
+    for (cidade, estado), m in resolvidos.items()
+]
+if parametros:
+    prospector_db.execute(
+        text("UPDATE leads SET cidade = :nome WHERE cidade = :codigo AND COALESCE(estado, '') = :uf"),
+        parametros
+    )
 prospector_db.commit()
 prospector_db.close()
-cnpj_db.close()
+
+atualizados = sum(n for cidade, estado, n in grupos if (cidade, estado) in resolvidos)
+nao_encontrados = sum(n for _, _, n in grupos) - atualizados
 
 print(f"\n✅ Atualização concluída!")
 print(f"   Atualizados: {atualizados:,}")
-print(f"   Não encontrados: {nao_encontrados:,}")
\ No newline at end of file
+print(f"   Não encontrados: {nao_encontrados:,}")
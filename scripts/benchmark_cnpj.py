@@ -0,0 +1,57 @@
+# scripts/benchmark_cnpj.py
+import sys
+sys.path.append('.')
+
+import random
+import time
+from scrapers.cnpj_utils import calcular_dv, validar, validar_vetorizado, gerar_dv_vetorizado, melhor_cnpj
+
+N = 200_000
+
+random.seed(42)
+bases = [f"{random.randrange(10**8):08d}{random.choice(['0001', '0002', '0015']):s}" for _ in range(N)]
+validos = [b + calcular_dv(b) for b in bases]
+# Metade com o último dígito trocado
+cnpjs = [c if i % 2 else c[:13] + str((int(c[13]) + 1) % 10) for i, c in enumerate(validos)]
+
+print(f"🔢 Benchmark de validação de CNPJ ({N:,} CNPJs, metade inválidos)\n")
+
+inicio = time.perf_counter()
+esperado = [validar(c) for c in cnpjs]
+decorrido_py = time.perf_counter() - inicio
+print(f"  {'python':12s} {N / decorrido_py:>12,.0f} CNPJs/s")
+
+def melhor_tempo(funcao, *args, repeticoes: int = 5):
+    """Menor tempo de `repeticoes` execuções (a entrada é a lista de str, conversão incluída)"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, min(tempos)
+
+resultado, decorrido_np = melhor_tempo(validar_vetorizado, cnpjs)
+print(f"  {'numpy':12s} {N / decorrido_np:>12,.0f} CNPJs/s  ({decorrido_py / decorrido_np:.0f}x)")
+assert resultado.tolist() == esperado, "validar_vetorizado diverge de validar"
+
+# Entrada com uma string fora do padrão (acento): cai na conversão para array unicode
+resultado, decorrido_lento = melhor_tempo(validar_vetorizado, cnpjs[:-1] + ["Ç" * 14])
+print(f"  {'numpy (U)':12s} {N / decorrido_lento:>12,.0f} CNPJs/s  (conversão unicode, sem o buffer de bytes)")
+assert resultado[:-1].tolist() == esperado[:-1] and not resultado[-1]
+
+inicio = time.perf_counter()
+esperado_dv = [calcular_dv(b) for b in bases]
+decorrido_py = time.perf_counter() - inicio
+resultado, decorrido_np = melhor_tempo(gerar_dv_vetorizado, bases)
+print(f"\n  {'DV python':12s} {N / decorrido_py:>12,.0f} bases/s")
+print(f"  {'DV numpy':12s} {N / decorrido_np:>12,.0f} bases/s  ({decorrido_py / decorrido_np:.0f}x)")
+assert resultado.tolist() == esperado_dv, "gerar_dv_vetorizado diverge de calcular_dv"
+
+# Extração: página de ~50KB com telefones, CEPs e CNPJs de filial antes do CNPJ do rodapé
+ruido = " ".join(f"Tel (83) 9{random.randrange(10**8):08d} CEP 58{random.randrange(10**6):06d}" for _ in range(1000))
+pagina = f"{ruido} filial {validos[2][:8]}.0002 {ruido} Razão Social LTDA - CNPJ/MF nº {validos[1]}"
+inicio = time.perf_counter()
+for _ in range(200):
+    cnpj = melhor_cnpj(pagina)
+decorrido = time.perf_counter() - inicio
+print(f"\n  extração     {200 / decorrido:>12,.0f} páginas/s ({len(pagina) / 1024:.0f}KB) -> {cnpj}")
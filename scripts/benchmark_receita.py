@@ -0,0 +1,55 @@
+# scripts/benchmark_receita.py
+import sys
+sys.path.append('.')
+
+import time
+import numpy as np
+import pandas as pd
+from scrapers.processar_receita_federal import ProcessadorReceitaFederal
+
+# Pós-processamento de processar_estabelecimentos: antes (apply por linha) x depois (vetorizado)
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+print(f"⏱️ Benchmark do pós-processamento com {N:,} linhas...\n")
+
+rng = np.random.default_rng(42)
+# ~5% de linhas repetidas (o mesmo arquivo aparecendo duas vezes)
+basico = pd.Series(rng.permutation(N)).astype(str).str.zfill(8)
+basico.iloc[: N // 20] = basico.iloc[N // 20 : 2 * (N // 20)].values
+df = pd.DataFrame({
+    'cnpj_basico': basico,
+    'cnpj_ordem': '0001',
+    'cnpj_dv': basico.str[-2:],
+    'situacao_cadastral': basico.map(lambda b: ['02', '08', '04'][int(b) % 3]),
+    'ddd_1': pd.Series(rng.choice(['83', '11', None], N), dtype=object),
+    'telefone_1': pd.Series(rng.choice(['33334444', '999887766', None], N), dtype=object),
+})
+
+def antes(df):
+    df = df.drop_duplicates(subset=['cnpj_basico', 'cnpj_ordem', 'cnpj_dv'])
+    df = df.copy()
+    df['cnpj'] = df['cnpj_basico'] + df['cnpj_ordem'] + df['cnpj_dv']
+    df['telefone'] = df.apply(
+        lambda x: f"55{x['ddd_1']}{x['telefone_1']}"
+        if pd.notna(x['ddd_1']) and pd.notna(x['telefone_1'])
+        else None,
+        axis=1
+    )
+    return df[df['situacao_cadastral'] == '02']
+
+def depois(df):
+    df = df[df['situacao_cadastral'] == '02'].copy()
+    df = ProcessadorReceitaFederal._formatar(df)
+    return df.drop_duplicates(subset=['cnpj'])
+
+resultados = {}
+for nome, func in [('antes (apply)', antes), ('depois (vetorizado)', depois)]:
+    inicio = time.perf_counter()
+    out = func(df)
+    decorrido = time.perf_counter() - inicio
+    resultados[nome] = out
+    print(f"  {nome:22s} {decorrido:8.2f}s  {N / decorrido:>14,.0f} linhas/s  ({len(out):,} linhas)")
+
+a, b = resultados['antes (apply)'], resultados['depois (vetorizado)']
+iguais = set(a['cnpj']) == set(b['cnpj'])
+print(f"\n✅ Mesmos CNPJs nos dois caminhos: {iguais}")
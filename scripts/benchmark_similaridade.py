@@ -0,0 +1,116 @@
+# scripts/benchmark_similaridade.py
+import sys
+sys.path.append('.')
+
+import random
+import time
+from scrapers.similaridade import SCORERS, normalizar_nome, assinatura, calcular_assinatura
+
+# Amostra rotulada: (nome no Google Maps, candidatos do FTS, razão social correta ou None)
+AMOSTRA = [
+    ("Shalom Imóveis", ["SHALOM IMOVEIS LTDA", "SHALOM COMERCIO DE ALIMENTOS LTDA", "IMOVEIS SHALOM E CIA LTDA ME"], "SHALOM IMOVEIS LTDA"),
+    ("Imobiliária São José", ["IMOBILIARIA SAO JOSE LTDA", "SAO JOSE MATERIAIS DE CONSTRUCAO LTDA", "IMOBILIARIA SAO JORGE LTDA"], "IMOBILIARIA SAO JOSE LTDA"),
+    ("Investlar Negócios Imobiliários", ["INVESTLAR NEGOCIOS IMOBILIARIOS LTDA", "INVESTCAR VEICULOS LTDA", "LAR NEGOCIOS IMOBILIARIOS LTDA"], "INVESTLAR NEGOCIOS IMOBILIARIOS LTDA"),
+    ("Prime Imóveis", ["PRIME NEGOCIOS IMOBILIARIOS LTDA", "PRIME COMERCIO DE ROUPAS EIRELI", "PRIMO IMOVEIS LTDA"], "PRIME NEGOCIOS IMOBILIARIOS LTDA"),
+    ("Imobiliaria Borborema", ["IMOBILIARIA BORBOREMA LTDA ME", "BORBOREMA MOTOS LTDA", "IMOBILIARIA BOA VISTA LTDA"], "IMOBILIARIA BORBOREMA LTDA ME"),
+    ("Colégio Alfa", ["COLEGIO ALFA LTDA", "ALFA COMERCIO DE PECAS LTDA", "COLEGIO ALFA E OMEGA LTDA"], "COLEGIO ALFA LTDA"),
+    ("Escola Pequeno Príncipe", ["ESCOLA PEQUENO PRINCIPE LTDA ME", "PEQUENO PRINCIPE MODAS LTDA", "ESCOLA PEQUENOS PASSOS LTDA"], "ESCOLA PEQUENO PRINCIPE LTDA ME"),
+    ("Faculdade Maurício de Nassau", ["FACULDADE MAURICIO DE NASSAU LTDA", "NASSAU EDITORA LTDA", "FACULDADE MAURICIO LTDA"], "FACULDADE MAURICIO DE NASSAU LTDA"),
+    ("CCAA Idiomas", ["CCAA CURSO DE IDIOMAS LTDA", "CCAA MODAS LTDA", "IDIOMAS ALPHA LTDA"], "CCAA CURSO DE IDIOMAS LTDA"),
+    ("Imobiliária Cidade Jardim", ["IMOBILIARIA CIDADE JARDIM S/A", "JARDIM FLORES LTDA", "IMOBILIARIA CIDADE NOVA LTDA"], "IMOBILIARIA CIDADE JARDIM S/A"),
+    ("Roberto Corretor de Imóveis", ["ROBERTO SILVA CORRETOR DE IMOVEIS ME", "ROBERTO AUTO PECAS LTDA", "CORRETORA ROBERTA LTDA"], "ROBERTO SILVA CORRETOR DE IMOVEIS ME"),
+    ("Lopes Consultoria de Imóveis", ["LOPES CONSULTORIA DE IMOVEIS S.A.", "LOPES E LOPES ADVOGADOS", "LOPEZ IMOVEIS LTDA"], "LOPES CONSULTORIA DE IMOVEIS S.A."),
+    ("Imobiliaria Nordest", ["IMOBILIARIA NORDESTE LTDA", "NORDESTE TRANSPORTES LTDA", "IMOBILIARIA NORTE LTDA"], "IMOBILIARIA NORDESTE LTDA"),
+    ("Imoveis Campina", ["CAMPINA IMOVEIS EIRELI", "CAMPINA GRANDE ALIMENTOS LTDA", "IMOVEIS CAMPINAS LTDA"], "CAMPINA IMOVEIS EIRELI"),
+    ("Colegio Motiva", ["MOTIVA EDUCACIONAL LTDA", "COLEGIO MOTIVA LTDA", "MOTIVA TINTAS LTDA"], "COLEGIO MOTIVA LTDA"),
+    ("Padaria Central", ["IMOBILIARIA CENTRAL LTDA", "CENTRAL DE IMOVEIS LTDA"], None),
+    ("Barbearia do Zé", ["ZE IMOVEIS LTDA", "IMOBILIARIA DO ZE LTDA"], None),
+    ("Academia Fitness Top", ["TOP IMOVEIS LTDA", "IMOBILIARIA TOPAZIO LTDA"], None),
+]
+
+MINIMO = 0.6
+PARES_THROUGHPUT = 20_000
+CANDIDATOS_POR_LEAD = 20  # limit do melhor_match
+REPETICOES = 3  # melhor de N: a máquina compartilhada oscila bastante
+
+def pares_sinteticos(n: int, semente: int = 42) -> list:
+    """
+    `n` pares (nome do Maps, candidato), CANDIDATOS_POR_LEAD por lead, como o
+    melhor_match compara cada lead com os candidatos do FTS. Leads e candidatos
+    são todos diferentes entre si: repetir a amostra mediria só acertos do
+    lru_cache. O candidato é o nome do lead com um erro de digitação ou um
+    termo a mais, como vem do FTS.
+    """
+    rnd = random.Random(semente)
+    silabas = ["BA", "CE", "DI", "FO", "GU", "LA", "ME", "NI", "PO", "RU", "SA", "TE", "VI", "ZO", "MAR", "SOL", "NOR", "TRI"]
+    genericos = ["IMOVEIS", "IMOBILIARIA", "NEGOCIOS", "CONSULTORIA", "COLEGIO", "ESCOLA"]
+    sufixos = ["LTDA", "ME", "EIRELI", "S/A", ""]
+
+    vistos, pares = set(), []
+    while len(pares) < n:
+        termos = ["".join(rnd.choice(silabas) for _ in range(rnd.randint(2, 4))) for _ in range(rnd.randint(1, 3))]
+        nome = " ".join(termos + [rnd.choice(genericos)]).title()
+        if nome in vistos:
+            continue
+        vistos.add(nome)
+
+        candidatos = 0
+        while candidatos < CANDIDATOS_POR_LEAD and len(pares) < n:
+            candidato = list(termos)
+            i = rnd.randrange(len(candidato))
+            if rnd.random() < 0.5:
+                candidato[i] = candidato[i][:-1] + rnd.choice("XYZW")
+            else:
+                candidato.append("".join(rnd.choice(silabas) for _ in range(3)))
+            candidato = " ".join([rnd.choice(genericos)] + candidato + [rnd.choice(sufixos)]).strip()
+            if candidato in vistos:
+                continue
+            vistos.add(candidato)
+            pares.append((nome, candidato))
+            candidatos += 1
+    return pares
+
+def medir(scorer, pares: list) -> float:
+    inicio = time.perf_counter()
+    for a, b in pares:
+        scorer.score(a, b)
+    return len(pares) / (time.perf_counter() - inicio)
+
+def medir_busca(scorer, pares: list) -> float:
+    """Como o LocalCNPJSearch._pontuar: assinatura do lead em cache, a da linha candidata calculada uma vez"""
+    inicio = time.perf_counter()
+    for a, b in pares:
+        scorer.score_assinaturas(assinatura(a), calcular_assinatura(b))
+    return len(pares) / (time.perf_counter() - inicio)
+
+def frio(medicao, scorer, pares: list) -> float:
+    """Melhor de REPETICOES medições com os caches limpos"""
+    taxas = []
+    for _ in range(REPETICOES):
+        for cache in (normalizar_nome, assinatura):
+            cache.cache_clear()
+        taxas.append(medicao(scorer, pares))
+    return max(taxas)
+
+print(f"🎯 Benchmark de similaridade ({len(AMOSTRA)} exemplos rotulados)\n")
+
+pares = pares_sinteticos(PARES_THROUGHPUT)
+
+for nome, scorer in SCORERS.items():
+    acertos = 0
+    for consulta, candidatos, correto in AMOSTRA:
+        scores = [(scorer.score(consulta, c), c) for c in candidatos]
+        melhor_score, melhor = max(scores)
+        escolhido = melhor if melhor_score >= MINIMO else None
+        acertos += escolhido == correto
+
+    # Throughput em pares únicos: frio (caches limpos, cada nome visto pela
+    # primeira vez, como num lote novo de leads), quente (os mesmos pares de novo)
+    # e busca (frio, do jeito que o LocalCNPJSearch pontua as linhas candidatas)
+    taxa_fria = frio(medir, scorer, pares)
+    quente = medir(scorer, pares)
+    busca = frio(medir_busca, scorer, pares) if hasattr(scorer, "score_assinaturas") else None
+
+    print(f"  {nome:16s} acurácia {acertos}/{len(AMOSTRA)} ({acertos / len(AMOSTRA) * 100:5.1f}%)"
+          f"  frio {taxa_fria:>10,.0f} candidatos/s  quente {quente:>10,.0f} candidatos/s"
+          + (f"  busca (frio) {busca:>10,.0f} candidatos/s" if busca else ""))
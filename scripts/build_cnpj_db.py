@@ -1,12 +1,82 @@
-import os, re, csv, sqlite3, zipfile
+import os, re, csv, sqlite3, zipfile, time, argparse, queue, hashlib, shutil, sys
+sys.path.append('.')
+
+import multiprocessing as mp
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
 from pathlib import Path
 import logging
+from scrapers.similaridade import normalizar_nome
+from scrapers.segmentos import Segmentos
+from scrapers.telefones import normalizar_telefone, eh_celular
+from scrapers.municipios import Municipios
+from scrapers import cnpj_db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DB_PATH = Path("data/cnpj.db")
 DATA_DIR = Path("data/receita")
+PARQUET_DIR = Path("data/parquet")
+BATCH_SIZE = 100_000
+QUEUE_SIZE = 8  # lotes em trânsito entre parsers e writer (limita a memória)
+
+COLUNAS_EMPRESA = (
+    "cnpj_basico", "razao_social", "natureza_juridica", "capital_social", "porte",
+)
+
+COLUNAS_ESTABELECIMENTO = (
+    "cnpj_completo", "cnpj_basico", "cnpj_ordem", "cnpj_dv", "matriz_filial", "nome_fantasia",
+    "situacao_cadastral", "data_situacao_cadastral", "tipo_logradouro", "logradouro", "numero",
+    "complemento", "bairro", "cep", "uf", "municipio", "ddd_1", "telefone_1", "ddd_2", "telefone_2", "email",
+    "cnae_fiscal_principal", "cnae_fiscal_secundaria",
+    "telefone_1_e164", "telefone_2_e164", "tem_telefone", "tem_celular", "codigo_ibge", "cidade",
+)
+
+# Colunas derivadas dos telefones, calculadas na importação (ver parse_estabelecimento)
+COLUNAS_TELEFONE = {
+    "telefone_1_e164": "TEXT", "telefone_2_e164": "TEXT", "tem_telefone": "INTEGER", "tem_celular": "INTEGER",
+}
+
+# idx_estab_contato (ver create_indexes)
+COLUNAS_IDX_CONTATO = ("cnpj_ordem", "uf", "tem_celular", "tem_telefone")
+
+# Município resolvido na importação (o campo municipio da Receita é o código TOM)
+COLUNAS_MUNICIPIO = {"codigo_ibge": "TEXT", "cidade": "TEXT"}
+
+# id_socio = cnpj_basico|documento|nome: o dump não tem chave própria para sócios
+COLUNAS_SOCIO = (
+    "id_socio", "cnpj_basico", "identificador_socio", "nome_socio", "cnpj_cpf_socio",
+    "qualificacao_socio", "data_entrada_sociedade", "pais", "representante_legal",
+    "nome_representante", "qualificacao_representante", "faixa_etaria",
+)
+
+# Fingerprint da linha e zip de origem, anexados a toda tupla lida (ver iter_batches_zip):
+# qualquer carga (bulk, --fresh, paralela) grava o que o --incremental compara
+COLUNAS_CONTROLE = ("fp", "origem")
+
+def sql_insert(tabela: str, colunas) -> str:
+    """Monta o INSERT OR REPLACE de uma tabela (as linhas lidas dos zips trazem fp e origem no fim)"""
+    return f"""
+    INSERT OR REPLACE INTO {tabela}
+    ({", ".join(colunas + COLUNAS_CONTROLE)})
+    VALUES ({", ".join("?" * (len(colunas) + len(COLUNAS_CONTROLE)))})
+"""
+
+SQL_EMPRESA = sql_insert("empresas", COLUNAS_EMPRESA)
+SQL_ESTABELECIMENTO = sql_insert("estabelecimentos", COLUNAS_ESTABELECIMENTO)
+SQL_SOCIO = sql_insert("socios", COLUNAS_SOCIO)
+
+# Índice trigram de nomes (razão social + nome fantasia), normalizados sem acento:
+# acha substrings ("NORDEST" em "NORDESTE") e nomes fantasia que o empresas_fts não vê
+SQL_NOMES_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS nomes_fts USING fts5(
+        nome,
+        cnpj_basico UNINDEXED,
+        tokenize='trigram'
+    );
+"""
 
 def normalize(s: str) -> str:
     """Normaliza texto para busca"""
@@ -14,28 +84,18 @@ def normalize(s: str) -> str:
     s = re.sub(r"\s+", " ", s)
     return s
 
-def cnpj_dv(cnpj12: str) -> str:
-    """Calcula dígitos verificadores do CNPJ"""
-    pesos1 = [5,4,3,2,9,8,7,6,5,4,3,2]
-    pesos2 = [6] + pesos1
-
-    def calc(nums, pesos):
-        s = sum(int(n) * p for n, p in zip(nums, pesos))
-        r = s % 11
-        return "0" if r < 2 else str(11 - r)
-
-    dv1 = calc(cnpj12, pesos1)
-    dv2 = calc(cnpj12 + dv1, pesos2)
-    return dv1 + dv2
-
 def cnpj_completo(cnpj_basico: str, ordem: str, dv: str) -> str:
     """Monta CNPJ completo"""
     return cnpj_basico.zfill(8) + ordem.zfill(4) + dv.zfill(2)
 
-def init_db(conn: sqlite3.Connection):
-    """Inicializa banco de dados"""
+def init_db(conn: sqlite3.Connection, indices: bool = True):
+    """
+    Inicializa banco de dados (indices=False cria só as tabelas, para carga inicial).
+    Retorna True se as colunas derivadas de um banco antigo foram recalculadas agora.
+    """
     cur = conn.cursor()
-    cur.execute("PRAGMA journal_mode=WAL;")
+    if indices:
+        cur.execute("PRAGMA journal_mode=WAL;")
     
     # Tabela Empresas
     cur.execute("""
@@ -44,7 +104,9 @@ def init_db(conn: sqlite3.Connection):
             razao_social TEXT,
             natureza_juridica TEXT,
             capital_social TEXT,
-            porte TEXT
+            porte TEXT,
+            fp INTEGER,
+            origem TEXT
         );
     """)
     
@@ -71,10 +133,150 @@ def init_db(conn: sqlite3.Connection):
             telefone_1 TEXT,
             ddd_2 TEXT,
             telefone_2 TEXT,
-            email TEXT
+            email TEXT,
+            cnae_fiscal_principal TEXT,
+            cnae_fiscal_secundaria TEXT,
+            telefone_1_e164 TEXT,
+            telefone_2_e164 TEXT,
+            tem_telefone INTEGER,
+            tem_celular INTEGER,
+            codigo_ibge TEXT,
+            cidade TEXT,
+            fp INTEGER,
+            origem TEXT
         );
     """)
     
+    # Tabela Sócios (quadro societário: contato e cargo para o enriquecimento offline)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS socios (
+            id_socio TEXT PRIMARY KEY,
+            cnpj_basico TEXT,
+            identificador_socio TEXT,
+            nome_socio TEXT,
+            cnpj_cpf_socio TEXT,
+            qualificacao_socio TEXT,
+            data_entrada_sociedade TEXT,
+            pais TEXT,
+            representante_legal TEXT,
+            nome_representante TEXT,
+            qualificacao_representante TEXT,
+            faixa_etaria TEXT,
+            fp INTEGER,
+            origem TEXT
+        );
+    """)
+    
+    # CNAEs de cada estabelecimento, normalizados (principal=1 para o CNAE principal)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS estabelecimento_cnae (
+            cnpj_completo TEXT,
+            cnae TEXT,
+            principal INTEGER,
+            PRIMARY KEY (cnpj_completo, cnae)
+        ) WITHOUT ROWID;
+    """)
+    
+    # Controle de zips importados (modo incremental)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS import_zips (
+            zip_name TEXT PRIMARY KEY,
+            tipo TEXT,
+            sha256 TEXT,
+            linhas INTEGER,
+            importado_em TEXT
+        );
+    """)
+    
+    # Checkpoints da carga em lotes (--resume)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            zip_name TEXT PRIMARY KEY,
+            zip_tamanho INTEGER,
+            membro TEXT,
+            linha INTEGER,
+            byte_offset INTEGER,
+            concluido INTEGER DEFAULT 0,
+            atualizado_em TEXT
+        );
+    """)
+    
+    # Bancos criados antes do modo incremental não têm fp/origem
+    for tabela in ("empresas", "estabelecimentos"):
+        ensure_columns(conn, tabela, {"fp": "INTEGER", "origem": "TEXT"})
+    ensure_columns(conn, "estabelecimentos", {
+        "cnae_fiscal_principal": "TEXT", "cnae_fiscal_secundaria": "TEXT",
+    })
+    adicionadas = ensure_columns(conn, "estabelecimentos", COLUNAS_TELEFONE)
+    adicionadas += ensure_columns(conn, "estabelecimentos", COLUNAS_MUNICIPIO)
+    if adicionadas:
+        backfill_derivados(conn)
+    
+    conn.commit()
+    
+    if indices:
+        create_indexes(conn)
+    
+    logger.info("✅ Banco inicializado")
+    return bool(adicionadas)
+
+def ensure_columns(conn: sqlite3.Connection, tabela: str, colunas: dict) -> list:
+    """Adiciona colunas que faltam em tabelas de bancos antigos; retorna as adicionadas"""
+    existentes = {r[1] for r in conn.execute(f"PRAGMA table_info({tabela})")}
+    adicionadas = []
+    for nome, tipo in colunas.items():
+        if nome not in existentes:
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {nome} {tipo}")
+            logger.info(f"  ➕ Coluna {tabela}.{nome} adicionada")
+            adicionadas.append(nome)
+    return adicionadas
+
+def backfill_derivados(conn: sqlite3.Connection, telefones: bool = True):
+    """
+    Recalcula as colunas derivadas (telefones normalizados e município) dos
+    estabelecimentos já importados: banco anterior a elas ou tabela de
+    municípios nova. O fp também é recalculado (a linha mudou), senão o
+    próximo --incremental regravaria todos os estabelecimentos.
+    """
+    if conn.execute("SELECT 1 FROM estabelecimentos LIMIT 1").fetchone() is None:
+        return
+    
+    logger.info("🧮 Recalculando colunas derivadas dos estabelecimentos já importados...")
+    conn.create_function("normalizar_telefone", 2, normalizar_telefone, deterministic=True)
+    conn.create_function("codigo_ibge", 2, lambda m, uf: (Municipios.resolver(m, uf) or (None,))[0],
+                         deterministic=True)
+    conn.create_function("cidade", 2, lambda m, uf: (Municipios.resolver(m, uf) or (None, None))[1],
+                         deterministic=True)
+    conn.create_function("fingerprint", -1, lambda *row: fingerprint(row), deterministic=True)
+    if conn.in_transaction:
+        conn.commit()
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    if telefones:
+        cur.execute("""
+            UPDATE estabelecimentos SET
+                telefone_1_e164 = normalizar_telefone(ddd_1, telefone_1),
+                telefone_2_e164 = normalizar_telefone(ddd_2, telefone_2)
+        """)
+        cur.execute("""
+            UPDATE estabelecimentos SET
+                tem_telefone = (telefone_1_e164 IS NOT NULL OR telefone_2_e164 IS NOT NULL),
+                tem_celular = (IFNULL(LENGTH(telefone_1_e164), 0) = 13 OR IFNULL(LENGTH(telefone_2_e164), 0) = 13)
+        """)
+    cur.execute("""
+        UPDATE estabelecimentos SET
+            codigo_ibge = codigo_ibge(municipio, uf),
+            cidade = cidade(municipio, uf)
+    """)
+    cur.execute(f"""
+        UPDATE estabelecimentos SET fp = fingerprint({", ".join(COLUNAS_ESTABELECIMENTO)})
+    """)
+    conn.commit()
+
+def create_indexes(conn: sqlite3.Connection):
+    """Cria índices e a tabela FTS (idempotente)"""
+    cur = conn.cursor()
+    
     # Índice de busca para empresas (FTS5)
     cur.execute("""
         CREATE VIRTUAL TABLE IF NOT EXISTS empresas_fts USING fts5(
@@ -83,6 +285,7 @@ def init_db(conn: sqlite3.Connection):
             content='empresas'
         );
     """)
+    cur.execute(SQL_NOMES_FTS)
     
     # Índice para buscar estabelecimentos por CNPJ básico
     cur.execute("""
@@ -90,28 +293,733 @@ def init_db(conn: sqlite3.Connection):
         ON estabelecimentos(cnpj_basico);
     """)
     
+    # Sócios por CNPJ básico (enriquecimento offline)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_socios_cnpj_basico
+        ON socios(cnpj_basico);
+    """)
+    
+    # Busca geográfica: filtra candidatos por UF/município sem ler a tabela
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_estab_uf_municipio
+        ON estabelecimentos(uf, municipio, cnpj_basico);
+    """)
+    
+    # Contato pré-calculado: "matrizes com celular válido na UF X" só lê o índice.
+    # tem_celular antes de tem_telefone: com celular é o filtro mais seletivo; quem
+    # filtra só tem_telefone ainda busca por (cnpj_ordem, uf) e confere tem_telefone
+    # no próprio índice. Bancos antigos tinham tem_telefone antes: IF NOT EXISTS
+    # não troca a definição, então recria
+    antigas = [r[2] for r in cur.execute("PRAGMA index_info(idx_estab_contato)")]
+    if antigas and antigas != list(COLUNAS_IDX_CONTATO):
+        cur.execute("DROP INDEX idx_estab_contato")
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_estab_contato
+        ON estabelecimentos({', '.join(COLUNAS_IDX_CONTATO)});
+    """)
+    
+    # Índices de CNAE: extração de segmentos por lookup em vez de LIKE
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_estab_cnae_principal
+        ON estabelecimentos(cnae_fiscal_principal);
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_estabelecimento_cnae_cnae
+        ON estabelecimento_cnae(cnae, cnpj_completo);
+    """)
+    
     conn.commit()
-    logger.info("✅ Banco inicializado")
+
+def pragmas_carga(conn: sqlite3.Connection):
+    """
+    PRAGMAs para carga inicial: sem fsync, cache grande e lock exclusivo.
+    O journal fica em disco (DELETE): com MEMORY/OFF, um processo morto no meio
+    de um lote corromperia o banco, e o --resume depende do checkpoint gravado
+    na mesma transação do lote. synchronous=OFF só arrisca em queda do SO/energia;
+    tabelas novas quase não geram journal (páginas novas não são copiadas).
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA journal_mode=DELETE;")
+    cur.execute("PRAGMA synchronous=OFF;")
+    cur.execute("PRAGMA cache_size=-1048576;")  # ~1 GB
+    cur.execute("PRAGMA temp_store=MEMORY;")
+    cur.execute("PRAGMA locking_mode=EXCLUSIVE;")
+
+def pragmas_finais(conn: sqlite3.Connection):
+    """Volta para configurações seguras de uso (WAL, synchronous=NORMAL)"""
+    cur = conn.cursor()
+    cur.execute("PRAGMA locking_mode=NORMAL;")
+    cur.execute("PRAGMA synchronous=NORMAL;")
+    cur.execute("PRAGMA journal_mode=WAL;")
+    cur.execute("PRAGMA cache_size=-2000;")
+    cur.execute("PRAGMA temp_store=DEFAULT;")
+
+@contextmanager
+def fase(nome: str, tempos: dict):
+    """Mede e registra o tempo de uma fase do build"""
+    logger.info(f"⏱️ Fase: {nome}...")
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[nome] = time.perf_counter() - inicio
+        logger.info(f"⏱️ Fase {nome}: {tempos[nome]:.1f}s")
 
 def upsert_empresa(conn, row):
     """Insere ou atualiza empresa"""
     cur = conn.cursor()
-    cur.execute("""
-        INSERT OR REPLACE INTO empresas
-        (cnpj_basico, razao_social, natureza_juridica, capital_social, porte)
-        VALUES (?, ?, ?, ?, ?)
-    """, row)
+    cur.execute(SQL_EMPRESA, row)
 
 def upsert_estabelecimento(conn, row):
     """Insere ou atualiza estabelecimento"""
     cur = conn.cursor()
+    cur.execute(SQL_ESTABELECIMENTO, row)
+    gravar_cnaes(cur, [row])
+
+IDX_CNAE_PRINCIPAL = COLUNAS_ESTABELECIMENTO.index("cnae_fiscal_principal")
+IDX_CNAE_SECUNDARIA = COLUNAS_ESTABELECIMENTO.index("cnae_fiscal_secundaria")
+
+def gravar_cnaes(cur, batch):
+    """Regrava as linhas de estabelecimento_cnae dos estabelecimentos do lote"""
+    cur.executemany("DELETE FROM estabelecimento_cnae WHERE cnpj_completo = ?", [(row[0],) for row in batch])
+    
+    cnaes = []
+    for row in batch:
+        principal = row[IDX_CNAE_PRINCIPAL]
+        if principal:
+            cnaes.append((row[0], principal, 1))
+        for cnae in (row[IDX_CNAE_SECUNDARIA] or "").split(","):
+            cnae = cnae.strip()
+            if cnae and cnae != principal:
+                cnaes.append((row[0], cnae, 0))
+    
+    cur.executemany("""
+        INSERT OR IGNORE INTO estabelecimento_cnae (cnpj_completo, cnae, principal)
+        VALUES (?, ?, ?)
+    """, cnaes)
+
+def parse_empresa(cols):
+    """Converte uma linha do CSV de Empresas na tupla da tabela"""
+    cnpj_basico = cols[0]
+    razao = normalize(cols[1])
+    natureza = cols[2] if len(cols) > 2 else ""
+    capital = cols[4] if len(cols) > 4 else ""
+    porte = cols[5] if len(cols) > 5 else ""
+    return (cnpj_basico, razao, natureza, capital, porte)
+
+def parse_estabelecimento(cols):
+    """Converte uma linha do CSV de Estabelecimentos na tupla da tabela (None se inválida)"""
+    if len(cols) < 20:
+        return None
+    
+    cnpj_basico = cols[0]
+    cnpj_ordem = cols[1]
+    cnpj_dv = cols[2]
+    cnpj_completo_str = cnpj_completo(cnpj_basico, cnpj_ordem, cnpj_dv)
+    
+    matriz_filial = cols[3]  # 1=Matriz, 2=Filial
+    nome_fantasia = normalize(cols[4])
+    situacao = cols[5]
+    data_situacao = cols[6]
+    
+    tipo_logradouro = cols[13] if len(cols) > 13 else ""
+    logradouro = cols[14] if len(cols) > 14 else ""
+    numero = cols[15] if len(cols) > 15 else ""
+    complemento = cols[16] if len(cols) > 16 else ""
+    bairro = cols[17] if len(cols) > 17 else ""
+    cep = cols[18] if len(cols) > 18 else ""
+    uf = cols[19] if len(cols) > 19 else ""
+    municipio = cols[20] if len(cols) > 20 else ""
+    
+    ddd_1 = cols[21] if len(cols) > 21 else ""
+    telefone_1 = cols[22] if len(cols) > 22 else ""
+    ddd_2 = cols[23] if len(cols) > 23 else ""
+    telefone_2 = cols[24] if len(cols) > 24 else ""
+    email = cols[26] if len(cols) > 26 else ""
+    
+    cnae_principal = cols[11]
+    cnae_secundaria = cols[12]
+    
+    # Telefones normalizados (55 + DDD + número) e flags, para filtrar por índice
+    telefone_1_e164 = normalizar_telefone(ddd_1, telefone_1)
+    telefone_2_e164 = normalizar_telefone(ddd_2, telefone_2)
+    tem_telefone = int(telefone_1_e164 is not None or telefone_2_e164 is not None)
+    tem_celular = int(eh_celular(telefone_1_e164) or eh_celular(telefone_2_e164))
+    
+    # Código TOM da Receita -> código IBGE e nome da cidade (dicionário em memória)
+    cidade = Municipios.resolver(municipio, uf)
+    codigo_ibge, nome_cidade = (cidade.codigo_ibge, cidade.nome) if cidade else (None, None)
+    
+    return (
+        cnpj_completo_str, cnpj_basico, cnpj_ordem, cnpj_dv, matriz_filial,
+        nome_fantasia, situacao, data_situacao, tipo_logradouro, logradouro,
+        numero, complemento, bairro, cep, uf, municipio, ddd_1, telefone_1,
+        ddd_2, telefone_2, email, cnae_principal, cnae_secundaria,
+        telefone_1_e164, telefone_2_e164, tem_telefone, tem_celular, codigo_ibge, nome_cidade
+    )
+
+def parse_socio(cols):
+    """Converte uma linha do CSV de Sócios na tupla da tabela (None se inválida)"""
+    if len(cols) < 5:
+        return None
+    
+    cols = list(cols) + [""] * (11 - len(cols))
+    cnpj_basico = cols[0]
+    identificador = cols[1]  # 1=PJ, 2=PF, 3=Estrangeiro
+    nome = normalize(cols[2])
+    documento = cols[3]      # CPF vem mascarado no dump (***123456**)
+    id_socio = f"{cnpj_basico}|{documento}|{nome}"
+    
+    return (
+        id_socio, cnpj_basico, identificador, nome, documento, cols[4], cols[5],
+        cols[6], cols[7], normalize(cols[8]), cols[9], cols[10]
+    )
+
+def membro_empresas(z: zipfile.ZipFile):
+    """Arquivo de dados dentro do zip de Empresas"""
+    csv_files = [n for n in z.namelist() if any(ext in n.lower() for ext in ['.csv', '.emprecsv', '.txt'])]
+    return csv_files[0] if csv_files else None
+
+def membro_estabelecimentos(z: zipfile.ZipFile):
+    """Arquivo de dados dentro do zip de Estabelecimentos (ignora diretórios)"""
+    files = [n for n in z.namelist() if not n.endswith('/')]
+    return files[0] if files else None
+
+def membro_socios(z: zipfile.ZipFile):
+    """Arquivo de dados dentro do zip de Sócios (ignora diretórios)"""
+    files = [n for n in z.namelist() if not n.endswith('/')]
+    return files[0] if files else None
+
+# Tipos de arquivo suportados (a chave primária é sempre a primeira coluna).
+# `derivados` grava tabelas filhas a partir do lote; `filhas` são essas tabelas
+# (chaveadas pela mesma coluna), para apagar junto com a linha principal.
+TipoArquivo = namedtuple("TipoArquivo", "membro parser tabela colunas sql rotulo derivados filhas")
+
+TIPOS = {
+    "empresas": TipoArquivo(membro_empresas, parse_empresa, "empresas",
+                            COLUNAS_EMPRESA, SQL_EMPRESA, "empresas", None, ()),
+    "estabelecimentos": TipoArquivo(membro_estabelecimentos, parse_estabelecimento, "estabelecimentos",
+                                    COLUNAS_ESTABELECIMENTO, SQL_ESTABELECIMENTO, "estabelecimentos",
+                                    gravar_cnaes, ("estabelecimento_cnae",)),
+    "socios": TipoArquivo(membro_socios, parse_socio, "socios",
+                          COLUNAS_SOCIO, SQL_SOCIO, "sócios", None, ()),
+}
+
+# Posição no arquivo descompactado logo após a última linha de um lote
+Posicao = namedtuple("Posicao", "membro linha offset")
+Checkpoint = namedtuple("Checkpoint", "posicao concluido")
+
+def iter_batches_zip(zip_path: Path, tipo: str, batch_size: int = BATCH_SIZE, inicio: Posicao = None):
+    """
+    Lê o zip em streaming e gera (lote, Posicao) com as tuplas já convertidas,
+    cada uma seguida do fingerprint e do nome do zip (COLUNAS_CONTROLE).
+    Com `inicio`, continua a partir de uma posição salva (seek no arquivo descompactado).
+    """
+    membro, parser = TIPOS[tipo].membro, TIPOS[tipo].parser
+    origem = zip_path.name
+    
+    with zipfile.ZipFile(zip_path, "r") as z:
+        name = membro(z)
+        
+        if not name:
+            logger.error(f"❌ Nenhum arquivo de dados encontrado em {zip_path.name}!")
+            return
+        
+        logger.info(f"📄 Processando arquivo: {name}")
+        
+        linha, offset = 0, 0
+        if inicio and inicio.membro == name:
+            linha, offset = inicio.linha, inicio.offset
+            logger.info(f"  ↪️ Retomando na linha {linha:,} (byte {offset:,})")
+        
+        with z.open(name) as f:
+            if offset:
+                f.seek(offset)
+            
+            lido = [offset]
+            
+            def linhas():
+                for line in f:
+                    lido[0] += len(line)
+                    yield line.decode("latin1", errors="ignore")
+            
+            batch = []
+            for cols in csv.reader(linhas(), delimiter=";"):
+                linha += 1
+                row = parser(cols)
+                if row is not None:
+                    batch.append(row + (fingerprint(row), origem))
+                if len(batch) >= batch_size:
+                    yield batch, Posicao(name, linha, lido[0])
+                    batch = []
+            
+            if batch:
+                yield batch, Posicao(name, linha, lido[0])
+
+def iter_rows_zip(zip_path: Path, tipo: str):
+    """Lê o zip em streaming e gera as tuplas já convertidas"""
+    for batch, _ in iter_batches_zip(zip_path, tipo):
+        yield from batch
+
+def ler_checkpoint(conn, zip_path: Path):
+    """Último checkpoint do zip (None se não houver ou se o arquivo mudou de tamanho)"""
+    row = conn.execute("""
+        SELECT zip_tamanho, membro, linha, byte_offset, concluido
+        FROM import_checkpoints WHERE zip_name = ?
+    """, (zip_path.name,)).fetchone()
+    
+    if not row or row[0] != zip_path.stat().st_size:
+        return None
+    
+    return Checkpoint(Posicao(row[1], row[2], row[3]), bool(row[4]))
+
+def salvar_checkpoint(cur, zip_path: Path, pos: Posicao, concluido: bool = False):
+    """Grava o checkpoint (deve rodar na mesma transação do lote)"""
     cur.execute("""
-        INSERT OR REPLACE INTO estabelecimentos
-        (cnpj_completo, cnpj_basico, cnpj_ordem, cnpj_dv, matriz_filial, nome_fantasia,
-         situacao_cadastral, data_situacao_cadastral, tipo_logradouro, logradouro, numero,
-         complemento, bairro, cep, uf, municipio, ddd_1, telefone_1, ddd_2, telefone_2, email)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, row)
+        INSERT OR REPLACE INTO import_checkpoints
+        (zip_name, zip_tamanho, membro, linha, byte_offset, concluido, atualizado_em)
+        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+    """, (zip_path.name, zip_path.stat().st_size, pos.membro, pos.linha, pos.offset, int(concluido)))
+
+def marcar_concluido(conn, zip_path: Path, pos: Posicao):
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    salvar_checkpoint(cur, zip_path, pos, concluido=True)
+    conn.commit()
+
+def write_batch(conn, tipo: str, batch, checkpoint=None):
+    """
+    Grava um lote com executemany dentro de uma transação explícita.
+    `checkpoint` = (zip_path, Posicao) é gravado na mesma transação.
+    """
+    spec = TIPOS[tipo]
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        cur.executemany(spec.sql, batch)
+        if spec.derivados:
+            spec.derivados(cur, batch)
+        if checkpoint:
+            salvar_checkpoint(cur, *checkpoint)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+class Progresso:
+    """Relatório de progresso em linhas/segundo"""
+    
+    def __init__(self, rotulo: str, intervalo: float = 5.0):
+        self.rotulo = rotulo
+        self.intervalo = intervalo
+        self.inicio = time.perf_counter()
+        self.ultimo = self.inicio
+        self.total = 0
+    
+    def add(self, n: int):
+        self.total += n
+        agora = time.perf_counter()
+        if agora - self.ultimo >= self.intervalo:
+            self.ultimo = agora
+            logger.info(f"  {self.total:,} {self.rotulo} ({self.taxa():,.0f} linhas/s)")
+    
+    def taxa(self) -> float:
+        decorrido = time.perf_counter() - self.inicio
+        return self.total / decorrido if decorrido > 0 else 0.0
+    
+    def fim(self, nome: str):
+        decorrido = time.perf_counter() - self.inicio
+        logger.info(f"✅ {nome}: {self.total:,} {self.rotulo} importados em {decorrido:.1f}s ({self.taxa():,.0f} linhas/s)")
+
+def ponto_de_retomada(conn, zip_path: Path, resume: bool):
+    """
+    Posição de onde continuar o zip: None para começar do início,
+    False se o zip já foi concluído numa execução anterior.
+    """
+    if not resume:
+        return None
+    
+    cp = ler_checkpoint(conn, zip_path)
+    if cp is None:
+        return None
+    if cp.concluido:
+        logger.info(f"⏭️ {zip_path.name} já concluído, pulando")
+        return False
+    return cp.posicao
+
+def bulk_import_zip(conn, zip_path: Path, tipo: str, batch_size: int = BATCH_SIZE, resume: bool = False):
+    """Importa um zip em lotes de `batch_size` linhas usando executemany, com checkpoint a cada lote"""
+    inicio = ponto_de_retomada(conn, zip_path, resume)
+    if inicio is False:
+        return 0
+    
+    logger.info(f"📦 Processando {zip_path.name} (bulk, lotes de {batch_size:,})...")
+    
+    progresso = Progresso(TIPOS[tipo].rotulo)
+    pos = inicio
+    
+    for batch, pos in iter_batches_zip(zip_path, tipo, batch_size, inicio):
+        write_batch(conn, tipo, batch, (zip_path, pos))
+        progresso.add(len(batch))
+    
+    if pos:
+        marcar_concluido(conn, zip_path, pos)
+    
+    progresso.fim(zip_path.name)
+    return progresso.total
+
+def _enfileirar(fila, item, parar) -> bool:
+    """put na fila limitada que desiste se o writer pediu para parar (False nesse caso)"""
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _parse_zip_worker(zip_path: Path, tipo: str, batch_size: int, fila, inicio: Posicao = None, parar=None):
+    """Worker do pool: descompacta e converte um zip, enviando lotes para o writer"""
+    pos, ok = inicio, False
+    try:
+        for batch, pos in iter_batches_zip(zip_path, tipo, batch_size, inicio):
+            if not _enfileirar(fila, (zip_path.name, batch, pos), parar):
+                return
+        ok = True
+    finally:
+        # Sempre sinaliza o fim, mesmo com erro, para o writer não ficar bloqueado
+        _enfileirar(fila, (zip_path.name, None, pos if ok else None), parar)
+
+def _drenar(fila, futures):
+    """Esvazia a fila até todos os workers terminarem (nenhum fica preso num put)"""
+    while not all(f.done() for f in futures):
+        try:
+            fila.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+def parallel_import(conn, jobs, workers: int, batch_size: int = BATCH_SIZE,
+                    queue_size: int = QUEUE_SIZE, resume: bool = False):
+    """
+    Importa vários zips em paralelo: um pool de processos faz a descompactação
+    e o parsing, e este processo é o único writer do SQLite (via fila limitada).
+    `jobs` é uma lista de (zip_path, tipo).
+    """
+    inicios = {zp.name: ponto_de_retomada(conn, zp, resume) for zp, _ in jobs}
+    jobs = [(zp, tipo) for zp, tipo in jobs if inicios[zp.name] is not False]
+    if not jobs:
+        return 0
+    
+    logger.info(f"⚡ Importação paralela: {len(jobs)} zips, {workers} workers, lotes de {batch_size:,}")
+    
+    progresso = {zp.name: Progresso(TIPOS[tipo].rotulo) for zp, tipo in jobs}
+    tipos = {zp.name: tipo for zp, tipo in jobs}
+    paths = {zp.name: zp for zp, _ in jobs}
+    
+    with mp.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        fila = manager.Queue(maxsize=queue_size)
+        parar = manager.Event()
+        futures = [
+            pool.submit(_parse_zip_worker, zp, tipo, batch_size, fila, inicios[zp.name], parar)
+            for zp, tipo in jobs
+        ]
+        
+        try:
+            pendentes = len(jobs)
+            while pendentes:
+                try:
+                    nome, batch, pos = fila.get(timeout=5)
+                except queue.Empty:
+                    continue
+                
+                if batch is None:
+                    pendentes -= 1
+                    if pos:
+                        marcar_concluido(conn, paths[nome], pos)
+                    progresso[nome].fim(nome)
+                    continue
+                
+                write_batch(conn, tipos[nome], batch, (paths[nome], pos))
+                progresso[nome].add(len(batch))
+        except BaseException:
+            # Erro no writer: sem isso, o shutdown do pool ao sair do `with` esperaria
+            # para sempre workers bloqueados no put da fila cheia
+            logger.error("❌ Falha no writer: parando os workers...")
+            parar.set()
+            for f in futures:
+                f.cancel()
+            _drenar(fila, futures)
+            raise
+        
+        # Propaga erros dos workers
+        for f in futures:
+            f.result()
+    
+    return sum(p.total for p in progresso.values())
+
+def hash_zip(zip_path: Path) -> str:
+    """SHA-256 do conteúdo do zip"""
+    h = hashlib.sha256()
+    with open(zip_path, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def fingerprint(row) -> int:
+    """Impressão digital de 64 bits de uma linha (cabe num INTEGER do SQLite)"""
+    dados = "\x1f".join(map(str, row)).encode("utf-8", errors="ignore")
+    return int.from_bytes(hashlib.blake2b(dados, digest_size=8).digest(), "big", signed=True)
+
+def zip_inalterado(conn, zip_path: Path, sha: str) -> bool:
+    """True se o zip já foi importado com o mesmo conteúdo"""
+    row = conn.execute("SELECT sha256 FROM import_zips WHERE zip_name = ?", (zip_path.name,)).fetchone()
+    return bool(row) and row[0] == sha
+
+def registrar_zip(conn, zip_path: Path, tipo: str, sha: str, linhas: int):
+    conn.execute("""
+        INSERT OR REPLACE INTO import_zips (zip_name, tipo, sha256, linhas, importado_em)
+        VALUES (?, ?, ?, ?, datetime('now'))
+    """, (zip_path.name, tipo, sha, linhas))
+
+def municipios_desatualizados(conn, zips) -> list:
+    """
+    Zips de municípios novos ou alterados desde o último build (todos, se a
+    tabela municipios ainda não existe ou se algum Municipios.zip sumiu).
+    Retorna [(zip_path, sha256)]; vazio quando não há nada a refazer.
+    """
+    shas = [(zp, hash_zip(zp)) for zp in zips]
+    registrados = {r[0] for r in conn.execute("SELECT zip_name FROM import_zips WHERE tipo = 'municipios'")}
+    tabela = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'municipios'").fetchone()
+    if (tabela and registrados == {zp.name for zp in zips}
+            and all(zip_inalterado(conn, zp, sha) for zp, sha in shas)):
+        return []
+    return shas or [(None, None)]
+
+def incremental_import_zip(conn, zip_path: Path, tipo: str, batch_size: int = BATCH_SIZE):
+    """
+    Importa só as linhas novas ou alteradas de um zip (comparando fingerprints).
+    As chaves lidas vão para a tabela temporária _vistos, usada depois para apagar
+    as linhas que sumiram do dump.
+    """
+    spec = TIPOS[tipo]
+    chave = spec.colunas[0]
+    
+    logger.info(f"📦 Processando {zip_path.name} (incremental)...")
+    progresso = Progresso(spec.rotulo)
+    alteradas = 0
+    
+    for batch, _ in iter_batches_zip(zip_path, tipo, batch_size):
+        lote = [(row[0], row[-2]) for row in batch]
+        
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            cur.execute("DELETE FROM _lote")
+            cur.executemany("INSERT OR REPLACE INTO _lote (chave, fp) VALUES (?, ?)", lote)
+            cur.execute("INSERT OR IGNORE INTO _vistos (chave) SELECT chave FROM _lote")
+            mudou = {r[0] for r in cur.execute(f"""
+                SELECT l.chave FROM _lote l
+                LEFT JOIN {spec.tabela} t ON t.{chave} = l.chave
+                WHERE t.fp IS NOT l.fp OR t.origem IS NOT ?
+            """, (zip_path.name,))}
+            if mudou:
+                alteradas_lote = [row for row in batch if row[0] in mudou]
+                cur.executemany(spec.sql, alteradas_lote)
+                if spec.derivados:
+                    spec.derivados(cur, alteradas_lote)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        
+        alteradas += len(mudou)
+        progresso.add(len(batch))
+    
+    progresso.fim(zip_path.name)
+    logger.info(f"  ✏️ {alteradas:,} linhas novas/alteradas gravadas")
+    return progresso.total, alteradas
+
+def incremental_import(conn, zips, tipo: str, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Atualização incremental de um tipo de arquivo: pula zips com o mesmo hash,
+    grava só linhas alteradas e apaga as que não aparecem mais nos zips alterados.
+    Retorna o total de linhas gravadas/apagadas.
+    """
+    spec = TIPOS[tipo]
+    chave = spec.colunas[0]
+    
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _lote (chave TEXT PRIMARY KEY, fp INTEGER)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _vistos (chave TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM _vistos")
+    
+    nomes = {zp.name for zp in zips}
+    sumiram = [r[0] for r in conn.execute(
+        "SELECT zip_name FROM import_zips WHERE tipo = ?", (tipo,)) if r[0] not in nomes]
+    alterados = list(sumiram)
+    processados = []
+    escritas = 0
+    
+    for zp in zips:
+        sha = hash_zip(zp)
+        if zip_inalterado(conn, zp, sha):
+            logger.info(f"⏭️ {zp.name} inalterado, pulando")
+            continue
+        
+        linhas, alteradas = incremental_import_zip(conn, zp, tipo, batch_size)
+        processados.append((zp, sha, linhas))
+        alterados.append(zp.name)
+        escritas += alteradas
+    
+    if alterados:
+        # Os zips só são registrados junto com as remoções: se o processo morrer
+        # antes disso, a próxima execução reprocessa (barato, só compara fingerprints)
+        # Linhas que estavam nos zips alterados/removidos e não foram vistas agora
+        marcadores = ", ".join("?" * len(alterados))
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        for filha in spec.filhas:
+            cur.execute(f"""
+                DELETE FROM {filha} WHERE {chave} IN (
+                    SELECT {chave} FROM {spec.tabela}
+                    WHERE origem IN ({marcadores})
+                    AND {chave} NOT IN (SELECT chave FROM _vistos)
+                )
+            """, alterados)
+        cur.execute(f"""
+            DELETE FROM {spec.tabela}
+            WHERE origem IN ({marcadores})
+            AND {chave} NOT IN (SELECT chave FROM _vistos)
+        """, alterados)
+        apagadas = cur.rowcount
+        cur.executemany("DELETE FROM import_zips WHERE zip_name = ?", [(n,) for n in sumiram])
+        for zp, sha, linhas in processados:
+            registrar_zip(conn, zp, tipo, sha, linhas)
+        conn.commit()
+        escritas += apagadas
+        logger.info(f"🗑️ {apagadas:,} {spec.rotulo} removidos do dump")
+    
+    conn.execute("DELETE FROM _vistos")
+    return escritas
+
+# Colunas de baixa cardinalidade: dictionary-encoded no Parquet
+COLUNAS_DICIONARIO = {
+    "natureza_juridica", "porte", "cnpj_ordem", "matriz_filial", "situacao_cadastral",
+    "tipo_logradouro", "municipio", "ddd_1", "ddd_2", "cnae_fiscal_principal", "codigo_ibge", "cidade",
+}
+
+def _schema_parquet(colunas):
+    import pyarrow as pa
+    return pa.schema([
+        (c, pa.dictionary(pa.int32(), pa.string()) if c in COLUNAS_DICIONARIO
+            else pa.int8() if COLUNAS_TELEFONE.get(c) == "INTEGER" else pa.string())
+        for c in colunas
+    ])
+
+def _record_batches(cur, schema, batch_size: int):
+    """Converte o cursor em RecordBatches do Arrow (fetchmany, memória constante)"""
+    import pyarrow as pa
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        colunas = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(col, type=campo.type) for col, campo in zip(colunas, schema)],
+            schema=schema,
+        )
+
+def export_parquet(db_path: Path = DB_PATH, destino: Path = PARQUET_DIR, batch_size: int = BATCH_SIZE):
+    """
+    Exporta empresas e estabelecimentos para Parquet particionado por UF
+    (hive: destino/<tabela>/uf=XX/*.parquet). Empresas usam a UF da matriz.
+    Grava num diretório temporário e troca pelo destino no final: reescrever
+    por cima (delete_matching) é ~20x mais lento, e quem lê nunca vê meio export.
+    """
+    try:
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        logger.error("❌ pyarrow não instalado (pip install pyarrow); exportação Parquet ignorada")
+        return
+    
+    # uf vai no fim: é a coluna de partição
+    colunas_estab = tuple(c for c in COLUNAS_ESTABELECIMENTO if c != "uf")
+    exports = {
+        "estabelecimentos": (
+            f"SELECT {', '.join(colunas_estab)}, NULLIF(uf, '') FROM estabelecimentos",
+            colunas_estab + ("uf",),
+        ),
+        "empresas": (
+            f"""SELECT {', '.join('e.' + c for c in COLUNAS_EMPRESA)}, NULLIF(es.uf, '')
+                FROM empresas e
+                LEFT JOIN estabelecimentos es
+                  ON es.cnpj_basico = e.cnpj_basico AND es.cnpj_ordem = '0001'""",
+            COLUNAS_EMPRESA + ("uf",),
+        ),
+    }
+    
+    temporario = destino.with_name(destino.name + ".tmp")
+    if temporario.exists():
+        shutil.rmtree(temporario)
+    
+    # O write_dataset consome os lotes em outra thread
+    conn = sqlite3.connect(db_path.as_posix(), check_same_thread=False)
+    try:
+        _escrever_parquet(conn, exports, temporario, batch_size)
+    except Exception:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+    
+    antigo = destino.with_name(destino.name + ".old")
+    if antigo.exists():
+        shutil.rmtree(antigo)
+    if destino.exists():
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+    logger.info(f"✅ Parquet salvo em {destino.absolute()}")
+
+def _escrever_parquet(conn, exports: dict, destino: Path, batch_size: int):
+    """Escreve as tabelas de `exports` ({tabela: (sql, colunas)}) e municipios em `destino`"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    particao = ds.partitioning(pa.schema([("uf", pa.string())]), flavor="hive")
+    formato = ds.ParquetFileFormat()
+    
+    for tabela, (sql, colunas) in exports.items():
+        schema = _schema_parquet(colunas)
+        opcoes = formato.make_write_options(
+            compression="zstd",
+            use_dictionary=[c for c in colunas if c in COLUNAS_DICIONARIO],
+        )
+        
+        logger.info(f"🧱 Exportando {tabela} para Parquet...")
+        cur = conn.cursor()
+        cur.execute(sql)
+        
+        ds.write_dataset(
+            _record_batches(cur, schema, batch_size),
+            (destino / tabela).as_posix(),
+            schema=schema,
+            format=formato,
+            file_options=opcoes,
+            partitioning=particao,
+            existing_data_behavior="error",
+            min_rows_per_group=64 * 1024,
+            max_rows_per_group=1024 * 1024,
+        )
+    
+    # municipios é pequena: um arquivo só, para os joins de nome de cidade
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'municipios'").fetchone():
+        import pyarrow.parquet as pq
+        rows = conn.execute("SELECT codigo_ibge, nome, uf, codigo_tom FROM municipios").fetchall()
+        schema = pa.schema([(c, pa.string()) for c in ("codigo_ibge", "nome", "uf", "codigo_tom")])
+        colunas = list(zip(*rows)) or [[], [], [], []]
+        (destino / "municipios").mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in colunas], schema=schema),
+                       (destino / "municipios" / "municipios.parquet").as_posix())
 
 def rebuild_fts(conn):
     """Reconstrói índice de busca"""
@@ -120,139 +1028,237 @@ def rebuild_fts(conn):
     conn.commit()
     logger.info("✅ Índice de busca reconstruído")
 
+def nomes_fts_vazio(conn) -> bool:
+    """True se o índice trigram ainda não foi preenchido (banco anterior a ele)"""
+    return conn.execute("SELECT 1 FROM nomes_fts LIMIT 1").fetchone() is None
+
+def rebuild_nomes_fts(conn):
+    """Recria o índice trigram com razões sociais e nomes fantasia normalizados"""
+    conn.create_function("normalizar_nome", 1, normalizar_nome, deterministic=True)
+    cur = conn.cursor()
+    
+    # DROP + CREATE é bem mais rápido que DELETE numa FTS grande
+    cur.execute("DROP TABLE IF EXISTS nomes_fts;")
+    cur.execute(SQL_NOMES_FTS)
+    cur.execute("""
+        INSERT INTO nomes_fts (nome, cnpj_basico)
+        SELECT normalizar_nome(razao_social), cnpj_basico
+        FROM empresas
+        WHERE razao_social <> ''
+    """)
+    cur.execute("""
+        INSERT INTO nomes_fts (nome, cnpj_basico)
+        SELECT DISTINCT normalizar_nome(nome_fantasia), cnpj_basico
+        FROM estabelecimentos
+        WHERE nome_fantasia <> ''
+    """)
+    cur.execute("INSERT INTO nomes_fts(nomes_fts) VALUES('optimize');")
+    conn.commit()
+    
+    total = cur.execute("SELECT COUNT(*) FROM nomes_fts").fetchone()[0]
+    logger.info(f"✅ Índice trigram de nomes reconstruído ({total:,} nomes)")
+
 def import_empresas_zip(conn, zip_path: Path):
     """Importa dados de Empresas"""
     logger.info(f"📦 Processando {zip_path.name}...")
     
-    with zipfile.ZipFile(zip_path, "r") as z:
-        csv_files = [n for n in z.namelist() if any(ext in n.lower() for ext in ['.csv', '.emprecsv', '.txt'])]
-        
-        if not csv_files:
-            logger.error(f"❌ Nenhum arquivo de dados encontrado!")
-            return
-        
-        name = csv_files[0]
+    count = 0
+    for row in iter_rows_zip(zip_path, "empresas"):
+        upsert_empresa(conn, row)
         
-        with z.open(name) as f:
-            text = (line.decode("latin1", errors="ignore") for line in f)
-            reader = csv.reader(text, delimiter=";")
-            
-            count = 0
-            for cols in reader:
-                cnpj_basico = cols[0]
-                razao = normalize(cols[1])
-                natureza = cols[2] if len(cols) > 2 else ""
-                capital = cols[4] if len(cols) > 4 else ""
-                porte = cols[5] if len(cols) > 5 else ""
-                
-                upsert_empresa(conn, (cnpj_basico, razao, natureza, capital, porte))
-                
-                count += 1
-                if count % 50000 == 0:
-                    conn.commit()
-                    logger.info(f"  {count:,} empresas processadas...")
-            
+        count += 1
+        if count % 50000 == 0:
             conn.commit()
-            logger.info(f"✅ {zip_path.name}: {count:,} empresas importadas")
+            logger.info(f"  {count:,} empresas processadas...")
+    
+    conn.commit()
+    logger.info(f"✅ {zip_path.name}: {count:,} empresas importadas")
 
 def import_estabelecimentos_zip(conn, zip_path: Path):
     """Importa dados de Estabelecimentos"""
     logger.info(f"📦 Processando {zip_path.name}...")
     
-    with zipfile.ZipFile(zip_path, "r") as z:
-        # Pega qualquer arquivo (ignora diretórios)
-        files = [n for n in z.namelist() if not n.endswith('/')]
-        
-        if not files:
-            logger.error(f"❌ Nenhum arquivo encontrado!")
-            return
+    count = 0
+    for row in iter_rows_zip(zip_path, "estabelecimentos"):
+        upsert_estabelecimento(conn, row)
         
-        name = files[0]
-        logger.info(f"📄 Processando arquivo: {name}")
-        
-        with z.open(name) as f:
-            text = (line.decode("latin1", errors="ignore") for line in f)
-            reader = csv.reader(text, delimiter=";")
-            
-            count = 0
-            for cols in reader:
-                if len(cols) < 20:
-                    continue
-                
-                cnpj_basico = cols[0]
-                cnpj_ordem = cols[1]
-                cnpj_dv = cols[2]
-                cnpj_completo_str = cnpj_completo(cnpj_basico, cnpj_ordem, cnpj_dv)
-                
-                matriz_filial = cols[3]  # 1=Matriz, 2=Filial
-                nome_fantasia = normalize(cols[4])
-                situacao = cols[5]
-                data_situacao = cols[6]
-                
-                tipo_logradouro = cols[13] if len(cols) > 13 else ""
-                logradouro = cols[14] if len(cols) > 14 else ""
-                numero = cols[15] if len(cols) > 15 else ""
-                complemento = cols[16] if len(cols) > 16 else ""
-                bairro = cols[17] if len(cols) > 17 else ""
-                cep = cols[18] if len(cols) > 18 else ""
-                uf = cols[19] if len(cols) > 19 else ""
-                municipio = cols[20] if len(cols) > 20 else ""
-                
-                ddd_1 = cols[21] if len(cols) > 21 else ""
-                telefone_1 = cols[22] if len(cols) > 22 else ""
-                ddd_2 = cols[23] if len(cols) > 23 else ""
-                telefone_2 = cols[24] if len(cols) > 24 else ""
-                email = cols[26] if len(cols) > 26 else ""
-                
-                upsert_estabelecimento(conn, (
-                    cnpj_completo_str, cnpj_basico, cnpj_ordem, cnpj_dv, matriz_filial,
-                    nome_fantasia, situacao, data_situacao, tipo_logradouro, logradouro,
-                    numero, complemento, bairro, cep, uf, municipio, ddd_1, telefone_1,
-                    ddd_2, telefone_2, email
-                ))
-                
-                count += 1
-                if count % 50000 == 0:
-                    conn.commit()
-                    logger.info(f"  {count:,} estabelecimentos processados...")
-            
+        count += 1
+        if count % 50000 == 0:
             conn.commit()
-            logger.info(f"✅ {zip_path.name}: {count:,} estabelecimentos importados")
+            logger.info(f"  {count:,} estabelecimentos processados...")
+    
+    conn.commit()
+    logger.info(f"✅ {zip_path.name}: {count:,} estabelecimentos importados")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monta data/cnpj.db a partir dos zips da Receita Federal")
+    parser.add_argument("--bulk", action="store_true",
+                        help="carga em lotes com executemany (muito mais rápido que linha a linha)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"linhas por lote no modo --bulk (padrão: {BATCH_SIZE:,})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos de parsing em paralelo (>1 ativa a importação paralela com um único writer)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="atualização mensal: pula zips inalterados e grava só linhas alteradas/removidas")
+    parser.add_argument("--parquet", action="store_true",
+                        help=f"ao final, exporta empresas/estabelecimentos para Parquet particionado por UF ({PARQUET_DIR})")
+    parser.add_argument("--resume", action="store_true",
+                        help="continua do último checkpoint gravado (pula zips concluídos e retoma o zip interrompido)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="ao final, ANALYZE + VACUUM INTO com page_size de "
+                             f"{cnpj_db.PAGE_SIZE // 1024} KB e troca do arquivo: banco pronto para leitura imutável "
+                             "(precisa de espaço livre para uma cópia do banco)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="build do zero: apaga o banco (municipios é recriada da tabela empacotada), carrega sem índices e cria índices/FTS no final")
+    args = parser.parse_args(argv)
+    if args.incremental and args.fresh:
+        parser.error("--incremental e --fresh são exclusivos")
+    if args.incremental and args.resume:
+        parser.error("--incremental já retoma sozinho (zips registrados são pulados); não use --resume")
+    return args
+
+def remover_banco(db_path: Path):
+    """Apaga o banco e seus arquivos auxiliares (-wal/-shm/-journal)"""
+    for sufixo in ("", "-wal", "-shm", "-journal"):
+        arq = Path(db_path.as_posix() + sufixo)
+        if arq.exists():
+            arq.unlink()
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    if args.workers > 1 or args.fresh or args.incremental or args.resume:
+        args.bulk = True
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
-    logger.info("🚀 Criando/Atualizando banco de CNPJs...")
+    tempos = {}
     
-    conn = sqlite3.connect(DB_PATH.as_posix())
-    init_db(conn)
+    if args.fresh and args.resume:
+        logger.info("🚀 Retomando build do zero...")
+    elif args.fresh:
+        logger.info("🚀 Build do zero: carga em tabelas sem índices...")
+        remover_banco(DB_PATH)
+    else:
+        logger.info("🚀 Criando/Atualizando banco de CNPJs...")
+    
+    # isolation_level=None: o modo bulk controla as transações com BEGIN/COMMIT
+    conn = sqlite3.connect(DB_PATH.as_posix(), isolation_level=None if args.bulk else "")
+    
+    if args.fresh:
+        init_db(conn, indices=False)
+        pragmas_carga(conn)
+        recalculado = False
+    else:
+        recalculado = init_db(conn)
 
-    # Importa Empresas
     empresas_zips = sorted(DATA_DIR.glob("Empresas*.zip"))
-    if empresas_zips:
-        logger.info(f"📦 {len(empresas_zips)} arquivos de Empresas encontrados")
-        for zp in empresas_zips:
-            import_empresas_zip(conn, zp)
-        rebuild_fts(conn)
-    
-    # Importa Estabelecimentos
     estab_zips = sorted(DATA_DIR.glob("Estabelecimentos*.zip"))
-    if estab_zips:
-        logger.info(f"📦 {len(estab_zips)} arquivos de Estabelecimentos encontrados")
-        for zp in estab_zips:
-            import_estabelecimentos_zip(conn, zp)
+    socios_zips = sorted(DATA_DIR.glob("Socios*.zip"))
+    logger.info(f"📦 {len(empresas_zips)} arquivos de Empresas, {len(estab_zips)} de Estabelecimentos "
+                f"e {len(socios_zips)} de Sócios encontrados")
+
+    empresas_alteradas = bool(empresas_zips)
+    estab_alterados = bool(estab_zips)
+    municipios_zips = sorted(DATA_DIR.glob("Municipios*.zip"))
+    
+    if not args.incremental and not args.resume:
+        # Nova carga: checkpoints antigos não valem mais. Os zips não ficam
+        # registrados: o próximo --incremental relê todos, mas as linhas já têm
+        # fp/origem e só as que mudaram são regravadas
+        conn.execute("DELETE FROM import_checkpoints")
+        conn.execute("DELETE FROM import_zips")
+
+    with fase("carga", tempos):
+        if args.incremental:
+            empresas_alteradas = incremental_import(conn, empresas_zips, "empresas", args.batch_size) > 0
+            estab_alterados = incremental_import(conn, estab_zips, "estabelecimentos", args.batch_size) > 0
+            incremental_import(conn, socios_zips, "socios", args.batch_size)
+        elif args.workers > 1:
+            # Parsing em paralelo, escrita por um único writer
+            jobs = ([(zp, "empresas") for zp in empresas_zips] +
+                    [(zp, "estabelecimentos") for zp in estab_zips] +
+                    [(zp, "socios") for zp in socios_zips])
+            if jobs:
+                parallel_import(conn, jobs, args.workers, args.batch_size, resume=args.resume)
+        else:
+            # Importa Empresas
+            for zp in empresas_zips:
+                if args.bulk:
+                    bulk_import_zip(conn, zp, "empresas", args.batch_size, args.resume)
+                else:
+                    import_empresas_zip(conn, zp)
+            
+            # Importa Estabelecimentos
+            for zp in estab_zips:
+                if args.bulk:
+                    bulk_import_zip(conn, zp, "estabelecimentos", args.batch_size, args.resume)
+                else:
+                    import_estabelecimentos_zip(conn, zp)
+            
+            # Importa Sócios (tabela nova, sempre em lotes)
+            for zp in socios_zips:
+                bulk_import_zip(conn, zp, "socios", args.batch_size, args.resume)
+
+    if args.fresh:
+        with fase("índices", tempos):
+            create_indexes(conn)
+
+    if empresas_alteradas:
+        with fase("fts", tempos):
+            rebuild_fts(conn)
+    
+    if empresas_alteradas or estab_alterados or nomes_fts_vazio(conn):
+        with fase("trigram", tempos):
+            rebuild_nomes_fts(conn)
+    
+    # Tabela municipios (código IBGE/TOM, nome, UF) refeita quando o Municipios.zip muda;
+    # no --incremental as cidades já gravadas são recalculadas (nas outras cargas
+    # o parse_estabelecimento já usou o zip atual)
+    municipios_alterados = municipios_desatualizados(conn, municipios_zips)
+    if municipios_alterados:
+        with fase("municípios", tempos):
+            if args.incremental and not recalculado:
+                backfill_derivados(conn, telefones=False)
+            Municipios.gravar_tabela(conn)
+            conn.execute("DELETE FROM import_zips WHERE tipo = 'municipios'")
+            for zp, sha in municipios_alterados:
+                if zp is not None:
+                    registrar_zip(conn, zp, "municipios", sha, len(Municipios.carregar_tom()))
+            if conn.in_transaction:
+                conn.commit()
+    
+    # Tabelas de segmentos (exportações/Zoho): recalcula tudo se os dados mudaram,
+    # senão só os segmentos novos ou com definição alterada
+    with fase("segmentos", tempos):
+        Segmentos.atualizar(conn, tudo=empresas_alteradas or estab_alterados or bool(municipios_alterados))
+    
+    if args.fresh:
+        with fase("finalização", tempos):
+            pragmas_finais(conn)
+    
+    if args.parquet:
+        with fase("parquet", tempos):
+            export_parquet(DB_PATH, PARQUET_DIR, args.batch_size)
     
     # Estatísticas
     cur = conn.cursor()
     total_emp = cur.execute("SELECT COUNT(*) FROM empresas").fetchone()[0]
     total_estab = cur.execute("SELECT COUNT(*) FROM estabelecimentos").fetchone()[0]
+    total_socios = cur.execute("SELECT COUNT(*) FROM socios").fetchone()[0]
     
     logger.info(f"✅ Banco atualizado:")
     logger.info(f"   Empresas: {total_emp:,}")
     logger.info(f"   Estabelecimentos: {total_estab:,}")
+    logger.info(f"   Sócios: {total_socios:,}")
     logger.info(f"📍 Localização: {DB_PATH.absolute()}")
     
     conn.close()
+    
+    # Por último: troca o arquivo, então nenhuma conexão do build pode estar aberta
+    if args.snapshot:
+        with fase("snapshot", tempos):
+            cnpj_db.otimizar(DB_PATH)
+    
+    logger.info("⏱️ Tempo por fase: " + ", ".join(f"{k}={v:.1f}s" for k, v in tempos.items()))
     print("=== SCRIPT FINALIZADO ===")
 
 if __name__ == "__main__":
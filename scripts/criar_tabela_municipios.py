@@ -1,65 +1,26 @@
 # scripts/criar_tabela_municipios.py
-import requests
+import sys
+sys.path.append('.')
+
 import sqlite3
 from pathlib import Path
+from scrapers.municipios import Municipios, DATA_DIR
 
-print("🗺️ Baixando tabela de municípios do IBGE...\n")
-
-# API do IBGE com todos os municípios
-url = "https://servicodados.ibge.gov.br/api/v1/localidades/municipios"
-
-response = requests.get(url, timeout=30)
-municipios = response.json()
+print("🗺️ Criando tabela de municípios (IBGE, offline)...\n")
 
-print(f"✅ {len(municipios)} municípios baixados\n")
+# Tabela IBGE empacotada em scrapers/dados; códigos TOM da Receita vêm do
+# Municipios.zip em data/receita (o build_cnpj_db.py já faz isso sozinho)
+tom = Municipios.carregar_tom()
+if not tom:
+    print(f"⚠️ Sem Municipios.zip em {DATA_DIR}: tabela fica sem código TOM\n")
 
-# Cria tabela no banco de CNPJs
 DB = Path("data/cnpj.db")
 conn = sqlite3.connect(DB)
-cur = conn.cursor()
 
-# Cria tabela
-cur.execute("""
-    CREATE TABLE IF NOT EXISTS municipios (
-        codigo_ibge TEXT PRIMARY KEY,
-        nome TEXT,
-        uf TEXT
-    )
-""")
-
-# Insere municípios
 print("💾 Salvando no banco...")
-salvos = 0
-erros = 0
-
-for m in municipios:
-    try:
-        codigo = str(m['id'])
-        nome = m['nome']
-        
-        # Tenta pegar UF de várias formas
-        if 'microrregiao' in m and m['microrregiao']:
-            uf = m['microrregiao']['mesorregiao']['UF']['sigla']
-        elif 'regiao-imediata' in m and m['regiao-imediata']:
-            uf = m['regiao-imediata']['regiao-intermediaria']['UF']['sigla']
-        else:
-            # Pega da própria API (formato alternativo)
-            continue
-        
-        cur.execute("""
-            INSERT OR REPLACE INTO municipios (codigo_ibge, nome, uf)
-            VALUES (?, ?, ?)
-        """, (codigo, nome, uf))
-        
-        salvos += 1
-        
-    except Exception as e:
-        erros += 1
-        continue
-
-conn.commit()
+salvos = Municipios.gravar_tabela(conn)
+com_tom = conn.execute("SELECT COUNT(*) FROM municipios WHERE codigo_tom IS NOT NULL").fetchone()[0]
 conn.close()
 
-print(f"✅ {salvos} municípios salvos")
-if erros > 0:
-    print(f"⚠️ {erros} municípios com erro (ignorados)")
\ No newline at end of file
+print(f"✅ {salvos} municípios salvos ({com_tom} com código TOM da Receita)")
+print("💡 Cidades dos estabelecimentos já importados: rode build_cnpj_db.py --incremental")
@@ -6,13 +6,235 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from database.database import SessionLocal
 from database.models import Lead
 from scrapers.cnpj_enrichment import CNPJEnricher
+from scrapers.cnpj_google import CNPJGoogleSearch
+from scrapers.local_cnpj_search import LocalCNPJSearch
+from scrapers.cache_enriquecimento import CacheEnriquecimento
+from scrapers.http_fetcher import FonteIndisponivel
+from scrapers.rate_limit import TokenBucket
+from collections import namedtuple
+import argparse
 import logging
+import queue
+import threading
 import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def enriquecer_todos():
+LOTE_DB = 20  # leads enriquecidos por commit
+ESPERA_LOTE = 0.2  # segundos esperando um lote encher antes de processar o que já chegou
+
+# Cada fonte tem seu limite e suas threads: uma fonte lenta só segura os leads que estão nela.
+# Com lote > 1, a etapa recebe uma lista de leads (ver Pipeline._trabalhar_lote)
+Fonte = namedtuple("Fonte", "limite threads lote", defaults=(1,))
+FONTES = {
+    'local': Fonte(TokenBucket(None), 2, lote=200),        # banco de CNPJs, sem rede (melhor_match_many)
+    'website': Fonte(TokenBucket(None), 1, lote=100),     # sites em paralelo (async, 2 conexões por domínio)
+    'google': Fonte(TokenBucket.por_minuto(6), 1),         # devagar para não cair no captcha
+    'receitaws': Fonte(TokenBucket.por_minuto(3), 1),      # limite da API: 3 req/min
+}
+
+def _com_cnpj(ctx: dict, cnpj: str, salvar: bool = True):
+    """CNPJ encontrado: sócios do banco local primeiro, ReceitaWS só se faltar"""
+    ctx['cnpj'] = cnpj
+    if salvar:
+        CNPJEnricher.cache.set('cnpj', ctx['chave'], cnpj)
+    
+    ctx['dados'] = CNPJEnricher.buscar_dados_local(cnpj)
+    if ctx['dados'] and ctx['dados']['socios']:
+        return None
+    return 'receitaws'
+
+def etapa_local(lote: list) -> list:
+    """
+    Cache e banco local (nome + cidade/UF) para um lote de leads: os que não
+    estão no cache vão numa só chamada de melhor_match_many (leads da mesma
+    cidade são casados juntos). Retorna a próxima etapa de cada lead, na ordem.
+    """
+    proximas = [None] * len(lote)
+    buscar = []
+    for i, ctx in enumerate(lote):
+        cnpj = CNPJEnricher.cache.get('cnpj', ctx['chave'])
+        if cnpj is CacheEnriquecimento.AUSENTE:
+            buscar.append(i)
+        elif cnpj:
+            proximas[i] = _com_cnpj(ctx, cnpj, salvar=False)
+    
+    if not buscar:
+        return proximas
+    
+    try:
+        resultados = LocalCNPJSearch.melhor_match_many(
+            [(lote[i]['nome'], lote[i]['cidade'], lote[i]['estado']) for i in buscar])
+    except Exception as e:
+        logger.warning(f"  ⚠️ Erro no banco local: {e}")
+        resultados = [None] * len(buscar)
+        for i in buscar:
+            lote[i]['falhou'] = True
+    
+    for i, resultado in zip(buscar, resultados):
+        ctx = lote[i]
+        if resultado:
+            proximas[i] = _com_cnpj(ctx, resultado['cnpj'])
+        else:
+            proximas[i] = 'website' if ctx['website'] else 'google'
+    return proximas
+
+def etapa_website(lote: list) -> list:
+    """
+    CNPJ de matriz no rodapé dos sites de um lote de leads, lidos em paralelo
+    (buscar_cnpj_websites). Sem CNPJ, segue para o Google; site fora do ar ou
+    429/5xx também, mas marcado como falha (não entra no cache negativo).
+    """
+    try:
+        cnpjs = CNPJGoogleSearch.buscar_cnpj_websites(ctx['website'] for ctx in lote)
+    except Exception as e:
+        logger.warning(f"  ⚠️ Erro lendo os sites do lote: {e}")
+        cnpjs = {}
+    
+    proximas = []
+    for ctx in lote:
+        if ctx['website'] not in cnpjs:
+            ctx['falhou'] = True
+            proximas.append('google')
+        elif cnpjs[ctx['website']]:
+            proximas.append(_com_cnpj(ctx, cnpjs[ctx['website']]))
+        else:
+            proximas.append('google')
+    return proximas
+
+def etapa_google(ctx: dict):
+    """
+    Último recurso para achar o CNPJ. Sem resultado, fica no cache negativo
+    só se todas as fontes responderam: 429/captcha ou site fora do ar não.
+    """
+    FONTES['google'].limite.acquire()
+    try:
+        cnpj = CNPJGoogleSearch.buscar_cnpj_google(ctx['nome'], ctx['cidade'])
+    except FonteIndisponivel:
+        return None
+    if cnpj:
+        return _com_cnpj(ctx, cnpj)
+    
+    if not ctx['falhou']:
+        CNPJEnricher.cache.set('cnpj', ctx['chave'], None)
+    return None
+
+def etapa_receitaws(ctx: dict):
+    """Sócios pela ReceitaWS (empresas que não estão no dump local)"""
+    if not CNPJEnricher.cache.contem('dados', CacheEnriquecimento.chave_cnpj(ctx['cnpj'])):
+        FONTES['receitaws'].limite.acquire()
+    ctx['dados'] = CNPJEnricher.buscar_dados_cnpj(ctx['cnpj']) or ctx['dados']
+    return None
+
+ETAPAS = {
+    'local': etapa_local,
+    'website': etapa_website,
+    'google': etapa_google,
+    'receitaws': etapa_receitaws,
+}
+
+class Pipeline:
+    """
+    Uma fila e um grupo de threads por fonte. Cada etapa devolve a próxima
+    (ou None quando o lead terminou), então os leads andam de forma independente
+    e o tempo total tende ao da fonte mais limitada, não à soma das esperas.
+    """
+    
+    def __init__(self):
+        self.filas = {nome: queue.Queue() for nome in ETAPAS}
+        self.concluidos = queue.Queue()
+        self.threads = []
+        
+        for nome, fonte in FONTES.items():
+            alvo = self._trabalhar_lote if fonte.lote > 1 else self._trabalhar
+            for _ in range(fonte.threads):
+                t = threading.Thread(target=alvo, args=(nome,), daemon=True)
+                t.start()
+                self.threads.append(t)
+    
+    def _encaminhar(self, ctx: dict, proxima: str):
+        if proxima:
+            self.filas[proxima].put(ctx)
+        else:
+            self.concluidos.put(ctx)
+    
+    def _trabalhar(self, etapa: str):
+        fila = self.filas[etapa]
+        while True:
+            ctx = fila.get()
+            if ctx is None:
+                return
+            
+            try:
+                proxima = ETAPAS[etapa](ctx)
+            except Exception as e:
+                logger.error(f"  ❌ Erro em {ctx['nome']} ({etapa}): {e}")
+                proxima = None
+            
+            self._encaminhar(ctx, proxima)
+    
+    def _trabalhar_lote(self, etapa: str):
+        """
+        Como _trabalhar, mas junta até FONTES[etapa].lote leads (esperando até
+        ESPERA_LOTE pelos próximos) e chama a etapa uma vez com a lista.
+        """
+        fila, tamanho = self.filas[etapa], FONTES[etapa].lote
+        fim = False
+        while not fim:
+            lote = [fila.get()]
+            if lote[0] is None:
+                return
+            while len(lote) < tamanho:
+                try:
+                    ctx = fila.get(timeout=ESPERA_LOTE)
+                except queue.Empty:
+                    break
+                if ctx is None:
+                    fim = True
+                    break
+                lote.append(ctx)
+            
+            try:
+                proximas = ETAPAS[etapa](lote)
+            except Exception as e:
+                logger.error(f"  ❌ Erro no lote de {len(lote)} leads ({etapa}): {e}")
+                proximas = [None] * len(lote)
+            
+            for ctx, proxima in zip(lote, proximas):
+                self._encaminhar(ctx, proxima)
+    
+    def enviar(self, lead: Lead):
+        self.filas['local'].put({
+            'id': lead.id,
+            'nome': lead.nome,
+            'cidade': lead.cidade,
+            'estado': lead.estado,
+            'website': lead.website,
+            'chave': CacheEnriquecimento.chave_nome(lead.nome, lead.cidade, lead.estado),
+            'cnpj': None,
+            'dados': None,
+            'falhou': False,  # alguma fonte com erro: "não encontrado" não vai para o cache
+        })
+    
+    def fechar(self):
+        for nome, fonte in FONTES.items():
+            for _ in range(fonte.threads):
+                self.filas[nome].put(None)
+        for t in self.threads:
+            t.join()
+
+def atualizar_lead(lead: Lead, dados: dict):
+    """Copia os dados do CNPJ para o lead (sem commit)"""
+    lead.email = dados.get('email') or lead.email
+    lead.contato_nome = dados.get('contato_nome') or lead.contato_nome
+    lead.contato_cargo = dados.get('contato_cargo') or lead.contato_cargo
+    
+    # Telefone do CNPJ pode ser melhor que do Google Maps
+    if dados.get('telefone'):
+        lead.telefone = dados['telefone']
+
+def enriquecer_todos(limite: int = 50):
     """
     Enriquece todos os leads do banco com dados do CNPJ
     """
@@ -23,53 +245,58 @@ def enriquecer_todos():
         # Busca leads sem CNPJ ou sem contato_nome
         leads = db.query(Lead).filter(
             (Lead.contato_nome == None) | (Lead.email == None)
-        ).limit(50).all()  # Começa com 50 para testar
+        ).limit(limite).all()
         
         logger.info(f"🔍 Enriquecendo {len(leads)} leads...")
+        inicio = time.perf_counter()
+        
+        # Threads só tocam em dicts; a sessão do banco fica nesta thread
+        por_id = {lead.id: lead for lead in leads}
+        pipeline = Pipeline()
+        for lead in leads:
+            pipeline.enviar(lead)
         
         enriquecidos = 0
+        pendentes = 0
         
-        for idx, lead in enumerate(leads, 1):
+        for idx in range(1, len(leads) + 1):
+            ctx = pipeline.concluidos.get()
+            lead = por_id[ctx['id']]
+            dados = CNPJEnricher.definir_contato(ctx['dados'])
+            
             logger.info(f"\n[{idx}/{len(leads)}] {lead.nome}")
             
-            try:
-                # Enriquece
-                dados = CNPJEnricher.enriquecer_lead(lead.nome, lead.cidade, lead.website)
-                
-                if dados:
-                    # Atualiza lead
-                    lead.email = dados.get('email') or lead.email
-                    lead.contato_nome = dados.get('contato_nome') or lead.contato_nome
-                    lead.contato_cargo = dados.get('contato_cargo') or lead.contato_cargo
-                    
-                    # Telefone do CNPJ pode ser melhor que do Google Maps
-                    if dados.get('telefone'):
-                        lead.telefone = dados['telefone']
-                    
-                    db.commit()
-                    
-                    enriquecidos += 1
-                    
-                    logger.info(f"  ✅ Enriquecido!")
-                    logger.info(f"     Contato: {lead.contato_nome}")
-                    logger.info(f"     Cargo: {lead.contato_cargo}")
-                    logger.info(f"     Email: {lead.email}")
-                    logger.info(f"     Sócios: {len(dados.get('socios', []))}")
-                else:
-                    logger.warning(f"  ⚠️ CNPJ não encontrado")
-                
-                # Rate limit: 3 req/min na ReceitaWS
-                time.sleep(20)
+            if dados:
+                atualizar_lead(lead, dados)
+                enriquecidos += 1
+                pendentes += 1
                 
-            except Exception as e:
-                logger.error(f"  ❌ Erro: {e}")
-                continue
+                logger.info(f"  ✅ Enriquecido!")
+                logger.info(f"     Contato: {lead.contato_nome}")
+                logger.info(f"     Cargo: {lead.contato_cargo}")
+                logger.info(f"     Email: {lead.email}")
+                logger.info(f"     Sócios: {len(dados.get('socios', []))}")
+            else:
+                logger.warning(f"  ⚠️ CNPJ não encontrado")
+            
+            # Atualizações em lote: um commit a cada LOTE_DB leads
+            if pendentes >= LOTE_DB:
+                db.commit()
+                pendentes = 0
         
-        logger.info(f"\n✅ Enriquecimento concluído!")
-        logger.info(f"   {enriquecidos}/{len(leads)} leads enriquecidos")
+        db.commit()
+        pipeline.fechar()
         
+        decorrido = time.perf_counter() - inicio
+        logger.info(f"\n✅ Enriquecimento concluído!")
+        logger.info(f"   {enriquecidos}/{len(leads)} leads enriquecidos em {decorrido:.1f}s")
+    
     finally:
         db.close()
 
 if __name__ == "__main__":
-    enriquecer_todos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Enriquece leads com CNPJ, sócios e contato")
+    parser.add_argument("--limite", type=int, default=50, help="máximo de leads nesta execução")
+    args = parser.parse_args()
+    
+    enriquecer_todos(args.limite)
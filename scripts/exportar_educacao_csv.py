@@ -1,56 +1,22 @@
 # scripts/exportar_educacao_csv.py
-import sqlite3
+import sys
+sys.path.append('.')
+
 from pathlib import Path
 import csv
+from scrapers.cnpj_db import conectar
+from scrapers.segmentos import Segmentos
 
 print("📚 Exportando INSTITUIÇÕES DE ENSINO para CSV...\n")
 
-conn = sqlite3.connect('data/cnpj.db')
-cur = conn.cursor()
-
-# FILTRO: APENAS instituições de ENSINO (sem institutos diversos)
-query = """
-SELECT 
-    e.razao_social,
-    e.cnpj_basico,
-    es.ddd_1,
-    es.telefone_1,
-    es.ddd_2,
-    es.telefone_2,
-    es.email,
-    m.nome as cidade,
-    es.uf
-FROM empresas e
-JOIN estabelecimentos es ON e.cnpj_basico = es.cnpj_basico
-LEFT JOIN municipios m ON es.municipio = m.codigo_ibge
-WHERE (
-    e.razao_social LIKE '%FACULDADE%' OR
-    e.razao_social LIKE '%UNIVERSIDADE%' OR
-    e.razao_social LIKE '%CENTRO UNIVERSITARIO%' OR
-    (e.razao_social LIKE '%ESCOLA%' AND e.razao_social NOT LIKE '%INSTITUTO%') OR
-    (e.razao_social LIKE '%COLEGIO%' AND e.razao_social NOT LIKE '%INSTITUTO%') OR
-    e.razao_social LIKE '%POLO EAD%' OR
-    e.razao_social LIKE '%POLO EDUCACIONAL%' OR
-    e.razao_social LIKE '%POLO UNIVERSITARIO%' OR
-    e.razao_social LIKE '%ENSINO SUPERIOR%' OR
-    e.razao_social LIKE '%EDUCACAO SUPERIOR%' OR
-    e.razao_social LIKE '%UNOPAR%' OR
-    e.razao_social LIKE '%ANHANGUERA%' OR
-    e.razao_social LIKE '%ESTACIO%' OR
-    e.razao_social LIKE '%UNICESUMAR%' OR
-    e.razao_social LIKE '%PITAGORAS%'
-)
-AND es.cnpj_ordem = '0001'
-AND (
-    (es.ddd_1 IS NOT NULL AND es.telefone_1 IS NOT NULL AND LENGTH(es.ddd_1) >= 2 AND LENGTH(es.telefone_1) >= 8) OR
-    (es.ddd_2 IS NOT NULL AND es.telefone_2 IS NOT NULL AND LENGTH(es.ddd_2) >= 2 AND LENGTH(es.telefone_2) >= 8)
-)
-ORDER BY es.uf, m.nome
-"""
+Segmentos.preparar(nomes=['instituicoes_ensino'])
+conn = conectar()
 
+# FILTRO: APENAS instituições de ENSINO (sem institutos diversos), com telefone válido
 print("🔍 Buscando no banco...\n")
-cur.execute(query)
-leads = cur.fetchall()
+leads = Segmentos.consultar(conn, 'instituicoes_ensino', colunas=(
+    'razao_social', 'cnpj_basico', 'telefone1', 'telefone2', 'email', 'cidade', 'uf'
+)).fetchall()
 
 print(f"✅ {len(leads):,} instituições encontradas\n")
 
@@ -71,10 +37,7 @@ with open(output, 'w', newline='', encoding='utf-8') as f:
     ])
     
     for row in leads:
-        razao, cnpj, ddd1, tel1, ddd2, tel2, email, cidade, uf = row
-        
-        telefone1 = f"55{ddd1}{tel1}" if (ddd1 and tel1) else ""
-        telefone2 = f"55{ddd2}{tel2}" if (ddd2 and tel2) else ""
+        razao, cnpj, telefone1, telefone2, email, cidade, uf = row
         
         writer.writerow([
             razao,
@@ -1,105 +1,51 @@
 # scripts/exportar_educacao_csv_v2.py
-import sqlite3
+import sys
+sys.path.append('.')
+
+import argparse
 from pathlib import Path
-import csv
+from scrapers.exportador import COMPRESSOES, FORMATOS, caminho_saida, exportar
+from scrapers.cnpj_db import conectar
+from scrapers.segmentos import Segmentos
 
-print("📚 Exportando FACULDADES, ESCOLAS e CURSOS...\n")
+parser = argparse.ArgumentParser(description="Exporta o segmento educacao_cursos (streaming, memória constante)")
+parser.add_argument("--formato", choices=FORMATOS, default="csv")
+parser.add_argument("--compressao", choices=COMPRESSOES,
+                    help="gzip ou zstd (CSV/JSONL: arquivo .gz/.zst; Parquet: codec das colunas)")
+args = parser.parse_args()
 
-conn = sqlite3.connect('data/cnpj.db')
-cur = conn.cursor()
+print("📚 Exportando FACULDADES, ESCOLAS e CURSOS...\n")
 
-# FILTRO SIMPLIFICADO: Apenas faculdades, escolas, cursos, idiomas
-query = """
-SELECT 
-    e.razao_social,
-    e.cnpj_basico,
-    es.ddd_1,
-    es.telefone_1,
-    es.ddd_2,
-    es.telefone_2,
-    es.email,
-    m.nome as cidade,
-    es.uf
-FROM empresas e
-JOIN estabelecimentos es ON e.cnpj_basico = es.cnpj_basico
-LEFT JOIN municipios m ON es.municipio = m.codigo_ibge
-WHERE (
-    e.razao_social LIKE '%FACULDADE%' OR
-    e.razao_social LIKE '%UNIVERSIDADE%' OR
-    e.razao_social LIKE '%ESCOLA%' OR
-    e.razao_social LIKE '%COLEGIO%' OR
-    e.razao_social LIKE '%CURSO%' OR
-    e.razao_social LIKE '%IDIOMA%'
-)
-AND es.cnpj_ordem = '0001'
-AND (
-    (es.ddd_1 IS NOT NULL AND es.telefone_1 IS NOT NULL AND LENGTH(es.ddd_1) >= 2 AND LENGTH(es.telefone_1) >= 8) OR
-    (es.ddd_2 IS NOT NULL AND es.telefone_2 IS NOT NULL AND LENGTH(es.ddd_2) >= 2 AND LENGTH(es.telefone_2) >= 8)
-)
-ORDER BY es.uf, m.nome
-"""
+Segmentos.preparar(nomes=['educacao_cursos'])
+conn = conectar()
 
+# FILTRO SIMPLIFICADO: Apenas faculdades, escolas, cursos, idiomas (com telefone válido)
 print("🔍 Buscando no banco...\n")
-cur.execute(query)
-leads = cur.fetchall()
-
-print(f"✅ {len(leads):,} instituições encontradas\n")
-
-# Salva CSV
-output = Path('data/educacao_faculdades_escolas_cursos.csv')
-output.parent.mkdir(parents=True, exist_ok=True)
-
-with open(output, 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f)
-    writer.writerow([
-        'Razão Social', 
-        'CNPJ', 
-        'Telefone 1', 
-        'Telefone 2', 
-        'Email', 
-        'Cidade', 
-        'UF'
-    ])
-    
-    com_telefone = 0
-    com_email = 0
-    
-    for row in leads:
-        razao, cnpj, ddd1, tel1, ddd2, tel2, email, cidade, uf = row
-        
-        telefone1 = f"55{ddd1}{tel1}" if (ddd1 and tel1) else ""
-        telefone2 = f"55{ddd2}{tel2}" if (ddd2 and tel2) else ""
-        
-        if telefone1 or telefone2:
-            com_telefone += 1
-        if email:
-            com_email += 1
-        
-        writer.writerow([
-            razao,
-            cnpj,
-            telefone1,
-            telefone2,
-            email or "",
-            cidade or uf,
-            uf
-        ])
+cursor = Segmentos.consultar(conn, 'educacao_cursos', colunas=(
+    'razao_social', 'cnpj_basico', 'telefone1', 'telefone2', 'email', 'cidade', 'uf'
+))
+
+# Escreve em lotes (fetchmany) e conta telefones/emails/UFs enquanto grava
+output = caminho_saida(Path('data/educacao_faculdades_escolas_cursos'), args.formato, args.compressao)
+stats = exportar(
+    cursor, output, compressao=args.compressao,
+    cabecalho=['Razão Social', 'CNPJ', 'Telefone 1', 'Telefone 2', 'Email', 'Cidade', 'UF'],
+    transformar=lambda r: (r[0], r[1], r[2], r[3], r[4] or "", r[5] or r[6], r[6]),
+)
 
 conn.close()
 
-print(f"✅ CSV salvo em: {output.absolute()}")
+print(f"✅ {stats.total:,} instituições exportadas para: {output.absolute()}")
 print(f"\n📊 Estatísticas:")
-print(f"   Total: {len(leads):,}")
-print(f"   Com telefone: {com_telefone:,} ({com_telefone/len(leads)*100:.1f}%)")
-print(f"   Com email: {com_email:,} ({com_email/len(leads)*100:.1f}%)")
+print(f"   Total: {stats.total:,}")
+print(f"   Com telefone: {stats.com_telefone:,} ({stats.percentual(stats.com_telefone):.1f}%)")
+print(f"   Com email: {stats.com_email:,} ({stats.percentual(stats.com_email):.1f}%)")
 
-# Mostra distribuição por UF
-import pandas as pd
-df = pd.read_csv(output)
 print(f"\n📍 Top 10 Estados:")
-print(df['UF'].value_counts().head(10))
+for uf, total in stats.por_uf.most_common(10):
+    print(f"   {uf}: {total:,}")
 
-print(f"\n💰 Potencial de receita (R$ 2/lead): R$ {com_telefone * 2:,}")
+print(f"\n💰 Potencial de receita (R$ 2/lead): R$ {stats.com_telefone * 2:,}")
 
 print(f"\n💡 Para importar no Google Sheets:")
 print(f"   1. Abra: https://sheets.google.com")
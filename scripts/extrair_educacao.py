@@ -1,47 +1,25 @@
 # scripts/extrair_educacao.py
-import sqlite3
+import sys
+sys.path.append('.')
+
 from pathlib import Path
 import csv
+from scrapers.cnpj_db import conectar
+from scrapers.segmentos import Segmentos
 
 DB = Path("data/cnpj.db")
 OUTPUT = Path("data/educacao_brasil.csv")
 
 print("🎓 Extraindo empresas de EDUCAÇÃO do Brasil...\n")
 
-conn = sqlite3.connect(DB.as_posix())
+Segmentos.preparar(DB, ['educacao'])
+conn = conectar(DB)
 cur = conn.cursor()
 
-# Busca empresas com palavras-chave de educação
-palavras_chave = [
-    '%ESCOLA%',
-    '%COLEGIO%',
-    '%UNIVERSIDADE%',
-    '%FACULDADE%',
-    '%CURSO%',
-    '%ENSINO%',
-    '%EDUCACAO%',
-    '%IDIOMAS%'
-]
-
-query = """
-    SELECT 
-        e.razao_social,
-        e.cnpj_basico,
-        es.ddd_1,
-        es.telefone_1,
-        es.ddd_2,
-        es.telefone_2,
-        es.email,
-        es.municipio,
-        es.uf
-    FROM empresas e
-    JOIN estabelecimentos es ON e.cnpj_basico = es.cnpj_basico
-    WHERE ({})
-    AND es.cnpj_ordem = '0001'
-    ORDER BY es.uf, es.municipio
-""".format(' OR '.join([f'e.razao_social LIKE ?' for _ in palavras_chave]))
-
-cur.execute(query, palavras_chave)
+# Escola, colégio, faculdade, curso, ensino... (definição em scrapers/segmentos.py)
+cur = Segmentos.consultar(conn, 'educacao', colunas=(
+    'razao_social', 'cnpj_basico', 'telefone1', 'telefone2', 'email', 'cidade', 'municipio', 'uf'
+))
 
 OUTPUT.parent.mkdir(parents=True, exist_ok=True)
 
@@ -53,12 +31,9 @@ with open(OUTPUT, 'w', newline='', encoding='utf-8') as f:
     com_telefone = 0
     
     for row in cur:
-        razao, cnpj, ddd1, tel1, ddd2, tel2, email, municipio, uf = row
-        
-        telefone1 = f"55{ddd1}{tel1}" if (ddd1 and tel1) else ""
-        telefone2 = f"55{ddd2}{tel2}" if (ddd2 and tel2) else ""
+        razao, cnpj, telefone1, telefone2, email, cidade, municipio, uf = row
         
-        writer.writerow([razao, cnpj, telefone1, telefone2, email, municipio, uf])
+        writer.writerow([razao, cnpj, telefone1, telefone2, email, cidade or municipio, uf])
         
         total += 1
         if telefone1 or telefone2:
@@ -1,35 +1,25 @@
 # scripts/extrair_imobiliarias.py
-import sqlite3
+import sys
+sys.path.append('.')
+
 from pathlib import Path
 import csv
+from scrapers.cnpj_db import conectar
+from scrapers.segmentos import Segmentos
 
 DB = Path("data/cnpj.db")
 OUTPUT = Path("data/imobiliarias_brasil.csv")
 
 print("🏢 Extraindo TODAS as imobiliárias do Brasil...\n")
 
-conn = sqlite3.connect(DB.as_posix())
-cur = conn.cursor()
+# Segmento pronto antes; depois o banco é lido em modo snapshot (imutável, mmap)
+Segmentos.preparar(DB, ['imobiliarias'])
+conn = conectar(DB)
 
-# Busca TODAS as imobiliárias com JOIN na tabela de municípios
-cur.execute("""
-    SELECT 
-        e.razao_social,
-        e.cnpj_basico,
-        es.ddd_1,
-        es.telefone_1,
-        es.ddd_2,
-        es.telefone_2,
-        es.email,
-        COALESCE(m.nome, es.municipio) as municipio,
-        es.uf
-    FROM empresas e
-    JOIN estabelecimentos es ON e.cnpj_basico = es.cnpj_basico
-    LEFT JOIN municipios m ON es.municipio = m.codigo_ibge
-    WHERE e.razao_social LIKE '%IMOBILI%'
-    AND es.cnpj_ordem = '0001'
-    ORDER BY es.uf, municipio
-""")
+# Segmento materializado no build (tabela segmento_imobiliarias, já indexada)
+cur = Segmentos.consultar(conn, 'imobiliarias', colunas=(
+    'razao_social', 'cnpj_basico', 'telefone1', 'telefone2', 'email', 'cidade', 'municipio', 'uf'
+))
 
 OUTPUT.parent.mkdir(parents=True, exist_ok=True)
 
@@ -41,13 +31,9 @@ with open(OUTPUT, 'w', newline='', encoding='utf-8') as f:
     com_telefone = 0
     
     for row in cur:
-        razao, cnpj, ddd1, tel1, ddd2, tel2, email, municipio, uf = row
-        
-        # Formata telefones
-        telefone1 = f"55{ddd1}{tel1}" if (ddd1 and tel1) else ""
-        telefone2 = f"55{ddd2}{tel2}" if (ddd2 and tel2) else ""
+        razao, cnpj, telefone1, telefone2, email, cidade, municipio, uf = row
         
-        writer.writerow([razao, cnpj, telefone1, telefone2, email, municipio, uf])
+        writer.writerow([razao, cnpj, telefone1, telefone2, email, cidade or municipio, uf])
         
         total += 1
         if telefone1 or telefone2:
@@ -7,7 +7,8 @@ from dotenv import load_dotenv
 import time
 import json
 from pathlib import Path
-import sqlite3
+from scrapers.cnpj_db import conectar
+from scrapers.segmentos import Segmentos
 
 load_dotenv()
 
@@ -30,42 +31,14 @@ print("📚 Importando INSTITUIÇÕES DE ENSINO para Zoho CRM\n")
 zoho = ZohoCRM()
 
 # Conecta no banco SQLite
-conn = sqlite3.connect('data/cnpj.db')
-cur = conn.cursor()
-
-# Busca instituições de ensino COM TELEFONE VÁLIDO
-query = """
-SELECT 
-    e.razao_social,
-    e.cnpj_basico,
-    es.ddd_1,
-    es.telefone_1,
-    es.email,
-    m.nome as cidade,
-    es.uf
-FROM empresas e
-JOIN estabelecimentos es ON e.cnpj_basico = es.cnpj_basico
-LEFT JOIN municipios m ON es.municipio = m.codigo_ibge
-WHERE (
-    e.razao_social LIKE '%FACULDADE%' OR
-    e.razao_social LIKE '%UNIVERSIDADE%' OR
-    e.razao_social LIKE '%POLO%' OR
-    e.razao_social LIKE '%CENTRO UNIVERSITARIO%' OR
-    e.razao_social LIKE '%INSTITUTO%' OR
-    e.razao_social LIKE '%ENSINO SUPERIOR%'
-)
-AND es.cnpj_ordem = '0001'
-AND es.ddd_1 IS NOT NULL 
-AND es.telefone_1 IS NOT NULL
-AND LENGTH(es.ddd_1) >= 2
-AND LENGTH(es.telefone_1) >= 8
-ORDER BY es.uf, m.nome
-LIMIT 10000
-"""
+Segmentos.preparar(nomes=['ensino_superior'])
+conn = conectar()
 
+# Instituições de ensino COM TELEFONE VÁLIDO (segmento ensino_superior)
 print("🔍 Buscando instituições no banco...\n")
-cur.execute(query)
-leads = cur.fetchall()
+leads = Segmentos.consultar(conn, 'ensino_superior', colunas=(
+    'razao_social', 'cnpj_basico', 'telefone1', 'email', 'cidade', 'uf'
+), telefone='principal', limite=10000).fetchall()
 
 print(f"✅ {len(leads):,} instituições encontradas com telefone válido\n")
 
@@ -80,7 +53,7 @@ contador = 0
 for row in leads:
     contador += 1
     
-    razao, cnpj, ddd, tel, email, cidade, uf = row
+    razao, cnpj, telefone, email, cidade, uf = row
     
     # ID único
     id_temp = f"{cnpj}_{uf}"
@@ -94,9 +67,6 @@ for row in leads:
         print(f"\n⚠️ Limite diário atingido ({LIMITE_DIARIO})")
         break
     
-    # Formata telefone
-    telefone = f"55{ddd}{tel}"
-    
     nome_display = razao[:40] + "..." if len(razao) > 40 else razao
     print(f"[{contador}/{len(leads)}] {uf} | {nome_display}", end=" | ")
     
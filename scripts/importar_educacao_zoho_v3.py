@@ -7,7 +7,8 @@ from dotenv import load_dotenv
 import time
 import json
 from pathlib import Path
-import sqlite3
+from scrapers.cnpj_db import conectar
+from scrapers.segmentos import Segmentos
 
 load_dotenv()
 
@@ -28,51 +29,14 @@ def salvar_progresso(importados):
 print("📚 Importando APENAS INSTITUIÇÕES DE ENSINO para Zoho CRM\n")
 
 zoho = ZohoCRM()
-conn = sqlite3.connect('data/cnpj.db')
-cur = conn.cursor()
-
-# FILTRO RESTRITO: APENAS palavras relacionadas a ENSINO
-query = """
-SELECT 
-    e.razao_social,
-    e.cnpj_basico,
-    es.ddd_1,
-    es.telefone_1,
-    es.email,
-    m.nome as cidade,
-    es.uf
-FROM empresas e
-JOIN estabelecimentos es ON e.cnpj_basico = es.cnpj_basico
-LEFT JOIN municipios m ON es.municipio = m.codigo_ibge
-WHERE (
-    e.razao_social LIKE '%FACULDADE%' OR
-    e.razao_social LIKE '%UNIVERSIDADE%' OR
-    e.razao_social LIKE '%CENTRO UNIVERSITARIO%' OR
-    (e.razao_social LIKE '%ESCOLA%' AND e.razao_social NOT LIKE '%INSTITUTO%') OR
-    (e.razao_social LIKE '%COLEGIO%' AND e.razao_social NOT LIKE '%INSTITUTO%') OR
-    e.razao_social LIKE '%POLO EAD%' OR
-    e.razao_social LIKE '%POLO EDUCACIONAL%' OR
-    e.razao_social LIKE '%POLO UNIVERSITARIO%' OR
-    e.razao_social LIKE '%ENSINO SUPERIOR%' OR
-    e.razao_social LIKE '%EDUCACAO SUPERIOR%' OR
-    e.razao_social LIKE '%UNOPAR%' OR
-    e.razao_social LIKE '%ANHANGUERA%' OR
-    e.razao_social LIKE '%ESTACIO%' OR
-    e.razao_social LIKE '%UNICESUMAR%' OR
-    e.razao_social LIKE '%PITAGORAS%'
-)
-AND es.cnpj_ordem = '0001'
-AND es.ddd_1 IS NOT NULL 
-AND es.telefone_1 IS NOT NULL
-AND LENGTH(es.ddd_1) >= 2
-AND LENGTH(es.telefone_1) >= 8
-ORDER BY es.uf, m.nome
-LIMIT 10000
-"""
+Segmentos.preparar(nomes=['instituicoes_ensino'])
+conn = conectar()
 
+# FILTRO RESTRITO: APENAS palavras relacionadas a ENSINO, com telefone 1 válido
 print("🔍 Buscando APENAS instituições de ENSINO...\n")
-cur.execute(query)
-leads = cur.fetchall()
+leads = Segmentos.consultar(conn, 'instituicoes_ensino', colunas=(
+    'razao_social', 'cnpj_basico', 'telefone1', 'email', 'cidade', 'uf'
+), telefone='principal', limite=10000).fetchall()
 
 print(f"✅ {len(leads):,} instituições de ENSINO encontradas\n")
 
@@ -86,7 +50,7 @@ contador = 0
 for row in leads:
     contador += 1
     
-    razao, cnpj, ddd, tel, email, cidade, uf = row
+    razao, cnpj, telefone, email, cidade, uf = row
     id_temp = f"{cnpj}_{uf}"
     
     if id_temp in ja_importados:
@@ -96,7 +60,6 @@ for row in leads:
         print(f"\n⚠️ Limite diário atingido ({LIMITE_DIARIO})")
         break
     
-    telefone = f"55{ddd}{tel}"
     nome_display = razao[:40] + "..." if len(razao) > 40 else razao
     
     print(f"[{contador}/{len(leads)}] {uf} | {nome_display}", end=" | ")
@@ -0,0 +1,30 @@
+# scripts/mercado_por_uf.py
+import sys
+sys.path.append('.')
+
+import argparse
+from scrapers.cnpj_parquet import CNPJParquet, PARQUET_DIR
+
+parser = argparse.ArgumentParser(
+    description="Tamanho do mercado por UF: estabelecimentos ativos de um CNAE, com telefone e celular (Parquet)")
+parser.add_argument("cnaes", nargs="+", help="prefixos de CNAE (ex.: 6821 6822, ou 85 para toda a educação)")
+parser.add_argument("--uf", nargs="+", help="só estas UFs")
+parser.add_argument("--secundarios", action="store_true", help="conta também quem tem o CNAE como secundário")
+parser.add_argument("--matriz", action="store_true", help="só matrizes (0001)")
+args = parser.parse_args()
+
+if not CNPJParquet.disponivel():
+    print(f"❌ Parquet não encontrado em {PARQUET_DIR} (rode build_cnpj_db.py --parquet e instale o pyarrow)")
+    sys.exit(1)
+
+print(f"📊 Estabelecimentos ativos com CNAE {', '.join(args.cnaes)} por UF...\n")
+
+df = CNPJParquet.contar_por_uf(args.cnaes, ufs=args.uf, secundarios=args.secundarios,
+                               apenas_matriz=args.matriz)
+
+print(f"  {'UF':4s} {'total':>12s} {'c/ telefone':>12s} {'c/ celular':>12s}")
+for uf, total, telefone, celular in df.itertuples(index=False, name=None):
+    print(f"  {uf or '--':4s} {total:>12,} {telefone:>12,} {celular:>12,}")
+
+print(f"\n✅ Total: {df['estabelecimentos'].sum():,} estabelecimentos em {len(df)} UFs")
+print(f"   Com telefone: {df['com_telefone'].sum():,} | Com celular: {df['com_celular'].sum():,}")
@@ -0,0 +1,81 @@
+# test_build_incremental.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import sqlite3
+import tempfile
+import zipfile
+from pathlib import Path
+
+import build_cnpj_db
+
+def _criar_zip(pasta: Path, nome: str, empresas: dict) -> Path:
+    """Zip de Empresas no formato da Receita (;, latin1) com {cnpj_basico: razão social}"""
+    csv = "".join(f'"{cnpj}";"{razao}";"2062";"49";"1000,00";"01";""\n' for cnpj, razao in empresas.items())
+    caminho = pasta / nome
+    with zipfile.ZipFile(caminho, "w") as z:
+        z.writestr(nome.replace(".zip", ".EMPRECSV"), csv.encode("latin1"))
+    return caminho
+
+def _banco(pasta: Path):
+    conn = sqlite3.connect((pasta / "cnpj.db").as_posix(), isolation_level=None)
+    build_cnpj_db.init_db(conn)
+    return conn
+
+def test_bulk_grava_fingerprint_e_origem():
+    """A carga em lotes grava fp e origem: o primeiro --incremental não regrava nada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        empresas = {f"{i:08d}": f"EMPRESA {i}" for i in range(500)}
+        zp = _criar_zip(pasta, "Empresas0.zip", empresas)
+        conn = _banco(pasta)
+
+        build_cnpj_db.bulk_import_zip(conn, zp, "empresas", batch_size=100)
+        sem_fp = conn.execute("SELECT COUNT(*) FROM empresas WHERE fp IS NULL OR origem IS NULL").fetchone()[0]
+        assert sem_fp == 0, f"{sem_fp} linhas sem fp/origem"
+
+        escritas = build_cnpj_db.incremental_import(conn, [zp], "empresas", batch_size=100)
+        assert escritas == 0, f"incremental regravou {escritas} linhas inalteradas"
+        conn.close()
+
+def test_incremental_detecta_alteracoes_e_remocoes():
+    """Zip alterado: grava só as linhas novas/alteradas e apaga as que sumiram"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        empresas = {f"{i:08d}": f"EMPRESA {i}" for i in range(300)}
+        zp = _criar_zip(pasta, "Empresas0.zip", empresas)
+        conn = _banco(pasta)
+
+        assert build_cnpj_db.incremental_import(conn, [zp], "empresas", batch_size=50) == 300
+
+        # Zip inalterado: pulado pelo hash
+        assert build_cnpj_db.incremental_import(conn, [zp], "empresas", batch_size=50) == 0
+
+        # Mês seguinte: 1 alterada, 2 removidas, 1 nova
+        empresas["00000007"] = "EMPRESA 7 RENOMEADA"
+        del empresas["00000010"], empresas["00000011"]
+        empresas["99999999"] = "EMPRESA NOVA"
+        zp = _criar_zip(pasta, "Empresas0.zip", empresas)
+
+        escritas = build_cnpj_db.incremental_import(conn, [zp], "empresas", batch_size=50)
+        assert escritas == 4, escritas
+
+        razao = dict(conn.execute("SELECT cnpj_basico, razao_social FROM empresas"))
+        assert razao["00000007"] == "EMPRESA 7 RENOMEADA"
+        assert "00000010" not in razao and "00000011" not in razao
+        assert razao["99999999"] == "EMPRESA NOVA"
+        assert len(razao) == 299
+
+        # Zip que sumiu do dump: as linhas dele são apagadas
+        outro = _criar_zip(pasta, "Empresas1.zip", {"88888888": "EMPRESA DO OUTRO ZIP"})
+        build_cnpj_db.incremental_import(conn, [zp, outro], "empresas", batch_size=50)
+        assert conn.execute("SELECT COUNT(*) FROM empresas WHERE cnpj_basico = '88888888'").fetchone()[0] == 1
+        assert build_cnpj_db.incremental_import(conn, [outro], "empresas", batch_size=50) == 299
+        assert [r[0] for r in conn.execute("SELECT cnpj_basico FROM empresas")] == ["88888888"]
+        conn.close()
+
+if __name__ == "__main__":
+    test_bulk_grava_fingerprint_e_origem()
+    test_incremental_detecta_alteracoes_e_remocoes()
+    print("✅ Testes do modo incremental passaram")
@@ -0,0 +1,41 @@
+# test_build_indices.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import build_cnpj_db
+
+def _plano(conn, sql: str) -> str:
+    return " ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+def test_indice_contato_busca_por_celular():
+    """Matrizes com celular na UF: busca nas três colunas de idx_estab_contato"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect((Path(tmp) / "cnpj.db").as_posix(), isolation_level=None)
+        build_cnpj_db.init_db(conn)
+
+        plano = _plano(conn, "SELECT COUNT(*) FROM estabelecimentos "
+                             "WHERE cnpj_ordem = '0001' AND uf = 'PB' AND tem_celular = 1")
+        assert "idx_estab_contato (cnpj_ordem=? AND uf=? AND tem_celular=?)" in plano, plano
+        conn.close()
+
+def test_indice_contato_antigo_e_recriado():
+    """Banco com o índice na ordem antiga (tem_telefone antes): init_db recria na ordem nova"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect((Path(tmp) / "cnpj.db").as_posix(), isolation_level=None)
+        build_cnpj_db.init_db(conn, indices=False)
+        conn.execute("CREATE INDEX idx_estab_contato ON estabelecimentos(cnpj_ordem, uf, tem_telefone, tem_celular)")
+
+        build_cnpj_db.init_db(conn)
+        colunas = tuple(r[2] for r in conn.execute("PRAGMA index_info(idx_estab_contato)"))
+        assert colunas == build_cnpj_db.COLUNAS_IDX_CONTATO == ("cnpj_ordem", "uf", "tem_celular", "tem_telefone")
+        conn.close()
+
+if __name__ == "__main__":
+    test_indice_contato_busca_por_celular()
+    test_indice_contato_antigo_e_recriado()
+    print("✅ Testes de índices passaram")
@@ -0,0 +1,63 @@
+# test_build_paralelo.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import build_cnpj_db
+
+def _criar_zip(pasta: Path, nome: str, linhas: int) -> Path:
+    """Zip de Empresas no formato da Receita (;, latin1)"""
+    csv = "".join(f'"{i:08d}";"EMPRESA TESTE {i}";"2062";"49";"1000,00";"01";""\n' for i in range(linhas))
+    caminho = pasta / nome
+    with zipfile.ZipFile(caminho, "w") as z:
+        z.writestr(nome.replace(".zip", ".EMPRECSV"), csv.encode("latin1"))
+    return caminho
+
+def test_parallel_import_erro_no_writer_nao_trava():
+    """Se o writer falha com a fila cheia, parallel_import propaga o erro sem travar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        jobs = [(_criar_zip(pasta, f"Empresas{i}.zip", 5_000), "empresas") for i in range(2)]
+        conn = sqlite3.connect((pasta / "cnpj.db").as_posix(), isolation_level=None, check_same_thread=False)
+        build_cnpj_db.init_db(conn, indices=False)
+
+        original = build_cnpj_db.write_batch
+        chamadas = []
+
+        def write_batch_com_falha(*args, **kwargs):
+            chamadas.append(1)
+            if len(chamadas) == 2:
+                raise RuntimeError("falha simulada no lote 2")
+            return original(*args, **kwargs)
+
+        resultado = {}
+
+        def rodar():
+            try:
+                build_cnpj_db.parallel_import(conn, jobs, workers=2, batch_size=100, queue_size=1)
+            except RuntimeError as e:
+                resultado["erro"] = e
+
+        build_cnpj_db.write_batch = write_batch_com_falha
+        try:
+            inicio = time.perf_counter()
+            t = threading.Thread(target=rodar, daemon=True)
+            t.start()
+            t.join(timeout=60)
+            assert not t.is_alive(), "parallel_import travou após erro no writer"
+        finally:
+            build_cnpj_db.write_batch = original
+            conn.close()
+
+        assert "falha simulada" in str(resultado.get("erro")), resultado
+        print(f"✅ Erro propagado em {time.perf_counter() - inicio:.1f}s")
+
+if __name__ == "__main__":
+    test_parallel_import_erro_no_writer_nao_trava()
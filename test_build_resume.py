@@ -0,0 +1,90 @@
+# test_build_resume.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import sqlite3
+import tempfile
+import zipfile
+from pathlib import Path
+
+import build_cnpj_db
+
+def _criar_zip(pasta: Path, nome: str, linhas: int) -> Path:
+    """Zip de Empresas no formato da Receita (;, latin1)"""
+    csv = "".join(f'"{i:08d}";"EMPRESA TESTE {i}";"2062";"49";"1000,00";"01";""\n' for i in range(linhas))
+    caminho = pasta / nome
+    with zipfile.ZipFile(caminho, "w") as z:
+        z.writestr(nome.replace(".zip", ".EMPRECSV"), csv.encode("latin1"))
+    return caminho
+
+def test_resume_continua_do_checkpoint():
+    """Carga interrompida no meio: --resume retoma do último lote gravado, sem reler o início"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        zp = _criar_zip(pasta, "Empresas0.zip", 1_000)
+        conn = sqlite3.connect((pasta / "cnpj.db").as_posix(), isolation_level=None)
+        build_cnpj_db.init_db(conn, indices=False)
+
+        original = build_cnpj_db.write_batch
+        lotes = []
+
+        def write_batch_com_falha(conn, tipo, batch, checkpoint=None):
+            if len(lotes) == 4:
+                raise RuntimeError("processo morto no lote 5")
+            lotes.append(batch[0][0])
+            return original(conn, tipo, batch, checkpoint)
+
+        build_cnpj_db.write_batch = write_batch_com_falha
+        try:
+            build_cnpj_db.bulk_import_zip(conn, zp, "empresas", batch_size=100)
+        except RuntimeError:
+            pass
+        finally:
+            build_cnpj_db.write_batch = original
+
+        # Só os lotes commitados ficaram, e o checkpoint aponta para o fim do 4º
+        assert conn.execute("SELECT COUNT(*) FROM empresas").fetchone()[0] == 400
+        cp = build_cnpj_db.ler_checkpoint(conn, zp)
+        assert cp.posicao.linha == 400 and not cp.concluido, cp
+
+        lotes.clear()
+
+        def write_batch_registrando(conn, tipo, batch, checkpoint=None):
+            lotes.append(batch[0][0])
+            return original(conn, tipo, batch, checkpoint)
+
+        build_cnpj_db.write_batch = write_batch_registrando
+        try:
+            total = build_cnpj_db.bulk_import_zip(conn, zp, "empresas", batch_size=100, resume=True)
+        finally:
+            build_cnpj_db.write_batch = original
+
+        assert total == 600, total
+        assert lotes[0] == "00000400", lotes
+        assert conn.execute("SELECT COUNT(*) FROM empresas").fetchone()[0] == 1_000
+        assert build_cnpj_db.ler_checkpoint(conn, zp).concluido
+
+        # Zip concluído: um novo --resume pula o arquivo
+        assert build_cnpj_db.bulk_import_zip(conn, zp, "empresas", batch_size=100, resume=True) == 0
+        conn.close()
+
+def test_resume_ignora_checkpoint_de_zip_alterado():
+    """Checkpoint de um zip com outro tamanho não vale: a carga recomeça do início"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        zp = _criar_zip(pasta, "Empresas0.zip", 300)
+        conn = sqlite3.connect((pasta / "cnpj.db").as_posix(), isolation_level=None)
+        build_cnpj_db.init_db(conn, indices=False)
+
+        build_cnpj_db.bulk_import_zip(conn, zp, "empresas", batch_size=100)
+        zp = _criar_zip(pasta, "Empresas0.zip", 500)
+
+        assert build_cnpj_db.ler_checkpoint(conn, zp) is None
+        assert build_cnpj_db.bulk_import_zip(conn, zp, "empresas", batch_size=100, resume=True) == 500
+        conn.close()
+
+if __name__ == "__main__":
+    test_resume_continua_do_checkpoint()
+    test_resume_ignora_checkpoint_de_zip_alterado()
+    print("✅ Testes do --resume passaram")
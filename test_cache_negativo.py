@@ -0,0 +1,152 @@
+# test_cache_negativo.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import functools
+import tempfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+from scrapers import http_fetcher
+from scrapers.cache_enriquecimento import CacheEnriquecimento, TTLS
+from scrapers.cnpj_utils import cnpj_matriz
+from scrapers.http_fetcher import Fetcher
+
+CNPJ = cnpj_matriz("11222333")
+
+def _transporte(respostas: dict, chamadas: list):
+    """MockTransport: {host: status ou texto}; hosts fora do dict dão erro de conexão"""
+    def handler(request):
+        chamadas.append(request.url.host)
+        resposta = respostas.get(request.url.host)
+        if resposta is None:
+            raise httpx.ConnectError("conexão recusada", request=request)
+        if isinstance(resposta, int):
+            return httpx.Response(resposta)
+        return httpx.Response(200, text=resposta, headers={"content-type": "text/html"})
+    return handler
+
+@pytest.fixture
+def rede(monkeypatch):
+    """Fetcher síncrono e AsyncFetcher falando com um MockTransport; retorna (respostas, chamadas)"""
+    respostas, chamadas = {}, []
+    handler = _transporte(respostas, chamadas)
+
+    async def handler_async(request):
+        return handler(request)
+
+    monkeypatch.setattr(Fetcher, "_cliente", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(http_fetcher.httpx, "AsyncClient",
+                        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler_async)))
+    return respostas, chamadas
+
+@pytest.fixture
+def cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheEnriquecimento(Path(tmp) / "cache.db", maxsize=2)
+        yield cache
+        cache.fechar()
+
+def test_cache_guarda_negativo_com_ttl_menor(cache):
+    """None é resultado (negativo), diferente de AUSENTE, e vence antes do positivo"""
+    assert cache.get("cnpj", "X|CIDADE|PB") is CacheEnriquecimento.AUSENTE
+
+    cache.set("cnpj", "X|CIDADE|PB", None)
+    cache.set("cnpj", "Y|CIDADE|PB", CNPJ)
+    assert cache.get("cnpj", "X|CIDADE|PB") is None
+    assert cache.contem("cnpj", "X|CIDADE|PB")
+
+    expira = dict(((t, c), e) for t, c, e in cache._conexao().execute("SELECT tipo, chave, expira_em FROM cache"))
+    negativo, positivo = expira[("cnpj", "X|CIDADE|PB")], expira[("cnpj", "Y|CIDADE|PB")]
+    assert positivo - negativo == pytest.approx(TTLS["cnpj"][0] - TTLS["cnpj"][1], abs=5)
+
+    # Fora do LRU (maxsize=2) continua no disco; vencido vira AUSENTE
+    cache.set("dados", CNPJ, {"socios": []})
+    cache.set("cnpj", "Z|CIDADE|PB", None, ttl=-1)
+    assert cache.get("cnpj", "X|CIDADE|PB") is None
+    assert cache.get("cnpj", "Z|CIDADE|PB") is CacheEnriquecimento.AUSENTE
+    assert cache.limpar_expirados() == 1
+
+    # Outra instância (próxima execução) lê do disco
+    outra = CacheEnriquecimento(cache.db_path)
+    assert outra.get("cnpj", "Y|CIDADE|PB") == CNPJ
+    assert outra.get("cnpj", "X|CIDADE|PB") is None
+    outra.fechar()
+
+def test_busca_so_cacheia_negativo_quando_todas_as_fontes_responderam(cache, rede, monkeypatch):
+    """CNPJEnricher: 429 do Google ou site fora do ar não viram "não encontrado" no cache"""
+    pytest.importorskip("requests")
+    from scrapers import cnpj_enrichment
+    from scrapers.cnpj_enrichment import CNPJEnricher
+    from scrapers.local_cnpj_search import LocalCNPJSearch
+
+    respostas, chamadas = rede
+    monkeypatch.setattr(CNPJEnricher, "cache", cache)
+    monkeypatch.setattr(cnpj_enrichment.time, "sleep", lambda s: None)
+    monkeypatch.setattr(LocalCNPJSearch, "melhor_match", staticmethod(lambda *a, **k: None))
+    chave = CacheEnriquecimento.chave_nome("Empresa X", "Campina Grande", "PB")
+
+    def buscar():
+        return CNPJEnricher.buscar_cnpj_empresa("Empresa X", "Campina Grande", "PB", "https://empresax.com.br/")
+
+    # Site fora do ar (erro de conexão) e Google sem resultado: busca incompleta
+    respostas["www.google.com"] = "<html>nenhum resultado</html>"
+    assert buscar() is None
+    assert cache.get("cnpj", chave) is CacheEnriquecimento.AUSENTE
+
+    # Site sem CNPJ e Google com 429: também não
+    respostas["empresax.com.br"] = "<footer>contato</footer>"
+    respostas["www.google.com"] = 429
+    assert buscar() is None
+    assert cache.get("cnpj", chave) is CacheEnriquecimento.AUSENTE
+
+    # Todas responderam sem CNPJ: negativo no cache, e a próxima busca nem vai à rede
+    respostas["www.google.com"] = "<html>nenhum resultado</html>"
+    assert buscar() is None
+    assert cache.get("cnpj", chave) is None
+    chamadas.clear()
+    assert buscar() is None
+    assert chamadas == []
+
+def test_pipeline_so_cacheia_negativo_sem_falhas(cache, rede, monkeypatch):
+    """enriquecer_leads: etapa_website marca falha de site fora do ar; etapa_google só grava negativo sem falha"""
+    pytest.importorskip("requests")
+    pytest.importorskip("sqlalchemy")
+    import enriquecer_leads
+    from scrapers.cnpj_enrichment import CNPJEnricher
+    from scrapers.rate_limit import TokenBucket
+
+    respostas, _ = rede
+    monkeypatch.setattr(CNPJEnricher, "cache", cache)
+    monkeypatch.setitem(enriquecer_leads.FONTES, "google", enriquecer_leads.Fonte(TokenBucket(None), 1))
+    respostas["semcnpj.com.br"] = "<footer>contato</footer>"
+    respostas["lento.com.br"] = 503
+    respostas["www.google.com"] = "<html>nenhum resultado</html>"
+
+    def ctx(nome, website):
+        return {"id": nome, "nome": nome, "cidade": "Campina Grande", "estado": "PB", "website": website,
+                "chave": CacheEnriquecimento.chave_nome(nome, "Campina Grande", "PB"),
+                "cnpj": None, "dados": None, "falhou": False}
+
+    lote = [ctx("Sem CNPJ", "https://semcnpj.com.br/"), ctx("Lento", "https://lento.com.br/"),
+            ctx("Fora", "https://fora.com.br/")]
+    assert enriquecer_leads.etapa_website(lote) == ["google", "google", "google"]
+    assert [c["falhou"] for c in lote] == [False, True, True]
+
+    for c in lote:
+        assert enriquecer_leads.etapa_google(c) is None
+    assert cache.get("cnpj", lote[0]["chave"]) is None
+    assert cache.get("cnpj", lote[1]["chave"]) is CacheEnriquecimento.AUSENTE
+    assert cache.get("cnpj", lote[2]["chave"]) is CacheEnriquecimento.AUSENTE
+
+    # Google com 429: nem quem não teve falha vai para o cache negativo
+    respostas["www.google.com"] = 429
+    sem_falha = ctx("Outra", None)
+    assert enriquecer_leads.etapa_google(sem_falha) is None
+    assert cache.get("cnpj", sem_falha["chave"]) is CacheEnriquecimento.AUSENTE
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
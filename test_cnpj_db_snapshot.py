@@ -0,0 +1,71 @@
+# test_cnpj_db_snapshot.py
+import sys
+sys.path.append('.')
+
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from scrapers import cnpj_db
+from scrapers.local_cnpj_search import ConnectionPool
+
+def _banco(caminho: Path, linhas: int) -> Path:
+    """Banco em WAL, como o build deixa"""
+    conn = sqlite3.connect(caminho.as_posix(), isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS empresas (cnpj_basico TEXT PRIMARY KEY)")
+    conn.executemany("INSERT OR IGNORE INTO empresas VALUES (?)", [(f"{i:08d}",) for i in range(linhas)])
+    conn.close()
+    return caminho
+
+def test_immutable_so_para_arquivo_do_otimizar():
+    """Build sem --snapshot reescreve o cnpj.db no lugar: só o arquivo do otimizar() é imutável"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _banco(Path(tmp) / "cnpj.db", 10)
+        assert not cnpj_db.snapshot_seguro(db)
+
+        cnpj_db.otimizar(db)
+        assert cnpj_db.snapshot_seguro(db)
+
+        # Escrita no próprio arquivo (sem WAL, como o Segmentos.preparar) desfaz a marca
+        conn = sqlite3.connect(db.as_posix())
+        conn.execute("INSERT INTO empresas VALUES ('99999999')")
+        conn.commit()
+        conn.close()
+        assert not cnpj_db.snapshot_seguro(db)
+
+        # Build sem --snapshot (liga o WAL de novo) também
+        cnpj_db.otimizar(db)
+        _banco(db, 20)
+        assert not cnpj_db.snapshot_seguro(db)
+
+def test_pool_reabre_quando_o_arquivo_muda():
+    """Conexões abertas antes de o banco mudar (no lugar ou trocado) não ficam servindo o arquivo velho"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _banco(Path(tmp) / "cnpj.db", 10)
+        cnpj_db.otimizar(db)
+        pool = ConnectionPool(db, size=2)
+
+        def total():
+            with pool.conexao() as conn:
+                return conn.execute("SELECT COUNT(*) FROM empresas").fetchone()[0]
+
+        assert total() == 10 and pool.geracao == 0
+
+        # Rebuild com --snapshot: arquivo novo no lugar do antigo
+        _banco(db, 30)
+        cnpj_db.otimizar(db)
+        assert total() == 30 and pool.geracao == 1
+
+        # Conexão emprestada durante a troca termina a consulta e é fechada na devolução
+        with pool.conexao() as antiga:
+            _banco(db, 40)
+            assert total() == 40
+        assert antiga not in pool._todas
+        assert total() == 40
+        pool.fechar()
+
+if __name__ == "__main__":
+    test_immutable_so_para_arquivo_do_otimizar()
+    test_pool_reabre_quando_o_arquivo_muda()
+    print("✅ Testes do modo snapshot passaram")
@@ -0,0 +1,43 @@
+# test_cnpj_parquet.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import build_cnpj_db
+from scrapers.cnpj_parquet import CNPJParquet
+from test_segmentos import _banco
+
+def test_contar_por_uf_no_parquet_exportado():
+    """build --parquet + contagem por UF/CNAE: mesmos estabelecimentos que o SQLite"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        _banco(pasta).close()
+        base = pasta / "parquet"
+        build_cnpj_db.export_parquet(pasta / "cnpj.db", base, batch_size=3)
+        assert CNPJParquet.disponivel(base)
+
+        # 85 no principal: ESCOLA, ESCOLA MUNICIPAL e ZETA; com secundários, também BETA
+        df = CNPJParquet.contar_por_uf(["85"], base=base)
+        assert df.to_dict("records") == [
+            {"uf": "PB", "estabelecimentos": 3, "com_telefone": 3, "com_celular": 0}
+        ]
+        assert CNPJParquet.contar_por_uf(["85"], secundarios=True, base=base)["estabelecimentos"].tolist() == [4]
+
+        # Imobiliárias por CNAE: matriz e filial, ou só a matriz; UF sem dados fica vazia
+        assert CNPJParquet.contar_por_uf(["6821", "6822"], base=base)["com_celular"].tolist() == [2]
+        assert CNPJParquet.contar_por_uf(["6821"], apenas_matriz=True, base=base)["estabelecimentos"].tolist() == [1]
+        assert CNPJParquet.contar_por_uf(["6821"], ufs=["SP"], base=base).empty
+
+        with pytest.raises(ValueError):
+            CNPJParquet.contar_por_uf(["68.21"], base=base)
+
+if __name__ == "__main__":
+    test_contar_por_uf_no_parquet_exportado()
+    print("✅ Testes do Parquet passaram")
@@ -0,0 +1,125 @@
+# test_cnpj_websites.py
+import sys
+sys.path.append('.')
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from scrapers import http_fetcher
+from scrapers.cnpj_google import CNPJGoogleSearch
+from scrapers.cnpj_utils import cnpj_matriz, calcular_dv
+from scrapers.http_fetcher import Fetcher, FonteIndisponivel
+
+MATRIZ = cnpj_matriz("11222333")
+FILIAL = "112223330002" + calcular_dv("112223330002")
+OUTRA_MATRIZ = cnpj_matriz("44555666")
+
+def _formatar(cnpj: str) -> str:
+    return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+
+PAGINAS = {
+    "matriz.com.br": f"<footer>Empresa LTDA - CNPJ: {_formatar(MATRIZ)}</footer>",
+    "filial.com.br": f"<footer>Loja Centro - CNPJ: {_formatar(FILIAL)}</footer>",
+    "ambos.com.br": f"Filial CNPJ {_formatar(FILIAL)} | matriz {_formatar(OUTRA_MATRIZ)}",
+    "vazio.com.br": "<footer>Sem CNPJ</footer>",
+}
+
+class _Concorrencia:
+    """Conta requisições simultâneas por host"""
+
+    def __init__(self):
+        self.atuais, self.maximo = {}, {}
+        self.lock = threading.Lock()
+
+    def entrar(self, host):
+        with self.lock:
+            self.atuais[host] = self.atuais.get(host, 0) + 1
+            self.maximo[host] = max(self.maximo.get(host, 0), self.atuais[host])
+
+    def sair(self, host):
+        with self.lock:
+            self.atuais[host] -= 1
+
+def _resposta(request: httpx.Request) -> httpx.Response:
+    host = request.url.host
+    if host == "fora.com.br":
+        raise httpx.ConnectError("conexão recusada", request=request)
+    if host == "lento.com.br":
+        return httpx.Response(429)
+    if host == "sumiu.com.br":
+        return httpx.Response(404)
+    return httpx.Response(200, text=PAGINAS.get(host, PAGINAS["vazio.com.br"]),
+                          headers={"content-type": "text/html"})
+
+@pytest.fixture
+def transporte_async(monkeypatch):
+    concorrencia = _Concorrencia()
+
+    async def handler(request):
+        concorrencia.entrar(request.url.host)
+        try:
+            await asyncio.sleep(0.01)
+            return _resposta(request)
+        finally:
+            concorrencia.sair(request.url.host)
+
+    monkeypatch.setattr(http_fetcher.httpx, "AsyncClient",
+                        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+    return concorrencia
+
+def test_extrair_cnpj_so_matriz():
+    """Site: só CNPJ de matriz (0001); Google aceita filial se não houver matriz"""
+    assert CNPJGoogleSearch.extrair_cnpj(PAGINAS["matriz.com.br"]) == MATRIZ
+    assert CNPJGoogleSearch.extrair_cnpj(PAGINAS["filial.com.br"]) is None
+    assert CNPJGoogleSearch.extrair_cnpj(PAGINAS["ambos.com.br"]) == OUTRA_MATRIZ
+    assert CNPJGoogleSearch.extrair_cnpj(PAGINAS["filial.com.br"], apenas_matriz=False) == FILIAL
+
+def test_buscar_cnpj_websites_separa_indisponiveis(transporte_async):
+    """Fora do ar e 429 ficam fora do resultado; 404 e página sem CNPJ são "não encontrado" """
+    sites = [f"https://{h}/" for h in ("matriz.com.br", "filial.com.br", "ambos.com.br", "vazio.com.br",
+                                       "sumiu.com.br", "fora.com.br", "lento.com.br")]
+    resultado = CNPJGoogleSearch.buscar_cnpj_websites(sites + [sites[0], None])
+    assert resultado == {
+        "https://matriz.com.br/": MATRIZ,
+        "https://filial.com.br/": None,
+        "https://ambos.com.br/": OUTRA_MATRIZ,
+        "https://vazio.com.br/": None,
+        "https://sumiu.com.br/": None,
+    }
+
+def test_buscar_cnpj_websites_limita_conexoes_por_host(transporte_async):
+    sites = [f"https://matriz.com.br/pagina{i}" for i in range(10)] + [f"https://site{i}.com.br/" for i in range(10)]
+    CNPJGoogleSearch.buscar_cnpj_websites(sites, por_host=2)
+    assert transporte_async.maximo["matriz.com.br"] <= 2
+
+def test_fetcher_sincrono_limita_conexoes_por_host(monkeypatch):
+    concorrencia = _Concorrencia()
+
+    def handler(request):
+        concorrencia.entrar(request.url.host)
+        try:
+            time.sleep(0.02)
+            return _resposta(request)
+        finally:
+            concorrencia.sair(request.url.host)
+
+    monkeypatch.setattr(Fetcher, "_cliente", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(Fetcher, "_hosts", {})
+    urls = [f"https://matriz.com.br/{i}" for i in range(8)] + [f"https://outro.com.br/{i}" for i in range(8)]
+    with ThreadPoolExecutor(16) as pool:
+        textos = list(pool.map(Fetcher.ler, urls))
+
+    assert all(textos)
+    assert concorrencia.maximo["matriz.com.br"] <= http_fetcher.POR_HOST
+    assert concorrencia.maximo["outro.com.br"] <= http_fetcher.POR_HOST
+
+    with pytest.raises(FonteIndisponivel):
+        Fetcher.ler("https://lento.com.br/")
+    assert CNPJGoogleSearch.buscar_cnpj_website("https://filial.com.br/") is None
+    assert CNPJGoogleSearch.buscar_cnpj_website("https://matriz.com.br/") == MATRIZ
@@ -0,0 +1,47 @@
+# test_exportador.py
+import sys
+sys.path.append('.')
+
+import gzip
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from scrapers.exportador import caminho_saida, exportar
+
+LINHAS = [(f"EMPRESA {i}", f"{i:08d}", "5583988887777" if i % 2 else "", "PB" if i % 3 else "SP") for i in range(50)]
+
+def _cursor():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (razao_social, cnpj_basico, telefone1, uf)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", LINHAS)
+    return conn.execute("SELECT * FROM t")
+
+def test_csv_gzip_pela_extensao():
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = caminho_saida(Path(tmp) / "saida", "csv", "gzip")
+        assert destino.name == "saida.csv.gz"
+        stats = exportar(_cursor(), destino, lote=7)
+        with gzip.open(destino, "rt", encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == len(LINHAS) + 1
+        assert stats.total == 50 and stats.com_telefone == 25
+
+def test_parquet_usa_a_compressao_pedida():
+    """--compressao vale para Parquet: vira o codec das colunas (o nome do arquivo não muda)"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    with tempfile.TemporaryDirectory() as tmp:
+        for compressao, codec in ((None, "SNAPPY"), ("gzip", "GZIP"), ("zstd", "ZSTD")):
+            destino = caminho_saida(Path(tmp) / f"saida_{compressao}", "parquet", compressao)
+            assert destino.suffix == ".parquet"
+            exportar(_cursor(), destino, compressao=compressao, lote=20)
+
+            arquivo = pq.ParquetFile(destino)
+            assert arquivo.metadata.num_rows == len(LINHAS)
+            assert arquivo.metadata.row_group(0).column(0).compression == codec
+
+if __name__ == "__main__":
+    test_csv_gzip_pela_extensao()
+    test_parquet_usa_a_compressao_pedida()
+    print("✅ Testes do exportador passaram")
@@ -0,0 +1,120 @@
+# test_melhor_match_many.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import sqlite3
+import tempfile
+import zipfile
+from pathlib import Path
+
+import build_cnpj_db
+from scrapers import local_cnpj_search
+from scrapers.local_cnpj_search import LocalCNPJSearch
+
+# (cnpj_basico, razão social, nome fantasia, UF, código TOM, telefone)
+EMPRESAS = [
+    ("11111111", "PADARIA PAO DOURADO LTDA", "PAO DOURADO", "SP", "7107", "33334444"),
+    ("22222222", "PADARIA PAO DE OURO LTDA", "", "SP", "6291", "32325555"),
+    ("33333333", "AUTO MECANICA SAO JORGE LTDA", "MECANICA SAO JORGE", "SP", "7107", "988887777"),
+    ("44444444", "AUTO MECANICA SAO JORGE EIRELI", "", "PB", "2051", "32216666"),
+    ("55555555", "ESCOLA ESTRELA DO SABER LTDA", "COLEGIO ESTRELA", "PB", "2051", ""),
+    ("66666666", "CLINICA SORRISO FELIZ LTDA", "SORRISO FELIZ", "SP", "6291", "991112222"),
+]
+
+MUNICIPIOS = [
+    ("3550308", "São Paulo", "SP", "7107"),
+    ("3509502", "Campinas", "SP", "6291"),
+    ("2507507", "João Pessoa", "PB", "2051"),
+]
+
+LEADS = [
+    ("Padaria Pão Dourado", "São Paulo", "SP"),
+    ("Mecanica Sao Jorge", "Joao Pessoa", "PB"),
+    ("Mecanica Sao Jorge", "São Paulo", "SP"),
+    "Clinica Sorriso Feliz",
+    ("Empresa Que Nao Existe", "Campinas", "SP"),
+    ("Padaria Pao de Ouro", "Campinas", "SP"),
+    ("Padaria Pão Dourado", "São Paulo", "SP"),       # repetido
+    ("Colegio Estrela", "João Pessoa", "PB"),
+    ("Sorriso Feliz", "Cidade Que Nao Existe", "SP"),
+]
+
+def _criar_zip(pasta: Path, nome: str, linhas: list) -> Path:
+    """Zip no formato da Receita (;, latin1)"""
+    csv = "".join(";".join(f'"{c}"' for c in linha) + "\n" for linha in linhas)
+    caminho = pasta / nome
+    with zipfile.ZipFile(caminho, "w") as z:
+        z.writestr(nome.replace(".zip", ".CSV"), csv.encode("latin1"))
+    return caminho
+
+def _montar_banco(pasta: Path) -> Path:
+    """cnpj.db com EMPRESAS (matriz), índice trigram e tabela municipios"""
+    empresas = _criar_zip(pasta, "Empresas0.zip", [
+        (b, razao, "2062", "49", "1000,00", "01", "") for b, razao, *_ in EMPRESAS
+    ])
+    estabelecimentos = _criar_zip(pasta, "Estabelecimentos0.zip", [
+        (b, "0001", "00", "1", fantasia, "02", "20200101", "", "", "", "", "5611201", "",
+         "RUA", "A", "1", "", "CENTRO", "01000000", uf, tom, "11" if tel else "", tel, "", "", "", "")
+        for b, _, fantasia, uf, tom, tel in EMPRESAS
+    ])
+
+    db = pasta / "cnpj.db"
+    conn = sqlite3.connect(db.as_posix(), isolation_level=None)
+    build_cnpj_db.init_db(conn)
+    build_cnpj_db.bulk_import_zip(conn, empresas, "empresas")
+    build_cnpj_db.bulk_import_zip(conn, estabelecimentos, "estabelecimentos")
+    build_cnpj_db.rebuild_nomes_fts(conn)
+    conn.execute("CREATE TABLE municipios (codigo_ibge TEXT PRIMARY KEY, nome TEXT, uf TEXT, codigo_tom TEXT)")
+    conn.executemany("INSERT INTO municipios VALUES (?, ?, ?, ?)", MUNICIPIOS)
+    conn.close()
+    return db
+
+def _comparar_com_melhor_match(nomes_por_lead: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_original, nomes_original = local_cnpj_search.DB, local_cnpj_search.NOMES_POR_LEAD
+        local_cnpj_search.DB = _montar_banco(Path(tmp))
+        local_cnpj_search.NOMES_POR_LEAD = nomes_por_lead
+        LocalCNPJSearch.fechar()
+        try:
+            lote = LocalCNPJSearch.melhor_match_many(LEADS)
+            um_a_um = [
+                LocalCNPJSearch.melhor_match(lead) if isinstance(lead, str)
+                else LocalCNPJSearch.melhor_match(*lead)
+                for lead in LEADS
+            ]
+        finally:
+            LocalCNPJSearch.fechar()
+            local_cnpj_search.DB, local_cnpj_search.NOMES_POR_LEAD = db_original, nomes_original
+
+    assert len(lote) == len(LEADS)
+    for lead, a, b in zip(LEADS, lote, um_a_um):
+        if b is None:
+            assert a is None, (lead, a)
+            continue
+        assert a is not None, (lead, b)
+        for campo in ("cnpj", "cnpj_basico", "score", "telefone", "uf", "municipio"):
+            assert a.get(campo) == b.get(campo), (lead, campo, a.get(campo), b.get(campo))
+    return lote
+
+def test_melhor_match_many_ordem_e_resultados_com_indice():
+    """Em lote (índice em memória por cidade): mesma ordem e mesmos matches do melhor_match"""
+    lote = _comparar_com_melhor_match(local_cnpj_search.NOMES_POR_LEAD)
+
+    basicos = [r and r["cnpj_basico"] for r in lote]
+    assert basicos == [
+        "11111111", "44444444", "33333333", "66666666", None,
+        "22222222", "11111111", "55555555", "66666666",
+    ], basicos
+    assert lote[0]["cnpj"] == "11111111000191"
+    assert lote[0]["telefone"] == "551133334444"
+    assert lote[0] is not lote[6], "leads repetidos devem receber dicts independentes"
+
+def test_melhor_match_many_ordem_e_resultados_com_fts():
+    """Cidade grande demais para o índice em memória: FTS por lead, mesmos resultados"""
+    _comparar_com_melhor_match(0)
+
+if __name__ == "__main__":
+    test_melhor_match_many_ordem_e_resultados_com_indice()
+    test_melhor_match_many_ordem_e_resultados_com_fts()
+    print("✅ melhor_match_many confere com melhor_match")
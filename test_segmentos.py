@@ -0,0 +1,82 @@
+# test_segmentos.py
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import sqlite3
+import tempfile
+import zipfile
+from pathlib import Path
+
+import build_cnpj_db
+from scrapers.segmentos import Segmentos
+
+# (cnpj_basico, ordem, razão social, CNAE principal, CNAEs secundários, telefone)
+ESTABELECIMENTOS = [
+    ("10000001", "0001", "ESCOLA ALFA LTDA", "8513900", "", "32216666"),
+    ("10000002", "0001", "BETA SERVICOS LTDA", "4781400", "8599604,7319002", "32217777"),
+    ("10000003", "0001", "GAMA PARTICIPACOES LTDA", "6821801", "", "988887777"),
+    ("10000003", "0002", "GAMA PARTICIPACOES LTDA", "6821801", "", "988886666"),
+    ("10000004", "0001", "IMOBILIARIA DELTA LTDA", "4781400", "", ""),
+    ("10000005", "0001", "ESCOLA MUNICIPAL EPSILON", "8513900", "", "32218888"),
+    ("10000006", "0001", "ZETA EDUCACIONAL SA", "8532500", "8599699", "32219999"),
+    ("10000007", "0001", "PADARIA ETA LTDA", "1091101", "4721102", "32210000"),
+]
+
+def _criar_zip(pasta: Path, nome: str, linhas: list) -> Path:
+    """Zip no formato da Receita (;, latin1)"""
+    csv = "".join(";".join(f'"{c}"' for c in linha) + "\n" for linha in linhas)
+    caminho = pasta / nome
+    with zipfile.ZipFile(caminho, "w") as z:
+        z.writestr(nome.replace(".zip", ".CSV"), csv.encode("latin1"))
+    return caminho
+
+def _banco(pasta: Path) -> sqlite3.Connection:
+    empresas = _criar_zip(pasta, "Empresas0.zip", sorted({
+        (b, razao, "2062", "49", "1000,00", "01", "") for b, _, razao, *_ in ESTABELECIMENTOS
+    }))
+    estabelecimentos = _criar_zip(pasta, "Estabelecimentos0.zip", [
+        (b, ordem, "00", "1" if ordem == "0001" else "2", "", "02", "20200101", "", "", "", "",
+         principal, secundarios, "RUA", "A", "1", "", "CENTRO", "58000000", "PB", "2051",
+         "83" if tel else "", tel, "", "", "", "")
+        for b, ordem, _, principal, secundarios, tel in ESTABELECIMENTOS
+    ])
+    conn = sqlite3.connect((pasta / "cnpj.db").as_posix(), isolation_level=None)
+    build_cnpj_db.init_db(conn)
+    build_cnpj_db.bulk_import_zip(conn, empresas, "empresas")
+    build_cnpj_db.bulk_import_zip(conn, estabelecimentos, "estabelecimentos")
+    return conn
+
+def _basicos(conn, nome: str) -> list:
+    return sorted(r[0] for r in Segmentos.consultar(conn, nome, colunas=["cnpj_basico"]))
+
+def test_segmentos_por_razao_social_e_cnae():
+    """Razão social OU CNAE (principal ou secundário), com exclusões, matriz e telefone"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = _banco(Path(tmp))
+        linhas = Segmentos.atualizar(conn, tudo=True)
+
+        # 6821 sem IMOBILI no nome entra pelo CNAE (só a matriz); IMOBILIARIA pelo nome
+        assert _basicos(conn, "imobiliarias") == ["10000003", "10000004"]
+        assert linhas["imobiliarias"] == 2
+
+        # 85 no principal (ESCOLA, ZETA) ou só no secundário (BETA)
+        assert _basicos(conn, "educacao") == ["10000001", "10000002", "10000005", "10000006"]
+
+        # `excluir` vale também para quem entrou pelo CNAE
+        assert _basicos(conn, "educacao_privada") == ["10000001", "10000002", "10000006"]
+
+        # Ensino superior: 8532 no principal, com telefone 1 válido
+        assert _basicos(conn, "ensino_superior") == ["10000006"]
+
+        # CNAE principal gravado na tabela, não o secundário que casou
+        cnae = dict(Segmentos.consultar(conn, "educacao", colunas=["cnpj_basico", "cnae"]))
+        assert cnae["10000002"] == "4781400"
+
+        # Nada desatualizado depois de materializar
+        assert Segmentos.desatualizados(conn) == []
+        conn.close()
+
+if __name__ == "__main__":
+    test_segmentos_por_razao_social_e_cnae()
+    print("✅ Testes de segmentos passaram")